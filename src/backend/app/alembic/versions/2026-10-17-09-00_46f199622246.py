@@ -0,0 +1,82 @@
+"""store image payloads as binary data with storage metadata
+
+Revision ID: 46f199622246
+Revises: bc1810eec573
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+import sqlmodel # added
+
+from backend.app.app.schemas.common_schema import StorageBackend
+
+# revision identifiers, used by Alembic.
+revision = '46f199622246'
+down_revision = 'bc1810eec573'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Image',
+    sa.Column('storage_backend', sqlalchemy_utils.types.choice.ChoiceType(StorageBackend),
+              nullable=False, server_default=StorageBackend.db.value)
+    )
+    op.add_column('Image',
+    sa.Column('file_key', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True)
+    )
+    op.add_column('Image', sa.Column('file_size', sa.BigInteger(), nullable=True))
+    op.add_column('Image',
+    sa.Column('file_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True)
+    )
+    op.add_column('Image',
+    sa.Column('content_type', sqlmodel.sql.sqltypes.AutoString(), nullable=True)
+    )
+
+    # existing base64 payloads are decoded in place and kept in the "db" backend
+    op.alter_column('Image', 'file',
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(), type_=sa.LargeBinary(),
+                    nullable=True, postgresql_using="decode(file, 'base64')")
+    op.execute(
+        """
+        UPDATE "Image"
+        SET file_size = length(file),
+            file_hash = encode(sha256(file), 'hex'),
+            file_key = encode(sha256(file), 'hex')
+        """
+    )
+    op.alter_column('Image', 'file_key', nullable=False)
+    op.alter_column('Image', 'file_size', nullable=False)
+    op.alter_column('Image', 'file_hash', nullable=False)
+    op.alter_column('Image', 'storage_backend', server_default=None)
+    op.create_index(op.f('ix_Image_file_key'), 'Image', ['file_key'], unique=False)
+    op.create_index(op.f('ix_Image_file_hash'), 'Image', ['file_hash'], unique=False)
+
+
+def downgrade():
+    # only payloads stored in the "db" backend can be restored into the text column,
+    # images stored elsewhere must be moved back to the database first
+    stored_elsewhere = op.get_bind().execute(
+        sa.text(
+            """SELECT count(*) FROM "Image" WHERE storage_backend <> :backend OR file IS NULL"""
+        ),
+        {"backend": StorageBackend.db.value},
+    ).scalar()
+    if stored_elsewhere:
+        raise RuntimeError(
+            f"{stored_elsewhere} images are not stored in the database, "
+            "move their payloads into the file column before downgrading"
+        )
+    op.drop_index(op.f('ix_Image_file_hash'), table_name='Image')
+    op.drop_index(op.f('ix_Image_file_key'), table_name='Image')
+    op.alter_column('Image', 'file',
+                    existing_type=sa.LargeBinary(), type_=sqlmodel.sql.sqltypes.AutoString(),
+                    nullable=False,
+                    postgresql_using="translate(encode(file, 'base64'), E'\\n', '')")
+    op.drop_column('Image', 'content_type')
+    op.drop_column('Image', 'file_hash')
+    op.drop_column('Image', 'file_size')
+    op.drop_column('Image', 'file_key')
+    op.drop_column('Image', 'storage_backend')
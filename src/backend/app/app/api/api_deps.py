@@ -10,11 +10,13 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.app.app import crud
 from backend.app.app.core.config import settings
-from backend.app.app.core.security import decode_token
+from backend.app.app.db.redis_pool import get_pooled_client, get_redis_url
 from backend.app.app.db.session import SessionLocal, SessionLocalCelery
 from backend.app.app.models.user_model import User
 from backend.app.app.schemas.common_schema import IMetaGeneral, TokenType
-from backend.app.app.utils.token import get_valid_tokens
+from backend.app.app.schemas.user_schema import IUserPrincipal
+from backend.app.app.utils.principal_cache import get_cached_principal, set_cached_principal
+from backend.app.app.utils.token import decode_token_cached, is_valid_token
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -22,12 +24,18 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 async def get_redis_client() -> Redis:
-    redis = await aioredis.from_url(
-        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
-        max_connections=10,
-        encoding="utf8",
-        decode_responses=True,
-    )
+    """
+    Client of the application-lifetime pool, a standalone client when the app runs without its
+    lifespan.
+    """
+    redis = get_pooled_client()
+    if redis is None:
+        redis = await aioredis.from_url(
+            get_redis_url(),
+            max_connections=10,
+            encoding="utf8",
+            decode_responses=True,
+        )
     return redis
 
 
@@ -46,13 +54,17 @@ async def get_general_meta() -> IMetaGeneral:
     return IMetaGeneral(roles=current_roles)
 
 
-def get_current_user(required_roles: list[str] = None) -> Callable[[], User]:
-    async def current_user(
+def get_current_principal(required_roles: list[str] = None) -> Callable[[], IUserPrincipal]:
+    """
+    Authorizes the request with the cached principal of the token owner,
+    the database is queried only when the principal is not cached.
+    """
+    async def current_principal(
         access_token: str = Depends(reusable_oauth2),
         redis_client: Redis = Depends(get_redis_client),
-    ) -> User:
+    ) -> IUserPrincipal:
         try:
-            payload = decode_token(access_token)
+            payload = decode_token_cached(access_token)
         except ExpiredSignatureError:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -70,25 +82,31 @@ def get_current_user(required_roles: list[str] = None) -> Callable[[], User]:
             )
 
         user_id = payload["sub"]
-        valid_access_tokens = await get_valid_tokens(
-            redis_client, user_id, TokenType.ACCESS
-        )
-        if valid_access_tokens and access_token not in valid_access_tokens:
+        if not await is_valid_token(redis_client, user_id, access_token, TokenType.ACCESS):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Could not validate credentials",
             )
-        user: User = await crud.user.get(id=user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
 
-        if not user.is_active:
+        principal = await get_cached_principal(redis_client, user_id)
+        if principal is None:
+            user: User = await crud.user.get(id=user_id)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            principal = IUserPrincipal(
+                id=user.id,
+                is_active=user.is_active,
+                role_name=user.role.name if user.role else None,
+            )
+            await set_cached_principal(redis_client, principal)
+
+        if not principal.is_active:
             raise HTTPException(status_code=400, detail="Inactive user")
 
         if required_roles:
             is_valid_role = False
             for role in required_roles:
-                if role == user.role.name:
+                if role == principal.role_name:
                     is_valid_role = True
 
             if not is_valid_role:
@@ -97,6 +115,25 @@ def get_current_user(required_roles: list[str] = None) -> Callable[[], User]:
                     detail=f"""Role "{required_roles}" is required for this action""",
                 )
 
+        return principal
+
+    return current_principal
+
+
+def get_current_user(
+    required_roles: list[str] = None, with_relations: bool = False
+) -> Callable[[], User]:
+    """
+    Authorizes the request like `get_current_principal` and loads the whole user,
+    for endpoints which need more than its id and role. Groups and images are loaded
+    only `with_relations`, e.g. to respond with the user read schema.
+    """
+    async def current_user(
+        principal: IUserPrincipal = Depends(get_current_principal(required_roles)),
+    ) -> User:
+        user: User = await crud.user.get(id=principal.id, with_relations=with_relations)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
         return user
 
     return current_user
@@ -1,19 +1,157 @@
+from collections.abc import Awaitable, Callable
+
 from asgiref.sync import async_to_sync
 from celery import states
 from celery.exceptions import Ignore
+from celery.signals import celeryd_init, worker_init, worker_process_init, worker_process_shutdown
+from celery.utils.log import get_task_logger
+from redis.exceptions import RedisError
 
 from backend.app.app import crud
 from backend.app.app.core.celery import celery
+from backend.app.app.core.config import settings
+from backend.app.app.crud.image_crud import load_image_predictor
+from backend.app.app.models.image_model import Image
+from backend.app.app.utils.memory import MiB, get_pss_bytes, get_rss_bytes, log_memory_usage
+from backend.app.app.db.redis_pool import get_redis_connection
+from backend.app.app.utils.task_state import set_task_state
+from settings import INFERENCE_BACKEND
+
+logger = get_task_logger(__name__)
+
+# number of pool processes, set before the pool forks
+pool_size: int | None = None
+
+
+async def record_task_state(redis_client, task_id: str, state: str, **fields) -> None:
+    try:
+        await set_task_state(redis_client, task_id, state, **fields)
+    except RedisError:
+        # state tracking never fails the prediction itself
+        logger.warning("Could not record state %s of task %s", state, task_id, exc_info=True)
+
+
+async def track_predictions(
+        task_id: str, predict: Callable[[], Awaitable[tuple[list[Image], dict[str, str]]]]
+) -> None:
+    """
+    run the prediction, recording the task state (its result and the errors of failed images)
+    in redis
+    """
+    async with get_redis_connection() as redis_client:
+        await record_task_state(redis_client, task_id, states.STARTED)
+        try:
+            images, failed = await predict()
+        except Exception as e:
+            await record_task_state(redis_client, task_id, states.FAILURE,
+                                    error=str(e) or type(e).__name__)
+            raise
+        await record_task_state(redis_client, task_id, states.SUCCESS,
+                                result={str(image.id): image.predictions for image in images},
+                                failed=failed or None)
 
 
 @celery.task(bind=True, name="tasks:make_predictions",
              task_name="image classification", ignore_result=True)
-def make_predictions(self, image_id: int, device: str) -> None:
+def make_predictions(
+        self, image_id: int, device: str, top_k: int | None = settings.PREDICTION_TOP_K
+) -> None:
     """
-    run async task in celery to get predictions
+    run async task in celery to get predictions, of all classes when top_k is None
     """
+    async def predict() -> tuple[list[Image], dict[str, str]]:
+        return [await crud.image.predict_image(image_id=image_id, device=device, top_k=top_k)], {}
+
     try:
-        return async_to_sync(crud.image.predict_image)(image_id=image_id, device=device)
+        with log_memory_usage(logger, f"make_predictions[{image_id}]"):
+            async_to_sync(track_predictions)(self.request.id, predict)
     except AttributeError:
         self.update_state(state=states.FAILURE)
         raise Ignore()
+
+
+@celery.task(bind=True, name="tasks:make_batch_predictions",
+             task_name="batch image classification", ignore_result=True)
+def make_batch_predictions(
+        self, image_ids: list[str], device: str, top_k: int | None = settings.PREDICTION_TOP_K
+) -> None:
+    """
+    run async task in celery to get predictions for many images in stacked batches
+    """
+    async def predict() -> tuple[list[Image], dict[str, str]]:
+        return await crud.image.predict_images(image_ids=image_ids, device=device, top_k=top_k)
+
+    try:
+        with log_memory_usage(logger, f"make_batch_predictions[{len(image_ids)} images]"):
+            async_to_sync(track_predictions)(self.request.id, predict)
+    except AttributeError:
+        self.update_state(state=states.FAILURE)
+        raise Ignore()
+
+
+@celeryd_init.connect
+def record_pool_size(conf=None, options=None, **kwargs) -> None:
+    """
+    remember the pool size (celery defaults to the number of cpus) to partition cores between
+    processes
+    """
+    from ml.runtime import get_available_cpus
+
+    global pool_size
+    pool_size = (options or {}).get("concurrency") or conf.worker_concurrency \
+        or len(get_available_cpus())
+
+
+@worker_init.connect
+def load_model(**kwargs) -> None:
+    """
+    load the model in the main worker process, before the pool forks,
+    so all worker processes share one copy of the weights
+    """
+    from ml.backends import get_backend_class
+
+    if not get_backend_class(INFERENCE_BACKEND).fork_safe:
+        # e.g. onnxruntime sessions own thread pools, each worker process creates its own
+        return
+    rss_before = get_rss_bytes()
+    load_image_predictor()
+    logger.info("Model loaded: rss %.1f MiB (%+.1f MiB)", get_rss_bytes() / MiB,
+                (get_rss_bytes() - rss_before) / MiB)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    """
+    pin the worker process to its share of cores, set torch threads, create and warm up the
+    per-process classifier (inherits the already loaded model) and report memory
+    """
+    from billiard.process import current_process
+    from ml.runtime import configure_inference_runtime
+
+    runtime = configure_inference_runtime(process_index=getattr(current_process(), "index", None),
+                                          num_processes=pool_size or 1)
+    logger.info("Worker process runtime: cpus %s (pinned: %s), intra-op threads %d, "
+                "inter-op threads %d", runtime.cpus, runtime.pinned, runtime.intra_op_threads,
+                runtime.inter_op_threads)
+
+    timings = crud.image.warm_up_classifier()
+    logger.info("Model warmed up (batch size: ms): %s",
+                {batch_size: round(ms, 1) for batch_size, ms in timings.items()})
+    pss = get_pss_bytes()
+    logger.info("Worker process ready: rss %.1f MiB, pss %s", get_rss_bytes() / MiB,
+                f"{pss / MiB:.1f} MiB" if pss is not None else "n/a")
+
+
+@worker_process_shutdown.connect
+def report_batch_sizes(**kwargs) -> None:
+    """
+    log achieved batch sizes of the micro-batching predictor
+    """
+    if not crud.image.is_classifier_loaded:
+        return
+    from ml.batching import MicroBatchingPredictor
+
+    classifier = crud.image.classifier
+    if isinstance(classifier, MicroBatchingPredictor):
+        logger.info("Inference batch size histogram: %s", classifier.get_batch_size_histogram())
+        classifier.close()
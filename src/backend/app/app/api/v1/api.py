@@ -8,6 +8,7 @@ from backend.app.app.api.v1.endpoints import (
     weather,
     report,
     periodic_tasks, image,
+    monitoring,
 )
 
 api_router = APIRouter()
@@ -19,6 +20,7 @@ api_router.include_router(image.router, prefix="/image", tags=["image"])
 api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
 api_router.include_router(weather.router, prefix="/weather", tags=["weather"])
 api_router.include_router(report.router, prefix="/report", tags=["report"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
 api_router.include_router(
     periodic_tasks.router, prefix="/periodic_tasks", tags=["periodic_tasks"]
 )
\ No newline at end of file
@@ -1,7 +1,15 @@
-from backend.app.app.schemas.response_schema import IGetResponseBase, create_response
+from backend.app.app.api import api_deps
+from backend.app.app.db.redis_pool import get_redis_pool_stats
+from backend.app.app.schemas.response_schema import IGetResponseBase, create_response, \
+    IDeleteResponseBase
+from backend.app.app.schemas.role_schema import IRoleEnum
+from backend.app.app.schemas.user_schema import IUserPrincipal
+from backend.app.app.utils.prediction_cache import get_prediction_cache_stats, \
+    reset_prediction_cache_stats
 from datetime import datetime
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from fastapi_cache.decorator import cache
+from redis.asyncio import Redis
 
 router = APIRouter()
 
@@ -23,4 +31,53 @@ async def get_a_normal_response() -> IGetResponseBase[str | datetime]:
     return create_response(data=datetime.now())
 
 
+@router.get("/predictions/stats")
+async def get_prediction_cache_statistics(
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
+    ),
+    redis_client: Redis = Depends(api_deps.get_redis_client),
+) -> IGetResponseBase[dict[str, int | float | str]]:
+    """
+    Gets hit/miss counters of the prediction cache
+
+    Required roles:
+    - admin
+    """
+    return create_response(data=await get_prediction_cache_stats(redis_client))
+
+
+@router.delete("/predictions/stats")
+async def reset_prediction_cache_statistics(
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
+    ),
+    redis_client: Redis = Depends(api_deps.get_redis_client),
+) -> IDeleteResponseBase[dict[str, int | float | str]]:
+    """
+    Resets hit/miss counters of the prediction cache, returns the counters before reset
+
+    Required roles:
+    - admin
+    """
+    stats = await get_prediction_cache_stats(redis_client)
+    await reset_prediction_cache_stats(redis_client)
+    return create_response(data=stats)
+
+
+@router.get("/redis/pool")
+async def get_redis_pool_statistics(
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
+    ),
+) -> IGetResponseBase[dict[str, int | float | bool]]:
+    """
+    Gets in-use and idle connections of the Redis pool of this API process
+
+    Required roles:
+    - admin
+    """
+    return create_response(data=get_redis_pool_stats())
+
+
 # TODO: Add example image count cached/no-cached
@@ -6,6 +6,7 @@ from backend.app.app.api import api_deps
 from backend.app.app.dependencies import group_deps, user_deps
 from backend.app.app.models.group_model import Group
 from backend.app.app.models.user_model import User
+from backend.app.app.schemas.user_schema import IUserPrincipal
 from backend.app.app.schemas.group_schema import (
     IGroupCreate,
     IGroupRead,
@@ -31,7 +32,7 @@ router = APIRouter()
 @router.get("")
 async def get_groups(
     params: Params = Depends(),
-    current_user: User = Depends(api_deps.get_current_user()),
+    current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
 ) -> IGetResponsePaginated[IGroupRead]:
     """
     Gets a paginated list of groups
@@ -43,12 +44,12 @@ async def get_groups(
 @router.get("/{group_id}")
 async def get_group_by_id(
     group_id: UUID,
-    current_user: User = Depends(api_deps.get_current_user()),
+    current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
 ) -> IGetResponseBase[IGroupReadWithUsers]:
     """
     Gets a group by its id
     """
-    group = await crud.group.get(id=group_id)
+    group = await crud.group.get(id=group_id, with_users=True)
     if group:
         return create_response(data=group)
     else:
@@ -58,8 +59,8 @@ async def get_group_by_id(
 @router.post("")
 async def create_group(
     group: IGroupCreate,
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
     ),
 ) -> IPostResponseBase[IGroupRead]:
     """
@@ -80,8 +81,8 @@ async def create_group(
 async def update_group(
     group: IGroupUpdate,
     current_group: Group = Depends(group_deps.get_group_by_id),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
     ),
 ) -> IPutResponseBase[IGroupRead]:
     """
@@ -99,8 +100,8 @@ async def update_group(
 async def add_user_into_a_group(
     user: User = Depends(user_deps.is_valid_user),
     group: Group = Depends(group_deps.get_group_by_id),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
     ),
 ) -> IPostResponseBase[IGroupRead]:
     """
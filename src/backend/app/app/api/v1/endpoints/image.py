@@ -1,26 +1,33 @@
+import json
 import time
+from collections.abc import AsyncIterator
 from io import BytesIO
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, status, UploadFile, File, HTTPException
+from celery import states
+from fastapi import APIRouter, Depends, status, UploadFile, File, HTTPException, Query
 from fastapi_pagination import Params
+from redis.asyncio import Redis
 from starlette.responses import StreamingResponse
 
 from backend.app.app import crud
 from backend.app.app.api import api_deps
-from backend.app.app.api.celery_task import make_predictions
+from backend.app.app.api.celery_task import make_batch_predictions, make_predictions
+from backend.app.app.core.config import settings
 from backend.app.app.dependencies import image_deps
 from backend.app.app.models import User
 from backend.app.app.models.image_model import Image
-from backend.app.app.schemas.common_schema import Device
+from backend.app.app.schemas.common_schema import Device, ICountEnum, IPaginationEnum
 from backend.app.app.schemas.image_schema import IImageRead
+from backend.app.app.schemas.role_schema import IRoleEnum
+from backend.app.app.schemas.user_schema import IUserPrincipal
 from backend.app.app.schemas.response_schema import IGetResponsePaginated, create_response, IGetResponseBase, \
-    IPostResponseBase, IDeleteResponseBase, IPutResponseBase
+    IPostResponseBase, IDeleteResponseBase, IPutResponseBase, IGetResponseCursorPaginated
 from backend.app.app.utils.exceptions import NameExistException
-from backend.app.app.utils.image_processing import encode_decode_img
-from PIL import Image as PILImage
+from backend.app.app.utils.task_state import get_task_state, set_task_state, watch_task_state
+from PIL import Image as PILImage, UnidentifiedImageError
 
-from ml.services import view_prediction
+from project_utils import BufferReader
 
 router = APIRouter()
 
@@ -28,20 +35,93 @@ router = APIRouter()
 @router.get("")
 async def get_images(
         params: Params = Depends(),
-        current_user: User = Depends(api_deps.get_current_user()),
-) -> IGetResponsePaginated[IImageRead]:
+        pagination: IPaginationEnum = IPaginationEnum.offset,
+        cursor: str | None = Query(
+            default=None, description="next_cursor of the previous page (cursor pagination)"
+        ),
+        with_total: bool = Query(
+            default=False, description="Count the images (cursor pagination)"
+        ),
+        count: ICountEnum = Query(
+            default=ICountEnum.exact,
+            description="Exact total (cached for a few seconds) or table size estimate",
+        ),
+        current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
+) -> IGetResponsePaginated[IImageRead] | IGetResponseCursorPaginated[IImageRead]:
     """
-    Gets a paginated list of images
+    Gets a paginated list of images, by page number (offset) or, for deep pages,
+    after the cursor of the previous page (cursor pagination, implied by `cursor`)
     """
-    images = await crud.image.get_multi_paginated(params=params)
+    if pagination == IPaginationEnum.cursor or cursor is not None:
+        images = await crud.image.get_multi_cursor_paginated(
+            size=params.size, cursor=cursor, with_total=with_total, count=count
+        )
+        images.items = [
+            IImageRead.model_validate(image, from_attributes=True) for image in images.items
+        ]
+        return create_response(data=images)
+
+    images = await crud.image.get_multi_paginated(params=params, count=count)
 
     return create_response(data=images)
 
 
+async def get_visible_task_state(
+        task_id: UUID, redis_client: Redis, current_user: IUserPrincipal
+) -> dict:
+    task_state = await get_task_state(redis_client, task_id)
+    # tasks of other users are reported as missing, unless requested by an admin
+    if task_state is None or (task_state.get("created_by") != str(current_user.id)
+                              and current_user.role_name != IRoleEnum.admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Task {task_id} not found"
+        )
+    return task_state
+
+
+@router.get("/tasks/{task_id}")
+async def get_prediction_task(
+        task_id: UUID,
+        redis_client: Redis = Depends(api_deps.get_redis_client),
+        current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
+) -> IGetResponseBase[dict]:
+    """
+    Gets the state of a prediction task (PENDING, STARTED, SUCCESS or FAILURE),
+    with the predictions of each image once it succeeded
+    """
+    return create_response(data=await get_visible_task_state(task_id, redis_client, current_user))
+
+
+@router.get("/tasks/{task_id}/events")
+async def stream_prediction_task(
+        task_id: UUID,
+        redis_client: Redis = Depends(api_deps.get_redis_client),
+        current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
+) -> StreamingResponse:
+    """
+    Server-sent events stream of the prediction task: the current state, then every update.
+    The stream ends when the task succeeds or fails (or after `TASK_EVENTS_TIMEOUT` seconds).
+    """
+    await get_visible_task_state(task_id, redis_client, current_user)
+
+    async def events() -> AsyncIterator[str]:
+        async for task_state in watch_task_state(
+                redis_client, task_id, timeout=settings.TASK_EVENTS_TIMEOUT
+        ):
+            if task_state is None:
+                # keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {task_state['state']}\ndata: {json.dumps(task_state)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @router.get("/{image_id}")
 async def get_image_by_id(
         image: Image = Depends(image_deps.get_image_by_id),
-        current_user: User = Depends(api_deps.get_current_user()),
+        current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
 ) -> IGetResponseBase[IImageRead]:
     """
     Gets an image by its id
@@ -52,7 +132,7 @@ async def get_image_by_id(
 @router.get("/{file_name}")
 async def get_image_by_filename(
         image: Image = Depends(image_deps.get_image_by_filename),
-        current_user: User = Depends(api_deps.get_current_user()),
+        current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
 ) -> IGetResponseBase[IImageRead]:
     """
     Gets an image by filename
@@ -74,34 +154,143 @@ async def upload_image(filename: str, file: UploadFile = File(...), ground_truth
             detail="Invalid image file extension.",
         )
 
-    decoded_file: str = encode_decode_img(file.file.read(), serialize=True)
+    if file.size is not None and file.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image file exceeds {settings.IMAGE_MAX_UPLOAD_SIZE} bytes.",
+        )
 
-    image = Image(filename=filename, file=decoded_file, ground_truth=ground_truth, created_by=current_user.id,
+    image = Image(filename=filename, ground_truth=ground_truth, created_by=current_user.id,
                   owner=current_user)
-    new_image = await crud.image.create(obj_in=image)
+    new_image = await crud.image.store_image(image=image, data=await file.read(),
+                                             content_type=file.content_type)
     return create_response(data=new_image)
 
 
+@router.post("/predict", status_code=status.HTTP_200_OK)
+async def predict_inline(file: UploadFile = File(...), device: Device | None = None,
+                         top_k: int = Query(settings.PREDICTION_TOP_K, ge=1),
+                         full_distribution: bool = False,
+                         current_user: IUserPrincipal = Depends(
+                             api_deps.get_current_principal())) -> IPostResponseBase:
+    """
+    Classifies the uploaded image and returns the predictions directly, without storing the image.
+    Meant for small interactive requests: the model runs in a bounded pool of the API process,
+    when it is full the request is rejected with 503 (use `PUT /image/{image_id}` for background
+    work).
+    """
+    if file.content_type not in [f"image/{ext}" for ext in ("jpg", "jpeg", "png")]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid image file extension.",
+        )
+
+    if file.size is not None and file.size > settings.INLINE_PREDICT_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image file exceeds {settings.INLINE_PREDICT_MAX_SIZE} bytes, "
+                   "upload it and predict in the background.",
+        )
+
+    try:
+        predictions = await crud.image.predict_content(
+            data=await file.read(),
+            device=device.value if device is not None else "cpu",
+            top_k=None if full_distribution else top_k,
+        )
+    except (UnidentifiedImageError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return create_response(message="Image classified", data={"predictions": predictions})
+
+
+@router.put("/batch/predict", status_code=status.HTTP_202_ACCEPTED)
+async def predict_batch(image_ids: list[UUID] = Depends(image_deps.are_valid_image_ids),
+                        device: Device | None = None,
+                        top_k: int = Query(settings.PREDICTION_TOP_K, ge=1),
+                        full_distribution: bool = False,
+                        redis_client: Redis = Depends(api_deps.get_redis_client),
+                        current_user: IUserPrincipal = Depends(
+                            api_deps.get_current_principal())) -> IPutResponseBase:
+    """
+    Classifies many images with a single task, stacked forward passes and one DB transaction.
+    Only `top_k` most probable classes are stored, unless `full_distribution` is requested.
+    """
+    if device is not None:
+        device_val = device.value
+    else:
+        device_val = "cpu"
+
+    task_id = str(uuid4())
+    # recorded before queueing, so the task is known as soon as its id is returned
+    await set_task_state(redis_client, task_id, states.PENDING, created_by=current_user.id,
+                         image_ids=[str(image_id) for image_id in image_ids])
+    make_batch_predictions.apply_async(
+        kwargs={
+            "image_ids": [str(image_id) for image_id in image_ids],
+            "device": device_val,
+            "top_k": None if full_distribution else top_k,
+        },
+        task_id=task_id,
+    )
+    return create_response(message="Batch prediction task received successfully",
+                           data={"task_id": task_id, "images": len(image_ids)})
+
+
 @router.put("/{image_id}", status_code=status.HTTP_202_ACCEPTED)
 async def predict(image_id: UUID = Depends(image_deps.is_valid_image_id), device: Device | None = None,
-                  current_user: User = Depends(
-                           api_deps.get_current_user())) -> \
+                  top_k: int = Query(settings.PREDICTION_TOP_K, ge=1),
+                  full_distribution: bool = False,
+                  redis_client: Redis = Depends(api_deps.get_redis_client),
+                  current_user: IUserPrincipal = Depends(
+                           api_deps.get_current_principal())) -> \
         IPutResponseBase:
+    """
+    Classifies the image in the background. Only `top_k` most probable classes are stored,
+    unless `full_distribution` is requested. The returned task can be followed with
+    `GET /image/tasks/{task_id}` or its events stream.
+    """
     if device is not None:
         device_val = device.value
     else:
         device_val = "cpu"
 
-    task = make_predictions.delay(image_id=image_id, device=device_val)
+    task_id = str(uuid4())
+    await set_task_state(redis_client, task_id, states.PENDING, created_by=current_user.id,
+                         image_ids=[str(image_id)])
+    make_predictions.apply_async(kwargs={"image_id": image_id, "device": device_val,
+                                         "top_k": None if full_distribution else top_k},
+                                 task_id=task_id)
     # time.sleep(0.2)
-    return create_response(message="Image prediction task received successfully", data={"task_id": task.task_id})
+    return create_response(message="Image prediction task received successfully",
+                           data={"task_id": task_id})
+
+
+@router.get("/{image_id}/content", status_code=status.HTTP_200_OK)
+async def get_image_content(
+        image: Image = Depends(image_deps.get_image_by_id),
+        current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
+) -> StreamingResponse:
+    """
+    Streams the original image bytes from the storage backend
+    """
+    content = await crud.image.stream_image_content(image=image)
+    headers = {
+        "Content-Length": str(image.file_size),
+        "ETag": f'"{image.file_hash}"',
+        "Content-Disposition": f'inline; filename="{image.filename}"',
+    }
+    return StreamingResponse(content, media_type=image.content_type or "application/octet-stream",
+                             headers=headers)
 
 
 @router.get("/{image_id}/view", status_code=status.HTTP_200_OK)
 async def view_image_with_predictions(image_id: UUID = Depends(image_deps.has_image_predictions)):
     image = await crud.image.get(id=image_id)
-    bytes_content = encode_decode_img(image.file, serialize=False)
-    img = PILImage.open(BytesIO(bytes_content))
+    content = await crud.image.get_image_content(image=image)
+    # imported on demand: pulls in torch and matplotlib, which API processes otherwise never need
+    from ml.services import view_prediction
+
+    img = PILImage.open(BufferReader(content))
     io = BytesIO()
     view_prediction(img, image.predictions, ground_truth=image.ground_truth, save=io)
     io.seek(0)
@@ -112,8 +301,8 @@ async def view_image_with_predictions(image_id: UUID = Depends(image_deps.has_im
 @router.delete("/{image_id}")
 async def remove_image(
         image_id: UUID = Depends(image_deps.is_valid_image_id),
-        current_user: User = Depends(
-            api_deps.get_current_user()
+        current_user: IUserPrincipal = Depends(
+            api_deps.get_current_principal()
         ),
 ) -> IDeleteResponseBase[IImageRead]:
     """
@@ -11,12 +11,13 @@ from backend.app.app.api import api_deps
 from backend.app.app.api.api_deps import get_redis_client
 from backend.app.app.core import security
 from backend.app.app.core.config import settings
-from backend.app.app.core.security import decode_token, get_password_hash, verify_password
+from backend.app.app.core.security import decode_token, get_password_hash_async, \
+    verify_password_async
 from backend.app.app.models.user_model import User
 from backend.app.app.schemas.common_schema import IMetaGeneral, TokenType
 from backend.app.app.schemas.response_schema import IPostResponseBase, create_response
 from backend.app.app.schemas.token_schema import RefreshToken, Token, TokenRead
-from backend.app.app.utils.token import add_token_to_redis, delete_tokens, get_valid_tokens
+from backend.app.app.utils.token import add_tokens_to_redis, is_valid_token, reset_tokens_in_redis
 
 router = APIRouter()
 
@@ -31,7 +32,7 @@ async def login(
     """
     Login for all users
     """
-    user = await crud.user.authenticate(email=email, password=password)
+    user = await crud.user.authenticate(email=email, password=password, with_relations=True)
     if not user:
         raise HTTPException(status_code=400, detail="Email or Password incorrect")
     elif not user.is_active:
@@ -50,28 +51,14 @@ async def login(
         refresh_token=refresh_token,
         user=user,
     )
-    valid_access_tokens = await get_valid_tokens(
-        redis_client, user.id, TokenType.ACCESS
-    )
-    if valid_access_tokens:
-        await add_token_to_redis(
-            redis_client,
-            user,
-            access_token,
-            TokenType.ACCESS,
-            settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-        )
-    valid_refresh_tokens = await get_valid_tokens(
-        redis_client, user.id, TokenType.REFRESH
+    await add_tokens_to_redis(
+        redis_client,
+        user.id,
+        {
+            TokenType.ACCESS: (access_token, settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            TokenType.REFRESH: (refresh_token, settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        },
     )
-    if valid_refresh_tokens:
-        await add_token_to_redis(
-            redis_client,
-            user,
-            refresh_token,
-            TokenType.REFRESH,
-            settings.REFRESH_TOKEN_EXPIRE_MINUTES,
-        )
 
     print("data", data)
     print("meta_data", meta_data)
@@ -82,23 +69,23 @@ async def login(
 async def change_password(
     current_password: str = Body(...),
     new_password: str = Body(...),
-    current_user: User = Depends(api_deps.get_current_user()),
+    current_user: User = Depends(api_deps.get_current_user(with_relations=True)),
     redis_client: Redis = Depends(get_redis_client),
 ) -> IPostResponseBase[Token]:
     """
     Change password
     """
 
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await verify_password_async(current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid Current Password")
 
-    if verify_password(new_password, current_user.hashed_password):
+    if await verify_password_async(new_password, current_user.hashed_password):
         raise HTTPException(
             status_code=400,
             detail="New Password should be different that the current one",
         )
 
-    new_hashed_password = get_password_hash(new_password)
+    new_hashed_password = await get_password_hash_async(new_password)
     await crud.user.update(
         obj_current=current_user, obj_new={"hashed_password": new_hashed_password}
     )
@@ -118,21 +105,13 @@ async def change_password(
         user=current_user,
     )
 
-    await delete_tokens(redis_client, current_user, TokenType.ACCESS)
-    await delete_tokens(redis_client, current_user, TokenType.REFRESH)
-    await add_token_to_redis(
+    await reset_tokens_in_redis(
         redis_client,
-        current_user,
-        access_token,
-        TokenType.ACCESS,
-        settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-    )
-    await add_token_to_redis(
-        redis_client,
-        current_user,
-        refresh_token,
-        TokenType.REFRESH,
-        settings.REFRESH_TOKEN_EXPIRE_MINUTES,
+        current_user.id,
+        {
+            TokenType.ACCESS: (access_token, settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            TokenType.REFRESH: (refresh_token, settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        },
     )
 
     return create_response(data=data, message="New password generated")
@@ -166,10 +145,7 @@ async def get_new_access_token(
 
     if payload["type"] == "refresh":
         user_id = payload["sub"]
-        valid_refresh_tokens = await get_valid_tokens(
-            redis_client, user_id, TokenType.REFRESH
-        )
-        if valid_refresh_tokens and body.refresh_token not in valid_refresh_tokens:
+        if not await is_valid_token(redis_client, user_id, body.refresh_token, TokenType.REFRESH):
             raise HTTPException(status_code=403, detail="Refresh token invalid")
 
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -178,17 +154,10 @@ async def get_new_access_token(
             access_token = security.create_access_token(
                 payload["sub"], expires_delta=access_token_expires
             )
-            valid_access_get_valid_tokens = await get_valid_tokens(
-                redis_client, user.id, TokenType.ACCESS
+            await add_tokens_to_redis(
+                redis_client, user.id,
+                {TokenType.ACCESS: (access_token, settings.ACCESS_TOKEN_EXPIRE_MINUTES)}
             )
-            if valid_access_get_valid_tokens:
-                await add_token_to_redis(
-                    redis_client,
-                    user,
-                    access_token,
-                    TokenType.ACCESS,
-                    settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-                )
             return create_response(
                 data=TokenRead(access_token=access_token, token_type="bearer"),
                 message="Access token generated correctly",
@@ -218,15 +187,8 @@ async def login_access_token(
     access_token = security.create_access_token(
         user.id, expires_delta=access_token_expires
     )
-    valid_access_tokens = await get_valid_tokens(
-        redis_client, user.id, TokenType.ACCESS
+    await add_tokens_to_redis(
+        redis_client, user.id,
+        {TokenType.ACCESS: (access_token, settings.ACCESS_TOKEN_EXPIRE_MINUTES)}
     )
-    if valid_access_tokens:
-        await add_token_to_redis(
-            redis_client,
-            user,
-            access_token,
-            TokenType.ACCESS,
-            settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-        )
     return TokenRead(access_token=access_token, token_type="bearer")
\ No newline at end of file
@@ -0,0 +1,29 @@
+from backend.app.app.api import api_deps
+from backend.app.app.db.pool_metrics import get_db_pool_stats
+from backend.app.app.db.session import engine, engine_celery
+from backend.app.app.schemas.response_schema import IGetResponseBase, create_response
+from backend.app.app.schemas.role_schema import IRoleEnum
+from backend.app.app.schemas.user_schema import IUserPrincipal
+from fastapi import APIRouter, Depends
+
+router = APIRouter()
+
+
+@router.get("/db/pool")
+async def get_db_pool_statistics(
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
+    ),
+) -> IGetResponseBase[dict[str, dict[str, int | float | bool]]]:
+    """
+    Gets connections, saturation and checkout latency of the Postgres pools of this API process
+
+    Required roles:
+    - admin
+    """
+    return create_response(
+        data={
+            "app": get_db_pool_stats(engine),
+            "celery": get_db_pool_stats(engine_celery),
+        }
+    )
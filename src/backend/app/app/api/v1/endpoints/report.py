@@ -5,6 +5,7 @@ from backend.app.app.models import User
 from fastapi import APIRouter, Depends, Query
 from backend.app.app.schemas.role_schema import IRoleEnum
 from backend.app.app.schemas.user_schema import (
+    IUserPrincipal,
     IUserRead,
 )
 import pandas as pd
@@ -28,8 +29,8 @@ async def export_users_list(
             description="This is the exported file format",
         ),
     ] = FileExtensionEnum.csv,
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
     ),
 ) -> StreamingResponse:
     """
@@ -38,7 +39,9 @@ async def export_users_list(
     Required roles:
     - admin
     """
-    users = await crud.user.get_multi_ordered(limit=1000, order_by="id")
+    users = await crud.user.get_multi(
+        query=crud.user.get_select(with_relations=True).limit(1000).order_by(User.id)
+    )
     users_list = [
         IUserRead.model_validate(user) for user in users
     ]  # Creates a pydantic list of object
@@ -8,7 +8,7 @@ from backend.app.app import crud
 from backend.app.app.api import api_deps
 from backend.app.app.dependencies import role_deps
 from backend.app.app.models.role_model import Role
-from backend.app.app.models.user_model import User
+from backend.app.app.schemas.user_schema import IUserPrincipal
 from backend.app.app.schemas.response_schema import (
     IGetResponseBase,
     IGetResponsePaginated,
@@ -24,7 +24,7 @@ router = APIRouter()
 @router.get("")
 async def get_roles(
     params: Params = Depends(),
-    current_user: User = Depends(api_deps.get_current_user()),
+    current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
 ) -> IGetResponsePaginated[IRoleRead]:
     """
     Gets a paginated list of roles
@@ -36,7 +36,7 @@ async def get_roles(
 @router.get("/{role_id}")
 async def get_role_by_id(
     role: Role = Depends(role_deps.get_user_role_by_id),
-    current_user: User = Depends(api_deps.get_current_user()),
+    current_user: IUserPrincipal = Depends(api_deps.get_current_principal()),
 ) -> IGetResponseBase[IRoleRead]:
     """
     Gets a role by its id
@@ -47,8 +47,8 @@ async def get_role_by_id(
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_role(
     role: IRoleCreate,
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
     ),
 ) -> IPostResponseBase[IRoleRead]:
     """
@@ -69,8 +69,8 @@ async def create_role(
 async def update_role(
     role: IRoleUpdate,
     current_role: Role = Depends(role_deps.get_user_role_by_id),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
     ),
 ) -> IPutResponseBase[IRoleRead]:
     """
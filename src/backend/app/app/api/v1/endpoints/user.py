@@ -18,20 +18,23 @@ from fastapi import (
 from backend.app.app.schemas.response_schema import (
     IDeleteResponseBase,
     IGetResponseBase,
+    IGetResponseCursorPaginated,
     IGetResponsePaginated,
     IPostResponseBase,
     create_response,
 )
+from backend.app.app.schemas.common_schema import ICountEnum, IPaginationEnum
 from backend.app.app.schemas.role_schema import IRoleEnum
 from backend.app.app.schemas.user_schema import (
     IUserCreate,
+    IUserPrincipal,
     IUserRead,
     IUserReadWithoutGroups,
     IUserStatus,
 )
 
 from fastapi_pagination import Params
-from sqlmodel import and_, select, col, or_, text
+from sqlmodel import and_, col, or_, text
 
 router = APIRouter()
 
@@ -39,18 +42,45 @@ router = APIRouter()
 @router.get("/list")
 async def read_users_list(
     params: Params = Depends(),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    pagination: IPaginationEnum = IPaginationEnum.offset,
+    cursor: str | None = Query(
+        default=None, description="next_cursor of the previous page (cursor pagination)"
     ),
-) -> IGetResponsePaginated[IUserReadWithoutGroups]:
+    with_total: bool = Query(
+        default=False, description="Count the users (cursor pagination)"
+    ),
+    count: ICountEnum = Query(
+        default=ICountEnum.exact,
+        description="Exact total (cached for a few seconds) or table size estimate",
+    ),
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    ),
+) -> (
+    IGetResponsePaginated[IUserReadWithoutGroups]
+    | IGetResponseCursorPaginated[IUserReadWithoutGroups]
+):
     """
-    Retrieve users. Requires admin or manager role
+    Retrieve users. Requires admin or manager role. Pages are requested by number (offset)
+    or, for deep pages, after the cursor of the previous page (cursor pagination, implied
+    by `cursor`)
 
     Required roles:
     - admin
     - manager
     """
-    users = await crud.user.get_multi_paginated(params=params)
+    query = crud.user.get_select(with_relations=True, with_groups=False)
+    if pagination == IPaginationEnum.cursor or cursor is not None:
+        users = await crud.user.get_multi_cursor_paginated(
+            size=params.size, cursor=cursor, query=query, with_total=with_total, count=count
+        )
+        users.items = [
+            IUserReadWithoutGroups.model_validate(user, from_attributes=True)
+            for user in users.items
+        ]
+        return create_response(data=users)
+
+    users = await crud.user.get_multi_paginated(params=params, query=query, count=count)
     return create_response(data=users)
 
 
@@ -66,8 +96,8 @@ async def read_users_list_by_role_name(
     ] = IUserStatus.active,
     role_name: str = "",
     params: Params = Depends(),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
     ),
 ) -> IGetResponsePaginated[IUserReadWithoutGroups]:
     """
@@ -78,7 +108,7 @@ async def read_users_list_by_role_name(
     """
     user_status = True if user_status == IUserStatus.active else False
     query = (
-        select(User)
+        crud.user.get_select(with_relations=True, with_groups=False)
         .join(Role, User.role_id == Role.id)
         .where(
             and_(
@@ -105,8 +135,8 @@ async def read_users_list_by_role_name(
 @router.get("/order_by_created_at")
 async def get_user_list_order_by_created_at(
     params: Params = Depends(),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
     ),
 ) -> IGetResponsePaginated[IUserReadWithoutGroups]:
     """
@@ -116,9 +146,10 @@ async def get_user_list_order_by_created_at(
     - admin
     - manager
     """
-    users = await crud.user.get_multi_paginated_ordered(
-        params=params, order_by="created_at"
+    query = crud.user.get_select(with_relations=True, with_groups=False).order_by(
+        User.created_at.asc()
     )
+    users = await crud.user.get_multi_paginated(params=params, query=query)
     return create_response(data=users)
 
 
@@ -126,8 +157,8 @@ async def get_user_list_order_by_created_at(
 @router.get("/{user_id}")
 async def get_user_by_id(
     user: User = Depends(user_deps.is_valid_user),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
     ),
 ) -> IGetResponseBase[IUserRead]:
     """
@@ -142,7 +173,7 @@ async def get_user_by_id(
 
 @router.get("")
 async def get_my_data(
-    current_user: User = Depends(api_deps.get_current_user()),
+    current_user: User = Depends(api_deps.get_current_user(with_relations=True)),
 ) -> IGetResponseBase[IUserRead]:
     """
     Gets my user profile information
@@ -153,8 +184,8 @@ async def get_my_data(
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_user(
     new_user: IUserCreate = Depends(user_deps.user_exists),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
     ),
 ) -> IPostResponseBase[IUserRead]:
     """
@@ -170,8 +201,8 @@ async def create_user(
 @router.delete("/{user_id}")
 async def remove_user(
     user_id: UUID = Depends(user_deps.is_valid_user_id),
-    current_user: User = Depends(
-        api_deps.get_current_user(required_roles=[IRoleEnum.admin])
+    current_user: IUserPrincipal = Depends(
+        api_deps.get_current_principal(required_roles=[IRoleEnum.admin])
     ),
 ) -> IDeleteResponseBase[IUserRead]:
     """
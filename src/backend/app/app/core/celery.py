@@ -9,7 +9,13 @@ celery = Celery(
     include="backend.app.app.api.celery_task",
 )
 
-celery.conf.update({"beat_dburi": str(settings.SYNC_CELERY_BEAT_DATABASE_URI)})
+celery.conf.update(
+    {
+        "beat_dburi": str(settings.SYNC_CELERY_BEAT_DATABASE_URI),
+        # replace a worker process once its resident memory exceeds the limit (KiB)
+        "worker_max_memory_per_child": settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD,
+    }
+)
 celery.autodiscover_tasks()
 
 # if __name__ == "__main__":
@@ -20,6 +20,11 @@ class Settings(BaseSettings):
     PROJECT_NAME: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 1  # 1 hour
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 100  # 100 days
+    # bcrypt work factor of new password hashes (2^rounds iterations), existing hashes keep theirs
+    BCRYPT_ROUNDS: int = 12
+    # threads hashing and verifying passwords per API process,
+    # further logins wait for a free thread
+    PASSWORD_HASH_WORKERS: int = 2
     OPENAI_API_KEY: str
     DATABASE_USER: str
     DATABASE_PASSWORD: str
@@ -29,10 +34,68 @@ class Settings(BaseSettings):
     DATABASE_CELERY_NAME: str = "celery_schedule_jobs"
     REDIS_HOST: str
     REDIS_PORT: str
+    # connections of the shared Redis pool per API process, seconds to wait for a free one
+    REDIS_POOL_SIZE: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    # connections to Postgres shared by all API processes,
+    # the pool of each process gets an equal part
     DB_POOL_SIZE: int = 83
     WEB_CONCURRENCY: int = 9
-    POOL_SIZE: int = max(DB_POOL_SIZE // WEB_CONCURRENCY, 5)
+    # connections of the pool of one process,
+    # derived from DB_POOL_SIZE / WEB_CONCURRENCY when not set
+    POOL_SIZE: int = 0
+    # extra connections opened above POOL_SIZE under load, closed when returned
+    DB_MAX_OVERFLOW: int = 10
+    # seconds to wait for a connection when the pool is exhausted
+    DB_POOL_TIMEOUT: float = 30.0
+    # seconds after which a connection is replaced, -1 to keep connections open
+    DB_POOL_RECYCLE: int = 60 * 30  # 30 minutes
+    DB_POOL_PRE_PING: bool = True
+    # prepared statements cached per asyncpg connection, 0 behind pgbouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # latest checkouts kept for the latency percentiles of the pool metrics
+    DB_POOL_METRICS_WINDOW: int = 1000
+
+    @field_validator("POOL_SIZE", mode="after")
+    def assemble_pool_size(cls, v: int, info: FieldValidationInfo) -> int:
+        if v <= 0:
+            return max(info.data["DB_POOL_SIZE"] // info.data["WEB_CONCURRENCY"], 5)
+        return v
+
     ASYNC_DATABASE_URI: PostgresDsn | str = ""
+    IMAGE_BATCH_PREDICT_MAX_SIZE: int = 1000
+    IMAGE_MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10 MiB
+    CELERY_WORKER_MAX_MEMORY_PER_CHILD: int = 2 * 1024 * 1024  # KiB
+    # load and warm up the model in API processes at startup (readiness waits for it)
+    PRELOAD_MODEL: bool = False
+    # POST /image/predict: threads running inline predictions per API process, predictions
+    # allowed to wait for a thread (more are rejected with 503), result timeout in seconds
+    INLINE_PREDICT_WORKERS: int = 2
+    INLINE_PREDICT_QUEUE_SIZE: int = 8
+    INLINE_PREDICT_TIMEOUT: float = 10.0
+    INLINE_PREDICT_MAX_SIZE: int = 2 * 1024 * 1024  # 2 MiB
+    # prediction task states in Redis, the longest a client waits on the task events stream
+    TASK_STATE_TTL: int = 60 * 60 * 24  # 1 day
+    TASK_EVENTS_TIMEOUT: int = 60 * 5  # 5 minutes
+    # cached user principals (id, is_active, role) used to authorize requests: Redis TTL,
+    # in-process TTL (bounds how long other processes see a stale principal) and size
+    PRINCIPAL_CACHE_TTL: int = 60 * 5  # 5 minutes
+    PRINCIPAL_LOCAL_CACHE_TTL: float = 5.0
+    PRINCIPAL_LOCAL_CACHE_SIZE: int = 10_000
+    # verified JWTs kept in-process (signature and expiry are not checked again),
+    # at most until they expire
+    TOKEN_LOCAL_CACHE_TTL: float = 60.0
+    TOKEN_LOCAL_CACHE_SIZE: int = 10_000
+    # tokens kept per user and type in an allow-list, the ones expiring first are dropped
+    TOKEN_ALLOW_LIST_MAX_SIZE: int = 100
+    # seconds exact totals of paginated lists are cached in Redis, 0 to count on every request
+    COUNT_CACHE_TTL: int = 10
+    # number of most probable classes stored with an image, the full distribution on request
+    PREDICTION_TOP_K: int = 5
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_TTL: int = 60 * 60 * 24 * 7  # 7 days
+    # derived from the saved model file when not set
+    PREDICTION_CACHE_MODEL_VERSION: str | None = None
 
     @field_validator("ASYNC_DATABASE_URI", mode="after")
     def assemble_db_connection(cls, v: str | None, info: FieldValidationInfo) -> Any:
@@ -109,6 +172,11 @@ class Settings(BaseSettings):
     MINIO_ROOT_PASSWORD: str
     MINIO_URL: str
     MINIO_BUCKET: str
+    MINIO_SECURE: bool = False
+
+    # one of: "db" (bytea column), "filesystem" (content-addressed files), "s3" (MinIO/S3 bucket)
+    IMAGE_STORAGE_BACKEND: str = "db"
+    IMAGE_STORAGE_DIR: str = "/data/images"
 
     WEATHER_URL: AnyHttpUrl
 
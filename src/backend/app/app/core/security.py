@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
@@ -11,6 +13,10 @@ fernet = Fernet(str.encode(settings.ENCRYPT_KEY))
 
 JWT_ALGORITHM = "HS256"
 
+# bcrypt releases the GIL while hashing,
+# so threads hash in parallel without blocking the event loop
+_password_executor: ThreadPoolExecutor | None = None
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta = None) -> str:
     if expires_delta:
@@ -65,7 +71,42 @@ def get_password_hash(plain_password: str | bytes) -> str:
     if isinstance(plain_password, str):
         plain_password = plain_password.encode()
 
-    return bcrypt.hashpw(plain_password, bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(plain_password, bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode()
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    # created on first use, at most PASSWORD_HASH_WORKERS hashes run at once,
+    # the others wait in its queue
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return _password_executor
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
+async def verify_password_async(plain_password: str | bytes, hashed_password: str | bytes) -> bool:
+    """
+    verify_password in the password executor, for async code.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), verify_password, plain_password,
+                                      hashed_password)
+
+
+async def get_password_hash_async(plain_password: str | bytes) -> str:
+    """
+    get_password_hash in the password executor, for async code.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), get_password_hash, plain_password)
 
 
 def get_data_encrypt(data) -> str:
@@ -1,15 +1,18 @@
 from fastapi import HTTPException
 from typing import Any, Generic, TypeVar
 from uuid import UUID
-from backend.app.app.schemas.common_schema import IOrderEnum
-from fastapi_pagination.ext.sqlmodel import paginate
+from backend.app.app.schemas.common_schema import ICountEnum, IOrderEnum
+from backend.app.app.schemas.response_schema import ICursorPage
+from backend.app.app.utils import count_service
+from backend.app.app.utils.cursor import decode_cursor, encode_cursor
+from fastapi_pagination.ext.sqlalchemy import create_paginate_query
 from fastapi_async_sqlalchemy import db
-from fastapi_pagination import Params, Page
+from fastapi_pagination import Params, Page, create_page
 from pydantic import BaseModel
-from sqlmodel import SQLModel, select, func
+from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import Select
-from sqlalchemy import exc
+from sqlalchemy import exc, tuple_
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -32,11 +35,18 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_db(self) -> type(db):
         return self.db
 
+    def get_select(self) -> Select[ModelType]:
+        """
+        Base select statement of the model. Collections are loaded only on request,
+        subclasses add the loader options their read schemas need.
+        """
+        return select(self.model)
+
     async def get(
         self, *, id: UUID | str, db_session: AsyncSession | None = None
     ) -> ModelType | None:
         db_session = db_session or self.db.session
-        query = select(self.model).where(self.model.id == id)
+        query = self.get_select().where(self.model.id == id)
         response = await db_session.execute(query)
         return response.scalar_one_or_none()
 
@@ -48,18 +58,25 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> list[ModelType] | None:
         db_session = db_session or self.db.session
         response = await db_session.execute(
-            select(self.model).where(self.model.id.in_(list_ids))
+            self.get_select().where(self.model.id.in_(list_ids))
         )
         return response.scalars().all()
 
     async def get_count(
-        self, db_session: AsyncSession | None = None
-    ) -> ModelType | None:
+        self,
+        *,
+        query: T | Select[T] | None = None,
+        mode: ICountEnum = ICountEnum.exact,
+        db_session: AsyncSession | None = None,
+    ) -> int:
+        """
+        Number of rows of the query (all rows of the model by default), exact (cached
+        for a few seconds) or estimated for unfiltered queries, see `count_service`.
+        """
         db_session = db_session or self.db.session
-        response = await db_session.execute(
-            select(func.count()).select_from(select(self.model).subquery())
-        )
-        return response.scalar_one()
+        if query is None:
+            query = self.get_select()
+        return await count_service.get_count(db_session, query, mode)
 
     async def get_multi(
         self,
@@ -71,23 +88,39 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> list[ModelType]:
         db_session = db_session or self.db.session
         if query is None:
-            query = select(self.model).offset(skip).limit(limit).order_by(self.model.id)
+            query = self.get_select().offset(skip).limit(limit).order_by(self.model.id)
         response = await db_session.execute(query)
         return response.scalars().all()
 
+    async def paginate(
+        self,
+        *,
+        query: T | Select[T],
+        params: Params | None = Params(),
+        count: ICountEnum = ICountEnum.exact,
+        db_session: AsyncSession | None = None,
+    ) -> Page[ModelType]:
+        """
+        Page of the query by page number, the total is counted by `count_service`.
+        """
+        db_session = db_session or self.db.session
+        total = await self.get_count(query=query, mode=count, db_session=db_session)
+        response = await db_session.execute(create_paginate_query(query, params))
+        items = response.unique().scalars().all()
+        return create_page(items, total=total, params=params)
+
     async def get_multi_paginated(
         self,
         *,
         params: Params | None = Params(),
         query: T | Select[T] | None = None,
+        count: ICountEnum = ICountEnum.exact,
         db_session: AsyncSession | None = None,
     ) -> Page[ModelType]:
-        db_session = db_session or self.db.session
         if query is None:
-            query = select(self.model)
+            query = self.get_select()
 
-        output = await paginate(db_session, query, params)
-        return output
+        return await self.paginate(query=query, params=params, count=count, db_session=db_session)
 
     async def get_multi_paginated_ordered(
         self,
@@ -96,22 +129,89 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         order_by: str | None = None,
         order: IOrderEnum | None = IOrderEnum.ascendant,
         query: T | Select[T] | None = None,
+        count: ICountEnum = ICountEnum.exact,
         db_session: AsyncSession | None = None,
     ) -> Page[ModelType]:
+        columns = self.model.__table__.columns
+
+        if order_by is None or order_by not in columns:
+            order_by = "id"
+
+        if query is None:
+            if order == IOrderEnum.ascendant:
+                query = self.get_select().order_by(columns[order_by].asc())
+            else:
+                query = self.get_select().order_by(columns[order_by].desc())
+
+        return await self.paginate(query=query, params=params, count=count, db_session=db_session)
+
+    async def get_multi_cursor_paginated(
+        self,
+        *,
+        size: int = 50,
+        cursor: str | None = None,
+        order_by: str | None = None,
+        order: IOrderEnum | None = IOrderEnum.ascendant,
+        query: T | Select[T] | None = None,
+        with_total: bool = False,
+        count: ICountEnum = ICountEnum.exact,
+        db_session: AsyncSession | None = None,
+    ) -> ICursorPage[ModelType]:
+        """
+        Keyset pagination on (order_by, id): a page starts after the sort key of the
+        cursor instead of skipping rows, so deep pages cost as much as the first one.
+        The ordering of `query` is replaced. Counting the items is optional
+        (`with_total`, `count`).
+        """
         db_session = db_session or self.db.session
 
         columns = self.model.__table__.columns
 
-        if order_by is None or order_by not in columns:
+        # NULL values can not be compared with the sort key, such rows would be skipped
+        if order_by is None or order_by not in columns or columns[order_by].nullable:
             order_by = "id"
+        order_column = columns[order_by]
+        id_column = columns["id"]
 
         if query is None:
+            query = self.get_select()
+        query = query.order_by(None)
+
+        total = None
+        if with_total:
+            total = await self.get_count(query=query, mode=count, db_session=db_session)
+
+        if cursor is not None:
+            try:
+                value_type = order_column.type.python_type
+            except NotImplementedError:
+                value_type = Any
+            value, last_id = decode_cursor(cursor, order_by, order, value_type)
+            if order_by == "id":
+                sort_key, last_key = id_column, last_id
+            else:
+                sort_key, last_key = tuple_(order_column, id_column), tuple_(value, last_id)
             if order == IOrderEnum.ascendant:
-                query = select(self.model).order_by(columns[order_by].asc())
+                query = query.where(sort_key > last_key)
             else:
-                query = select(self.model).order_by(columns[order_by].desc())
+                query = query.where(sort_key < last_key)
+
+        ordering = [order_column] if order_by == "id" else [order_column, id_column]
+        if order == IOrderEnum.ascendant:
+            query = query.order_by(*[column.asc() for column in ordering])
+        else:
+            query = query.order_by(*[column.desc() for column in ordering])
+
+        # one more row tells whether there is a next page
+        response = await db_session.execute(query.limit(size + 1))
+        items = response.scalars().all()
+        next_cursor = None
+        if len(items) > size:
+            items = items[:size]
+            last = items[-1]
+            next_cursor = encode_cursor(order_by, order, getattr(last, order_by), last.id)
 
-        return await paginate(db_session, query, params)
+        return ICursorPage(items=items, size=size, next_cursor=next_cursor, total=total)
 
     async def get_multi_ordered(
         self,
@@ -131,14 +231,14 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         if order == IOrderEnum.ascendant:
             query = (
-                select(self.model)
+                self.get_select()
                 .offset(skip)
                 .limit(limit)
                 .order_by(columns[order_by].asc())
             )
         else:
             query = (
-                select(self.model)
+                self.get_select()
                 .offset(skip)
                 .limit(limit)
                 .order_by(columns[order_by].desc())
@@ -200,7 +300,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> ModelType:
         db_session = db_session or self.db.session
         response = await db_session.execute(
-            select(self.model).where(self.model.id == id)
+            self.get_select().where(self.model.id == id)
         )
         obj = response.scalar_one()
         await db_session.delete(obj)
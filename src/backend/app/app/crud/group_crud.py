@@ -2,12 +2,37 @@ from backend.app.app.models.group_model import Group
 from backend.app.app.models.user_model import User
 from backend.app.app.schemas.group_schema import IGroupCreate, IGroupUpdate
 from backend.app.app.crud.base_crud import CRUDBase
+from backend.app.app.crud.user_crud import CRUDUser
+from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from uuid import UUID
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
 
 
 class CRUDGroup(CRUDBase[Group, IGroupCreate, IGroupUpdate]):
+    @staticmethod
+    def get_select(*, with_users: bool = False) -> Select[Group]:
+        """
+        Group select statement, members (with the collections of the user read schema)
+        only on request.
+        """
+        query = select(Group)
+        if with_users:
+            query = query.options(
+                selectinload(Group.users).options(*CRUDUser.get_relation_options(with_groups=False))
+            )
+        return query
+
+    async def get(
+        self, *, id: UUID | str, with_users: bool = False, db_session: AsyncSession | None = None
+    ) -> Group | None:
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(
+            self.get_select(with_users=with_users).where(Group.id == id)
+        )
+        return response.scalar_one_or_none()
+
     async def get_group_by_name(
         self, *, name: str, db_session: AsyncSession | None = None
     ) -> Group:
@@ -17,7 +42,7 @@ class CRUDGroup(CRUDBase[Group, IGroupCreate, IGroupUpdate]):
 
     async def add_user_to_group(self, *, user: User, group_id: UUID) -> Group:
         db_session = super().get_db().session
-        group = await super().get(id=group_id)
+        group = await self.get(id=group_id, with_users=True)
         group.users.append(user)
         db_session.add(group)
         await db_session.commit()
@@ -32,7 +57,7 @@ class CRUDGroup(CRUDBase[Group, IGroupCreate, IGroupUpdate]):
         db_session: AsyncSession | None = None,
     ) -> Group:
         db_session = db_session or super().get_db().session
-        group = await super().get(id=group_id, db_session=db_session)
+        group = await self.get(id=group_id, with_users=True, db_session=db_session)
         group.users.extend(users)
         db_session.add(group)
         await db_session.commit()
@@ -1,51 +1,223 @@
+import hashlib
+import threading
 from uuid import UUID
 
-from sqlmodel import select, col
+from collections.abc import AsyncIterator, Callable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from fastapi_pagination import Page, Params
+from sqlalchemy.orm import defer
+from sqlmodel import select, col, func
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
 
+from backend.app.app.core.config import settings
 from backend.app.app.crud.base_crud import CRUDBase
 from backend.app.app.db.session import SessionLocal
 from backend.app.app.models.image_model import Image
+from backend.app.app.schemas.common_schema import ICountEnum, StorageBackend
 from backend.app.app.schemas.image_schema import IImagePredict, IImageCreate
-from backend.app.app.utils.image_processing import encode_decode_img
-# from ml.predictors import ImagePredictor
-# from settings import DEFAULT_MODEL_LOC
+from backend.app.app.utils.image_storage import get_image_storage
+from backend.app.app.utils.inline_inference import inline_inference
 from backend.app.app.utils.fastapi_globals import g
-from ml.predictors import ImagePredictor
-from settings import DEFAULT_MODEL_LOC
+from backend.app.app.db.redis_pool import get_redis_connection
+from backend.app.app.utils.prediction_cache import get_cached_predictions, set_cached_predictions
+from settings import INFERENCE_BACKEND, INFERENCE_MICRO_BATCHING, INFERENCE_MODEL_LOC, \
+    INFERENCE_WARMUP_BATCH_SIZES
+
+if TYPE_CHECKING:
+    from ml.batching import MicroBatchingPredictor
+    from ml.predictors import ImagePredictor
 
 
 class CRUDImage(CRUDBase[Image, IImageCreate, IImagePredict]):
 
-    def __init__(self, model, classifier):
+    def __init__(self, model, classifier_factory: Callable[[], Any]):
         super().__init__(model)
-        self.classifier = classifier
+        self._classifier_factory = classifier_factory
+        self._classifier = None
+        self._classifier_lock = threading.Lock()
+        self._classifier_warmed_up = False
+
+    @property
+    def classifier(self):
+        """
+        Image classifier created on first use, so processes that never predict
+        (e.g. the API workers) never load the model. Concurrent first calls
+        (e.g. inline inference threads) create a single classifier.
+        """
+        if self._classifier is None:
+            with self._classifier_lock:
+                if self._classifier is None:
+                    self._classifier = self._classifier_factory()
+        return self._classifier
+
+    @property
+    def is_classifier_loaded(self) -> bool:
+        return self._classifier is not None
+
+    @property
+    def is_classifier_warmed_up(self) -> bool:
+        return self._classifier_warmed_up
+
+    def warm_up_classifier(
+            self, batch_sizes: list[int] = INFERENCE_WARMUP_BATCH_SIZES, device: str = "cpu"
+    ) -> dict[int, float]:
+        """
+        Creates the classifier and runs synthetic batches of each size through it.
+        Returns the warm-up time per batch size in ms.
+        """
+        # the micro-batching engine wraps the predictor, warm-up goes straight to the model
+        predictor = getattr(self.classifier, "predictor", self.classifier)
+        timings = predictor.warm_up(batch_sizes, device=device)
+        self._classifier_warmed_up = True
+        return timings
+
+    @staticmethod
+    def get_select(*, with_file: bool = False) -> Select[Image]:
+        """
+        Image select statement. The binary payload is deferred unless requested,
+        so metadata queries never pull image bytes from the database.
+        """
+        query = select(Image)
+        if not with_file:
+            query = query.options(defer(Image.file, raiseload=True))
+        return query
+
+    async def get(
+            self, *, id: UUID | str, with_file: bool = False,
+            db_session: AsyncSession | None = None
+    ) -> Image | None:
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(
+            self.get_select(with_file=with_file).where(Image.id == id)
+        )
+        return response.scalar_one_or_none()
+
+    async def get_by_ids(
+            self, *, list_ids: list[UUID | str], with_file: bool = False,
+            db_session: AsyncSession | None = None
+    ) -> list[Image] | None:
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(
+            self.get_select(with_file=with_file).where(col(Image.id).in_(list_ids))
+        )
+        return response.scalars().all()
+
+    async def get_multi_paginated(
+            self,
+            *,
+            params: Params | None = Params(),
+            query: Image | Select[Image] | None = None,
+            count: ICountEnum = ICountEnum.exact,
+            db_session: AsyncSession | None = None,
+    ) -> Page[Image]:
+        if query is None:
+            query = self.get_select()
+        return await super().get_multi_paginated(params=params, query=query, count=count,
+                                                 db_session=db_session)
 
     async def get_image_by_filename(self, *, filename: str, db_session: AsyncSession | None = None) -> Image:
         db_session = db_session or super().get_db().session
-        image = await db_session.execute(select(Image).where(col(Image.filename).ilike(f"{filename}")))
+        image = await db_session.execute(
+            self.get_select().where(col(Image.filename).ilike(f"{filename}"))
+        )
         return image.scalar_one_or_none()
 
     async def filter_images_by_predictions(self, *, predictions: bool, db_session: AsyncSession | None = None) -> list[
         Image]:
         db_session = db_session or super().get_db().session
         if predictions:
-            images = await db_session.execute(select(Image).where(Image.predictions is not None))
+            images = await db_session.execute(
+                self.get_select().where(Image.predictions is not None)
+            )
         else:
-            images = await db_session.execute(select(Image).where(Image.predictions is None))
+            images = await db_session.execute(
+                self.get_select().where(Image.predictions is None)
+            )
         return images.scalars().all()
 
-    async def predict_image(self, *, image_id: UUID, device: str):
+    @staticmethod
+    async def lock_payload(file_key: str, db_session: AsyncSession) -> None:
+        """
+        Serializes the writes and deletes of a content-addressed payload shared by several rows,
+        the lock is held until the end of the transaction.
+        """
+        await db_session.execute(select(func.pg_advisory_xact_lock(func.hashtext(file_key))))
+
+    async def store_image(self, *, image: Image, data: bytes, content_type: str | None = None,
+                          db_session: AsyncSession | None = None) -> Image:
+        """
+        Saves the payload with the configured storage backend and creates the image row.
+        """
+        db_session = db_session or super().get_db().session
+        storage = get_image_storage()
+        if storage.backend != StorageBackend.db:
+            # a concurrent remove of the same payload must not unlink it before the row is
+            # committed
+            await self.lock_payload(hashlib.sha256(data).hexdigest(), db_session)
+        await storage.save(image, data, content_type=content_type)
+        return await self.create(obj_in=image, db_session=db_session)
+
+    async def get_image_content(
+            self, *, image: Image, db_session: AsyncSession | None = None
+    ) -> bytes | memoryview:
+        db_session = db_session or super().get_db().session
+        return await get_image_storage(image.storage_backend).load(image, db_session)
+
+    async def stream_image_content(
+            self, *, image: Image, db_session: AsyncSession | None = None
+    ) -> AsyncIterator[bytes]:
+        db_session = db_session or super().get_db().session
+        return await get_image_storage(image.storage_backend).open_stream(image, db_session)
 
-        async with SessionLocal() as db_session:
-            image = await db_session.execute(select(Image).where(Image.id == image_id))
-            image = image.scalar_one_or_none()
-            if image is not None:
-                # decode img file to bytes
-                deserialized_file = encode_decode_img(image.file, serialize=False)
-            else:
+    async def remove(self, *, id: UUID | str, db_session: AsyncSession | None = None) -> Image:
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(self.get_select().where(Image.id == id))
+        image = response.scalar_one()
+        storage = get_image_storage(image.storage_backend)
+        if storage.backend == StorageBackend.db:
+            # payload is removed together with the row
+            await db_session.delete(image)
+            await db_session.commit()
+            return image
+
+        # payloads are content-addressed, so they can be shared by several rows: the last
+        # reference is checked and the payload deleted under the lock, before the commit,
+        # so an upload of the same bytes waits and writes the payload again
+        await self.lock_payload(image.file_key, db_session)
+        await db_session.delete(image)
+        await db_session.flush()
+        response = await db_session.execute(
+            select(Image.id).where(Image.file_key == image.file_key,
+                                   Image.storage_backend == image.storage_backend).limit(1)
+        )
+        if response.scalar_one_or_none() is None:
+            await storage.delete(image)
+        await db_session.commit()
+        return image
+
+    async def predict_image(
+            self, *, image_id: UUID, device: str, top_k: int | None = settings.PREDICTION_TOP_K
+    ):
+        """
+        Classifies the image, only `top_k` most probable classes are stored (all classes
+        when None).
+        """
+        async with SessionLocal() as db_session, get_redis_connection() as redis_client:
+            image = await self.get(id=image_id, db_session=db_session)
+            if image is None:
                 raise AttributeError("Image not found")
-            predictions, _ = self.classifier.predict(file=deserialized_file, device=device)
+
+            cached = await get_cached_predictions(redis_client, [image.file_hash], top_k=top_k)
+            predictions = cached.get(image.file_hash)
+            if predictions is None:
+                content = await self.get_image_content(image=image, db_session=db_session)
+                predictions, _ = self.classifier.predict(file=content, device=device, top_k=top_k)
+                await set_cached_predictions(
+                    redis_client, {image.file_hash: predictions}, top_k=top_k
+                )
 
             # update image predictions field
             setattr(image, "predictions", predictions)
@@ -55,6 +227,153 @@ class CRUDImage(CRUDBase[Image, IImageCreate, IImagePredict]):
             await db_session.refresh(image)
             return image
 
+    async def predict_content(
+            self, *, data: bytes, device: str, top_k: int | None = settings.PREDICTION_TOP_K
+    ) -> dict[str, float]:
+        """
+        Classifies an image payload without storing it. The model runs in the bounded inline
+        inference pool, cached predictions of the same payload are returned without running it.
+        """
+        file_hash = hashlib.sha256(data).hexdigest()
+        async with get_redis_connection() as redis_client:
+            cached = await get_cached_predictions(redis_client, [file_hash], top_k=top_k)
+            predictions = cached.get(file_hash)
+            if predictions is None:
+                predictions, _ = await inline_inference.run(
+                    self._predict_payload, file=data, device=device, top_k=top_k
+                )
+                await set_cached_predictions(redis_client, {file_hash: predictions}, top_k=top_k)
+        return predictions
+
+    def _predict_payload(self, **kwargs) -> tuple[dict[str, float], Any]:
+        # resolved in the pool thread, the first call loads the model off the event loop
+        return self.classifier.predict(**kwargs)
+
+    def _predict_contents(
+            self, contents: list[bytes | memoryview], device: str, top_k: int | None
+    ) -> list[dict[str, float] | Exception]:
+        """
+        Classifies the payloads in stacked batches. When a batch fails (e.g. an undecodable
+        or too large image), its images are classified one by one and the error of each
+        failed image is returned in its place.
+        """
+        try:
+            return self.classifier.predict_batch(contents, device=device, top_k=top_k)
+        except Exception:
+            results = []
+            for content in contents:
+                try:
+                    predictions, _ = self.classifier.predict(file=content, device=device,
+                                                             top_k=top_k)
+                    results.append(predictions)
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    async def predict_images(
+            self, *, image_ids: list[UUID | str], device: str,
+            top_k: int | None = settings.PREDICTION_TOP_K
+    ) -> tuple[list[Image], dict[str, str]]:
+        """
+        Classifies the images and saves their predictions in a single transaction.
+        Images which cannot be loaded or classified are skipped, returns the updated
+        images and the errors of the failed ones by image id.
+        """
+        async with SessionLocal() as db_session, get_redis_connection() as redis_client:
+            images = await self.get_by_ids(list_ids=image_ids, db_session=db_session)
+            if not images:
+                raise AttributeError("Images not found")
+
+            predictions = await get_cached_predictions(
+                redis_client, [image.file_hash for image in images], top_k=top_k
+            )
+            failed: dict[str, str] = {}
+            # images sharing a payload are classified once
+            to_predict = list({
+                image.file_hash: image for image in images if image.file_hash not in predictions
+            }.values())
+            if to_predict:
+                files = {}
+                db_ids = [
+                    image.id for image in to_predict if image.storage_backend == StorageBackend.db
+                ]
+                if db_ids:
+                    # load missing payloads stored in the database with a single query
+                    db_images = await self.get_by_ids(
+                        list_ids=db_ids, with_file=True, db_session=db_session
+                    )
+                    files = {image.id: image.file for image in db_images}
+
+                loaded, contents = [], []
+                for image in to_predict:
+                    try:
+                        content = files.get(image.id)
+                        if content is None:
+                            content = await self.get_image_content(
+                                image=image, db_session=db_session
+                            )
+                    except Exception as e:
+                        failed[image.file_hash] = str(e) or type(e).__name__
+                        continue
+                    loaded.append(image)
+                    contents.append(content)
+
+                new_predictions = {}
+                for image, result in zip(loaded, self._predict_contents(contents, device, top_k)):
+                    if isinstance(result, Exception):
+                        failed[image.file_hash] = str(result) or type(result).__name__
+                    else:
+                        new_predictions[image.file_hash] = result
+                if new_predictions:
+                    await set_cached_predictions(redis_client, new_predictions, top_k=top_k)
+                    predictions.update(new_predictions)
+
+            # update all predictions in a single transaction
+            predicted = [image for image in images if image.file_hash in predictions]
+            for image in predicted:
+                setattr(image, "predictions", predictions[image.file_hash])
+            db_session.add_all(predicted)
+            await db_session.commit()
+            errors = {
+                str(image.id): failed[image.file_hash]
+                for image in images
+                if image.file_hash in failed
+            }
+            return predicted, errors
+
+    async def get_existing_ids(
+            self, *, list_ids: list[UUID | str], db_session: AsyncSession | None = None
+    ) -> list[UUID]:
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(select(Image.id).where(col(Image.id).in_(list_ids)))
+        return response.scalars().all()
+
+
+@lru_cache
+def load_image_predictor() -> "ImagePredictor":
+    """
+    Loads the model once per process. Weights are moved to shared memory, so when
+    it is called in the celery main process before the pool forks, all worker
+    processes map the same copy of the weights.
+    """
+    # ml modules import torch, keep them out of the import of crud
+    from ml.predictors import ImagePredictor
+
+    predictor = ImagePredictor(model_path=INFERENCE_MODEL_LOC, as_state_dict=False,
+                               backend=INFERENCE_BACKEND)
+    predictor.share_memory()
+    return predictor
+
+
+def get_image_classifier() -> "ImagePredictor | MicroBatchingPredictor":
+    predictor = load_image_predictor()
+    if INFERENCE_MICRO_BATCHING:
+        from ml.batching import MicroBatchingPredictor
+
+        # concurrent tasks (e.g. celery worker started with `--pool threads`) share forward passes,
+        # the batching thread is created per process since threads do not survive fork
+        return MicroBatchingPredictor(predictor)
+    return predictor
+
 
-image_classifier = ImagePredictor(model_path=DEFAULT_MODEL_LOC, as_state_dict=False)
-image = CRUDImage(Image, classifier=image_classifier)
+image = CRUDImage(Image, classifier_factory=get_image_classifier)
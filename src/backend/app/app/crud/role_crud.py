@@ -2,8 +2,10 @@ from backend.app.app.schemas.role_schema import IRoleCreate, IRoleUpdate
 from backend.app.app.models.role_model import Role
 from backend.app.app.models.user_model import User
 from backend.app.app.crud.base_crud import CRUDBase
+from backend.app.app.utils.principal_cache import invalidate_all_principals, invalidate_principals
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from typing import Any
 from uuid import UUID
 
 
@@ -18,10 +20,26 @@ class CRUDRole(CRUDBase[Role, IRoleCreate, IRoleUpdate]):
     async def add_role_to_user(self, *, user: User, role_id: UUID) -> Role:
         db_session = super().get_db().session
         role = await super().get(id=role_id)
-        role.users.append(user)
-        db_session.add(role)
+        # set on the user side, so the users of the role are not loaded
+        user.role = role
+        db_session.add(user)
         await db_session.commit()
         await db_session.refresh(role)
+        await invalidate_principals([user.id])
+        return role
+
+    async def update(
+        self,
+        *,
+        obj_current: Role,
+        obj_new: IRoleUpdate | dict[str, Any] | Role,
+        db_session: AsyncSession | None = None,
+    ) -> Role:
+        role = await super().update(
+            obj_current=obj_current, obj_new=obj_new, db_session=db_session
+        )
+        # cached principals keep role names, a renamed role affects all its users
+        await invalidate_all_principals()
         return role
 
 
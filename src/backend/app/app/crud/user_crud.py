@@ -1,24 +1,71 @@
 from backend.app.app.schemas.user_schema import IUserCreate, IUserUpdate
+from backend.app.app.models.image_model import Image
 from backend.app.app.models.user_model import User
-from backend.app.app.core.security import verify_password, get_password_hash
+from backend.app.app.core.security import get_password_hash_async, verify_password_async
 from pydantic.networks import EmailStr
 from typing import Any
 from backend.app.app.crud.base_crud import CRUDBase
+from backend.app.app.utils.principal_cache import invalidate_principals
+from sqlalchemy.orm import lazyload, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
 from sqlmodel import select
 from uuid import UUID
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
 
 
 class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
+    @staticmethod
+    def get_relation_options(*, with_groups: bool = True) -> list[LoaderOption]:
+        """
+        Loader options of the collections in the user read schemas: groups and
+        images (id and filename only, never the payload or the owner again).
+        """
+        options = [
+            selectinload(User.images).options(
+                load_only(Image.id, Image.filename), lazyload(Image.owner)
+            )
+        ]
+        if with_groups:
+            options.append(selectinload(User.groups))
+        return options
+
+    @staticmethod
+    def get_select(*, with_relations: bool = False, with_groups: bool = True) -> Select[User]:
+        """
+        User select statement (the role is always joined). Groups and images are
+        loaded only when requested, e.g. for responses with the user read schemas;
+        `with_groups=False` skips the groups for schemas without them.
+        """
+        query = select(User)
+        if with_relations:
+            query = query.options(*CRUDUser.get_relation_options(with_groups=with_groups))
+        return query
+
+    async def get(
+        self,
+        *,
+        id: UUID | str,
+        with_relations: bool = False,
+        db_session: AsyncSession | None = None,
+    ) -> User | None:
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(
+            self.get_select(with_relations=with_relations).where(User.id == id)
+        )
+        return response.scalar_one_or_none()
+
     async def get_by_email(
-        self, *, email: str, db_session: AsyncSession | None = None
+        self, *, email: str, with_relations: bool = False, db_session: AsyncSession | None = None
     ) -> User | None:
         db_session = db_session or super().get_db().session
-        users = await db_session.execute(select(User).where(User.email == email))
+        users = await db_session.execute(
+            self.get_select(with_relations=with_relations).where(User.email == email)
+        )
         return users.scalar_one_or_none()
 
     async def get_by_id_active(self, *, id: UUID) -> User | None:
-        user = await super().get(id=id)
+        user = await self.get(id=id)
         if not user:
             return None
         if user.is_active is False:
@@ -31,12 +78,27 @@ class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
     ) -> User:
         db_session = db_session or super().get_db().session
         db_obj = User.model_validate(obj_in)
-        db_obj.hashed_password = get_password_hash(obj_in.password)
+        db_obj.hashed_password = await get_password_hash_async(obj_in.password)
         db_session.add(db_obj)
         await db_session.commit()
-        await db_session.refresh(db_obj)
+        # a new user has no groups nor images, loaded anyway for the read schemas
+        await db_session.refresh(db_obj, attribute_names=["role", "groups", "images"])
         return db_obj
 
+    async def update(
+        self,
+        *,
+        obj_current: User,
+        obj_new: IUserUpdate | dict[str, Any] | User,
+        db_session: AsyncSession | None = None,
+    ) -> User:
+        user = await super().update(
+            obj_current=obj_current, obj_new=obj_new, db_session=db_session
+        )
+        # activity, role or password may have changed
+        await invalidate_principals([user.id])
+        return user
+
     async def update_is_active(
         self, *, db_obj: list[User], obj_in: int | str | dict[str, Any]
     ) -> User | None:
@@ -48,13 +110,16 @@ class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
             await db_session.commit()
             await db_session.refresh(x)
             response.append(x)
+        await invalidate_principals([x.id for x in db_obj])
         return response
 
-    async def authenticate(self, *, email: EmailStr, password: str) -> User | None:
-        user = await self.get_by_email(email=email)
+    async def authenticate(
+        self, *, email: EmailStr, password: str, with_relations: bool = False
+    ) -> User | None:
+        user = await self.get_by_email(email=email, with_relations=with_relations)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
         return user
 
@@ -62,13 +127,15 @@ class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
         self, *, id: UUID | str, db_session: AsyncSession | None = None
     ) -> User:
         db_session = db_session or super().get_db().session
+        # collections are loaded, so the unit of work can update the rows referencing the user
         response = await db_session.execute(
-            select(self.model).where(self.model.id == id)
+            self.get_select(with_relations=True).where(self.model.id == id)
         )
         obj = response.scalar_one()
 
         await db_session.delete(obj)
         await db_session.commit()
+        await invalidate_principals([obj.id])
         return obj
 
 
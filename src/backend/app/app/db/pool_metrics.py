@@ -0,0 +1,130 @@
+"""
+Checkout latency and saturation of the Postgres connection pools of this process.
+
+Engines created by ``create_db_engine`` use ``InstrumentedAsyncPool``, which times
+every checkout: the time spent waiting for a free connection, or opening a new
+one when the pool is below its size or may overflow. The latest
+``DB_POOL_METRICS_WINDOW`` checkouts give the latency percentiles, counters are
+kept since the pool was created. Saturation is the share of the pool capacity
+(``POOL_SIZE + DB_MAX_OVERFLOW``) checked out at the moment of the request.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from backend.app.app.core.config import settings
+
+
+class PoolMetrics:
+    """
+    Checkout counters and a window of the latest checkout latencies, updated from the pool
+    (thread safe).
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_latency += seconds
+            self.max_latency = max(self.max_latency, seconds)
+            self._latencies.append(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        """
+        Counters and latencies in milliseconds.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            checkouts = self.checkouts
+            timeouts = self.timeouts
+            total_latency = self.total_latency
+            max_latency = self.max_latency
+
+        def percentile(q: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "checkout_avg_ms": total_latency / checkouts * 1000 if checkouts else 0.0,
+            "checkout_p50_ms": percentile(0.5),
+            "checkout_p95_ms": percentile(0.95),
+            "checkout_p99_ms": percentile(0.99),
+            "checkout_max_ms": max_latency * 1000,
+        }
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool which records how long each checkout takes in ``metrics``.
+    """
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        # kept for the stats, QueuePool does not expose it
+        self.max_overflow = max_overflow
+        self.metrics = PoolMetrics(window=settings.DB_POOL_METRICS_WINDOW)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() replaces the pool, the metrics carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def get_db_pool_stats(engine: AsyncEngine) -> dict[str, int | float | bool]:
+    """
+    Connections of the pool of the engine and its checkout metrics.
+    """
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedAsyncPool):
+        # NullPool (testing) opens a connection per checkout
+        return {"enabled": False}
+    checked_out = pool.checkedout()
+    capacity = pool.size() + max(pool.max_overflow, 0)
+    return {
+        "enabled": True,
+        "pool_size": pool.size(),
+        "max_overflow": pool.max_overflow,
+        "timeout": pool.timeout(),
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": checked_out / capacity if capacity > 0 else 0.0,
+        **pool.metrics.snapshot(),
+    }
@@ -0,0 +1,128 @@
+"""
+Application-lifetime Redis connection pool.
+
+API processes create one pool at startup (``lifespan``) and every Redis client of
+the process - request dependencies, FastAPICache, FastAPILimiter, the prediction
+and principal caches - borrows connections from it. The pool holds at most
+``REDIS_POOL_SIZE`` connections; when all are in use, callers wait up to
+``REDIS_POOL_TIMEOUT`` seconds for one to be released instead of opening more.
+Server-sent event streams hold a connection for their whole duration (pub/sub).
+
+Processes without the pool (celery workers, scripts, tests without the lifespan)
+fall back to short-lived clients: celery runs every coroutine in a new event
+loop, and connections can not be shared between event loops.
+"""
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import redis.asyncio as aioredis
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from backend.app.app.core.config import settings
+
+
+class CountingConnectionPool(BlockingConnectionPool):
+    """
+    Blocking pool which counts its connections for the stats, redis-py does not expose them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections_created = 0
+        # connections handed out by get_connection and not released yet
+        self._checked_out: set = set()
+
+    @property
+    def connections_in_use(self) -> int:
+        return len(self._checked_out)
+
+    def reset(self):
+        super().reset()
+        self.connections_created = 0
+        self._checked_out = set()
+
+    def make_connection(self):
+        self.connections_created += 1
+        return super().make_connection()
+
+    async def get_connection(self, command_name, *keys, **options):
+        # a connection which fails to connect is released by the parent before it is returned
+        connection = await super().get_connection(command_name, *keys, **options)
+        self._checked_out.add(connection)
+        return connection
+
+    async def release(self, connection):
+        self._checked_out.discard(connection)
+        await super().release(connection)
+
+
+redis_pool: CountingConnectionPool | None = None
+
+
+def get_redis_url() -> str:
+    return f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}"
+
+
+def create_redis_pool() -> CountingConnectionPool:
+    """
+    Creates the pool of this process, called in the event loop which will use it.
+    """
+    global redis_pool
+    redis_pool = CountingConnectionPool.from_url(
+        get_redis_url(),
+        max_connections=settings.REDIS_POOL_SIZE,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        encoding="utf8",
+        decode_responses=True,
+    )
+    return redis_pool
+
+
+async def close_redis_pool() -> None:
+    global redis_pool
+    if redis_pool is not None:
+        await redis_pool.aclose()
+        redis_pool = None
+
+
+def get_pooled_client() -> Redis | None:
+    """
+    Client backed by the shared pool (closing it does not close the pool), None without the pool.
+    """
+    if redis_pool is None:
+        return None
+    return Redis(connection_pool=redis_pool)
+
+
+@asynccontextmanager
+async def get_redis_connection() -> AsyncIterator[Redis]:
+    """
+    Client of the shared pool, or a client closed on exit when the process has no pool.
+    """
+    client = get_pooled_client()
+    if client is not None:
+        yield client
+        return
+    client = aioredis.from_url(get_redis_url(), encoding="utf8", decode_responses=True)
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+def get_redis_pool_stats() -> dict[str, int | float | bool]:
+    """
+    Connections of the shared pool: in use and idle (open, available for reuse).
+    """
+    if redis_pool is None:
+        return {"enabled": False}
+    in_use = redis_pool.connections_in_use
+    idle = redis_pool.connections_created - in_use
+    return {
+        "enabled": True,
+        "max_connections": redis_pool.max_connections,
+        "timeout": redis_pool.timeout,
+        "in_use": in_use,
+        "idle": idle,
+        "utilization": in_use / redis_pool.max_connections,
+    }
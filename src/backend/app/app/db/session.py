@@ -1,24 +1,40 @@
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from backend.app.app.core.config import ModeEnum, settings
-from sqlalchemy.ext.asyncio import create_async_engine
+from backend.app.app.db.pool_metrics import InstrumentedAsyncPool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
-
-DB_POOL_SIZE = 83
-WEB_CONCURRENCY = 9
-POOL_SIZE = max(DB_POOL_SIZE // WEB_CONCURRENCY, 5)
-
-connect_args = {"check_same_thread": False}
-
-engine = create_async_engine(
-    str(settings.ASYNC_DATABASE_URI),
-    echo=False,
-    poolclass=NullPool
-    if settings.MODE == ModeEnum.testing
-    else AsyncAdaptedQueuePool,  # Asyncio pytest works with NullPool
-    # pool_size=POOL_SIZE,
-    # max_overflow=64,
-)
+from sqlalchemy.pool import NullPool
+
+
+def create_db_engine(db_url: str) -> AsyncEngine:
+    """
+    Creates an engine configured by the DB_* settings, shared by every session of the process.
+
+    :param db_url: asyncpg database url
+    """
+    # both asyncpg and the SQLAlchemy dialect cache prepared statements per connection
+    url = make_url(db_url).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    )
+    connect_args = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    if settings.MODE == ModeEnum.testing:
+        # Asyncio pytest works with NullPool
+        return create_async_engine(url, echo=False, poolclass=NullPool, connect_args=connect_args)
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = create_db_engine(str(settings.ASYNC_DATABASE_URI))
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -28,15 +44,7 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
-engine_celery = create_async_engine(
-    str(settings.ASYNC_CELERY_BEAT_DATABASE_URI),
-    echo=False,
-    poolclass=NullPool
-    if settings.MODE == ModeEnum.testing
-    else AsyncAdaptedQueuePool,  # Asyncio pytest works with NullPool
-    # pool_size=POOL_SIZE,
-    # max_overflow=64,
-)
+engine_celery = create_db_engine(str(settings.ASYNC_CELERY_BEAT_DATABASE_URI))
 
 SessionLocalCelery = sessionmaker(
     autocommit=False,
@@ -44,4 +52,4 @@ SessionLocalCelery = sessionmaker(
     bind=engine_celery,
     class_=AsyncSession,
     expire_on_commit=False,
-)
\ No newline at end of file
+)
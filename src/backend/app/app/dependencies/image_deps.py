@@ -5,6 +5,7 @@ from typing_extensions import Annotated
 
 from backend.app.app import crud
 from backend.app.app.models.image_model import Image
+from backend.app.app.schemas.image_schema import IImageBatchPredict
 from backend.app.app.utils.exceptions import NameNotFoundException, IdNotFoundException, ImageWithoutPredictionsException
 
 
@@ -35,6 +36,16 @@ async def is_valid_image_id(
     return image_id
 
 
+async def are_valid_image_ids(images: IImageBatchPredict) -> list[UUID]:
+    image_ids = list(dict.fromkeys(images.image_ids))
+    existing_ids = await crud.image.get_existing_ids(list_ids=image_ids)
+    missing_ids = set(image_ids) - set(existing_ids)
+    if missing_ids:
+        raise IdNotFoundException(Image, id=", ".join(str(image_id) for image_id in missing_ids))
+
+    return image_ids
+
+
 async def has_image_predictions(image_id: Annotated[UUID, Path(title="The UUID id of the image")]) -> UUID:
     # first check if image exists
     image_id = await is_valid_image_id(image_id)
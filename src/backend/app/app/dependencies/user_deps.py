@@ -26,7 +26,7 @@ async def user_exists(new_user: IUserCreate) -> IUserCreate:
 async def is_valid_user(
     user_id: Annotated[UUID, Path(title="The UUID id of the user")]
 ) -> IUserRead:
-    user = await crud.user.get(id=user_id)
+    user = await crud.user.get(id=user_id, with_relations=True)
     if not user:
         raise IdNotFoundException(User, id=user_id)
 
@@ -1,10 +1,13 @@
+import asyncio
 import gc
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import (
     FastAPI,
     HTTPException,
     Request,
+    Response,
     status,
 )
 from fastapi_async_sqlalchemy import SQLAlchemyMiddleware
@@ -13,17 +16,22 @@ from fastapi_cache.backends.redis import RedisBackend
 from fastapi_limiter import FastAPILimiter
 from jwt import DecodeError, ExpiredSignatureError, MissingRequiredClaimError
 
-from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import HTMLResponse
 
+from backend.app.app import crud
 from backend.app.app.api.api_deps import get_redis_client
 from backend.app.app.api.v1.api import api_router as api_router_v1
-from backend.app.app.core.config import ModeEnum, settings
-from backend.app.app.core.security import decode_token
+from backend.app.app.core.config import settings
+from backend.app.app.core.security import shutdown_password_executor
+from backend.app.app.db.redis_pool import close_redis_pool, create_redis_pool
+from backend.app.app.db.session import engine
 from backend.app.app.initial_data import create_init_data
 from backend.app.app.utils.fastapi_globals import GlobalsMiddleware, g
+from backend.app.app.utils.inline_inference import inline_inference
+from backend.app.app.utils.token import decode_token_cached
 
+logger = logging.getLogger(__name__)
 
 
 async def user_id_identifier(request: Request):
@@ -37,7 +45,7 @@ async def user_id_identifier(request: Request):
             if len(header_parts) == 2 and header_parts[0].lower() == "bearer":
                 token = header_parts[1]
                 try:
-                    payload = decode_token(token)
+                    payload = decode_token_cached(token)
                 except ExpiredSignatureError:
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
@@ -70,9 +78,25 @@ async def user_id_identifier(request: Request):
     return ip + ":" + request.scope["path"]
 
 
+async def warm_up_model() -> None:
+    """
+    Loads and warms up the model in a thread, the app keeps serving (and reporting not ready)
+    meanwhile.
+    """
+    try:
+        timings = await asyncio.to_thread(crud.image.warm_up_classifier)
+        logger.info("Model warmed up (batch size: ms): %s", timings)
+    except Exception:
+        logger.exception("Model warm-up failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    if settings.PRELOAD_MODEL:
+        app.state.model_warm_up = asyncio.create_task(warm_up_model())
+    # FastAPICache, FastAPILimiter and request dependencies share one pool
+    create_redis_pool()
     redis_client = await get_redis_client()
     FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
     await FastAPILimiter.init(redis_client, identifier=user_id_identifier)
@@ -84,6 +108,10 @@ async def lifespan(app: FastAPI):
     # shutdown
     await FastAPICache.clear()
     await FastAPILimiter.close()
+    await close_redis_pool()
+    await engine.dispose()
+    inline_inference.shutdown()
+    shutdown_password_executor()
     g.cleanup()
     gc.collect()
 
@@ -97,19 +125,7 @@ app = FastAPI(
 )
 
 
-app.add_middleware(
-    SQLAlchemyMiddleware,
-    db_url=str(settings.ASYNC_DATABASE_URI),
-    engine_args={
-        "echo": False,
-        "poolclass": NullPool
-        if settings.MODE == ModeEnum.testing
-        else AsyncAdaptedQueuePool
-        # "pool_pre_ping": True,
-        # "pool_size": settings.POOL_SIZE,
-        # "max_overflow": 64,
-    },
-)
+app.add_middleware(SQLAlchemyMiddleware, custom_engine=engine)
 app.add_middleware(GlobalsMiddleware)
 
 # Set all CORS origins enabled
@@ -149,5 +165,30 @@ async def root():
     return HTMLResponse(content=basic_home_page)
 
 
+@app.get("/health")
+async def health():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness probe used by the reverse proxy: 503 until the model is loaded
+    and warmed up, when the process serves predictions (PRELOAD_MODEL).
+    """
+    is_ready = not settings.PRELOAD_MODEL or crud.image.is_classifier_warmed_up
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "ready": is_ready,
+        "model_required": settings.PRELOAD_MODEL,
+        "model_loaded": crud.image.is_classifier_loaded,
+        "model_warmed_up": crud.image.is_classifier_warmed_up,
+    }
+
+
 # Add Routers
 app.include_router(api_router_v1, prefix=settings.API_V1_STR)
@@ -21,5 +21,5 @@ class Group(BaseUUIDModel, GroupBase, table=True):
     users: list["User"] = Relationship(
         back_populates="groups",
         link_model=LinkGroupUser,
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
     )
\ No newline at end of file
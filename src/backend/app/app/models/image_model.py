@@ -1,16 +1,17 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Column, DateTime, func, JSON
+from sqlalchemy import BigInteger, Column, DateTime, func, JSON, LargeBinary, String
+from sqlalchemy_utils import ChoiceType
 from sqlmodel import SQLModel, Field, Relationship
 
 from backend.app.app.models import User
 from backend.app.app.models.base_uuid_model import BaseUUIDModel
+from backend.app.app.schemas.common_schema import StorageBackend
 from uuid import UUID
 
 
 class BaseImage(SQLModel):
-    file: str
     filename: str = Field(index=True, min_length=1, max_length=255)
     # created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=True, server_default=func.now()))
     # updated_at: datetime | None = Field(
@@ -29,6 +30,16 @@ class Image(BaseUUIDModel, BaseImage, table=True):
         }
     )
     predictions: dict | None = Field(default=None, sa_column=Column(JSON, nullable=False))
+    # raw image bytes, only used by the "db" storage backend
+    file: bytes | None = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+    storage_backend: StorageBackend = Field(
+        default=StorageBackend.db,
+        sa_column=Column(ChoiceType(StorageBackend, impl=String()), nullable=False),
+    )
+    file_key: str = Field(index=True, max_length=255)
+    file_size: int = Field(sa_column=Column(BigInteger, nullable=False))
+    file_hash: str = Field(index=True, min_length=64, max_length=64)
+    content_type: str | None = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -35,12 +35,16 @@ class User(BaseUUIDModel, UserBase, table=True):
     role: Optional["Role"] = Relationship(  # noqa: F821
         back_populates="users", sa_relationship_kwargs={"lazy": "joined"}
     )
+    # collections are never loaded implicitly, queries opt in with loader options
+    # (see CRUDUser.get_select)
     groups: list["Group"] = Relationship(  # noqa: F821
         back_populates="users",
         link_model=LinkGroupUser,
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
+    )
+    images: list["Image"] = Relationship(
+        back_populates="owner", sa_relationship_kwargs={"lazy": "raise"}
     )
-    images: list["Image"] = Relationship(back_populates="owner", sa_relationship_kwargs={"lazy": "selectin"})
 
     # image_id: UUID | None = Field(default=None, foreign_key="ImageMedia.id")
     # image: ImageMedia = Relationship(
@@ -9,6 +9,12 @@ class Device(str, Enum):
     mps = "mps"
 
 
+class StorageBackend(str, Enum):
+    db = "db"
+    filesystem = "filesystem"
+    s3 = "s3"
+
+
 class IGenderEnum(str, Enum):
     female = "female"
     male = "male"
@@ -24,6 +30,16 @@ class IOrderEnum(str, Enum):
     descendant = "descendant"
 
 
+class IPaginationEnum(str, Enum):
+    offset = "offset"
+    cursor = "cursor"
+
+
+class ICountEnum(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+
+
 class TokenType(str, Enum):
     ACCESS = "access_token"
     REFRESH = "refresh_token"
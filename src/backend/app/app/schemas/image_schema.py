@@ -1,7 +1,9 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+
+from backend.app.app.core.config import settings
 
 from backend.app.app.models.image_model import BaseImage
 from backend.app.app.schemas.user_schema import IUserRead
@@ -21,6 +23,9 @@ class BaseImageView(BaseModel):
     created_by: UUID | None = None
     owner: BaseOwnerView | None = None
     predictions: dict | None = None
+    file_size: int | None = None
+    file_hash: str | None = None
+    content_type: str | None = None
 
 
 class IImageCreate(BaseImage):
@@ -32,6 +37,10 @@ class IImagePredict(BaseModel):
     updated_at: datetime | None = None
 
 
+class IImageBatchPredict(BaseModel):
+    image_ids: list[UUID] = Field(min_length=1, max_length=settings.IMAGE_BATCH_PREDICT_MAX_SIZE)
+
+
 class IImageRead(BaseImageView):
     pass
 
@@ -61,6 +61,21 @@ class IGetResponseBase(IResponseBase[DataType], Generic[DataType]):
     message: str | None = "Data received correctly"
 
 
+class ICursorPage(BaseModel, Generic[T]):
+    items: Sequence[T]
+    size: int
+    next_cursor: str | None = Field(
+        default=None, description="Cursor of the next page, None on the last page"
+    )
+    total: int | None = Field(
+        default=None, description="Number of items, only when requested"
+    )
+
+
+class IGetResponseCursorPaginated(IGetResponseBase[ICursorPage[DataType]], Generic[DataType]):
+    message: str | None = "Data paginated correctly"
+
+
 class IPostResponseBase(IResponseBase[DataType], Generic[DataType]):
     message: str | None = "Data created correctly"
 
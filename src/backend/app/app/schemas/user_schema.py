@@ -61,3 +61,12 @@ class IUserBasicInfo(BaseModel):
 class IUserStatus(str, Enum):
     active = "active"
     inactive = "inactive"
+
+
+class IUserPrincipal(BaseModel):
+    """
+    What authorization needs to know about the current user, cached between requests
+    """
+    id: UUID
+    is_active: bool
+    role_name: str | None = None
@@ -0,0 +1,106 @@
+"""
+Totals of paginated lists without counting the rows on every page.
+
+* exact: COUNT(*) of the query, cached in Redis for ``COUNT_CACHE_TTL`` seconds by
+  statement and parameters, so paging through a list counts it once per TTL (the
+  total may lag behind inserts and deletes by that much),
+* estimated: for a query over a whole table (no filter, join or grouping) the
+  planner estimate of its rows (``pg_class.reltuples``), which costs one catalog
+  lookup whatever the size of the table and is refreshed by (auto)VACUUM/ANALYZE.
+  Filtered queries and tables not analyzed yet get the exact count.
+
+Without Redis, exact counts are computed on every call.
+"""
+import hashlib
+import json
+
+from fastapi_pagination.ext.sqlalchemy import create_count_query
+from redis.exceptions import RedisError
+from sqlalchemy import Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import lazyload
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+
+from backend.app.app.core.config import settings
+from backend.app.app.db.redis_pool import get_redis_connection
+from backend.app.app.schemas.common_schema import ICountEnum
+
+KEY_PREFIX = "count"
+
+
+def get_count_key(count_query: Select) -> str:
+    compiled = count_query.compile(dialect=postgresql.dialect())
+    statement = str(compiled) + json.dumps(compiled.params, sort_keys=True, default=str)
+    return f"{KEY_PREFIX}:{hashlib.sha256(statement.encode()).hexdigest()}"
+
+
+def get_counted_table(query: Select) -> Table | None:
+    """
+    The table of a query which selects all of its rows, None for other queries.
+    """
+    # joined eager loads of relationships (e.g. User.role) do not change the rows
+    froms = query.options(lazyload("*")).get_final_froms()
+    if query.whereclause is not None or query._group_by_clauses or len(froms) != 1:
+        return None
+    return froms[0] if isinstance(froms[0], Table) else None
+
+
+async def get_estimated_count(db_session: AsyncSession, table: Table) -> int | None:
+    """
+    Planner estimate of the rows of the table, None when it was never analyzed.
+    """
+    response = await db_session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": f'"{table.name}"'},
+    )
+    estimate = response.scalar_one_or_none()
+    # -1 (PostgreSQL 14+) or 0 before the first ANALYZE,
+    # counting a table that small is cheap anyway
+    if estimate is None or estimate <= 0:
+        return None
+    return estimate
+
+
+async def get_exact_count(db_session: AsyncSession, query: Select) -> int:
+    count_query = create_count_query(query)
+    key = get_count_key(count_query)
+    try:
+        async with get_redis_connection() as redis_client:
+            cached = await redis_client.get(key)
+        if cached is not None:
+            return int(cached)
+    except RedisError:
+        key = None
+
+    response = await db_session.execute(count_query)
+    total = response.scalar_one()
+    if key is not None and settings.COUNT_CACHE_TTL > 0:
+        try:
+            async with get_redis_connection() as redis_client:
+                await redis_client.set(key, total, ex=settings.COUNT_CACHE_TTL)
+        except RedisError:
+            pass
+    return total
+
+
+async def get_count(
+    db_session: AsyncSession, query: Select, mode: ICountEnum = ICountEnum.exact
+) -> int:
+    if mode == ICountEnum.estimated:
+        table = get_counted_table(query)
+        if table is not None:
+            estimate = await get_estimated_count(db_session, table)
+            if estimate is not None:
+                return estimate
+    return await get_exact_count(db_session, query)
+
+
+async def clear_cached_counts() -> None:
+    """
+    Drops all cached exact counts, e.g. after a bulk import.
+    """
+    async with get_redis_connection() as redis_client:
+        keys = [key async for key in redis_client.scan_iter(match=f"{KEY_PREFIX}:*", count=1000)]
+        if keys:
+            await redis_client.delete(*keys)
@@ -0,0 +1,42 @@
+"""
+Opaque cursors of keyset pagination.
+
+A cursor holds the ordering of the list (column and direction) and the sort key of
+the last item of a page (value of the column and id), as urlsafe base64 JSON. The
+next page starts right after that key, so it costs the same whatever its depth.
+"""
+import base64
+import binascii
+import json
+from typing import Any
+from uuid import UUID
+
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_jsonable_python
+
+from backend.app.app.schemas.common_schema import IOrderEnum
+from backend.app.app.utils.exceptions import InvalidCursorException
+
+
+def encode_cursor(order_by: str, order: IOrderEnum, value: Any, id: UUID | str) -> str:
+    payload = {"order_by": order_by, "order": order, "value": value, "id": id}
+    data = json.dumps(to_jsonable_python(payload), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, order_by: str, order: IOrderEnum, value_type: Any = Any
+) -> tuple[Any, UUID]:
+    """
+    Sort key (value, id) of the cursor, validated against the requested ordering.
+    Raises InvalidCursorException for malformed cursors and cursors of another ordering.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data)
+        if payload["order_by"] != order_by or payload["order"] != order:
+            raise InvalidCursorException("The cursor belongs to another ordering of the list.")
+        value = TypeAdapter(value_type).validate_python(payload["value"])
+        return value, UUID(payload["id"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, ValidationError):
+        raise InvalidCursorException()
@@ -1,8 +1,13 @@
 from .common_exceptions import (
     ContentNoChangeException,
     IdNotFoundException,
+    InvalidCursorException,
     NameExistException,
     NameNotFoundException,
 )
 from .user_exceptions import UserSelfDeleteException
-from .image_exceptions import ImageWithoutPredictionsException
\ No newline at end of file
+from .image_exceptions import (
+    ImageWithoutPredictionsException,
+    InferenceBusyException,
+    InferenceTimeoutException,
+)
\ No newline at end of file
@@ -79,4 +79,14 @@ class NameExistException(HTTPException, Generic[ModelType]):
             status_code=status.HTTP_409_CONFLICT,
             detail=f"The {model.__name__} name already exists.",
             headers=headers,
-        )
\ No newline at end of file
+        )
+
+class InvalidCursorException(HTTPException):
+    def __init__(
+        self,
+        detail: Any = "Invalid pagination cursor, request the first page again.",
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=detail, headers=headers
+        )
@@ -14,4 +14,30 @@ class ImageWithoutPredictionsException(HTTPException):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Image with id = {id} has no predictions to view",
             headers=headers,
-        )
\ No newline at end of file
+        )
+
+class InferenceBusyException(HTTPException):
+    def __init__(
+        self,
+        retry_after: int = 1,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many predictions in progress, "
+            "retry later or use the background prediction.",
+            headers={"Retry-After": str(retry_after), **(headers or {})},
+        )
+
+
+class InferenceTimeoutException(HTTPException):
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Prediction did not finish within {timeout} s.",
+            headers=headers,
+        )
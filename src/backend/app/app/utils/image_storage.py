@@ -0,0 +1,221 @@
+"""
+Pluggable storage of uploaded image payloads.
+
+Image rows keep only the storage backend name, the object key, the size and
+the SHA-256 hash of the payload. The bytes themselves live in one of:
+
+* ``db`` - the ``Image.file`` bytea column,
+* ``filesystem`` - a content-addressed directory tree under ``IMAGE_STORAGE_DIR``,
+* ``s3`` - an S3-compatible bucket (e.g. a local MinIO server).
+
+Reads always use the backend recorded on the row, so rows written with
+different backends can coexist after changing ``IMAGE_STORAGE_BACKEND``.
+
+``load`` returns a bytes-like buffer; the filesystem backend memory-maps the
+file, so the payload is decoded straight from the page cache without copies.
+"""
+import asyncio
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
+from functools import lru_cache
+
+from sqlalchemy import inspect
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.app.core.config import settings
+from backend.app.app.models.image_model import Image
+from backend.app.app.schemas.common_schema import StorageBackend
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def _iterate_in_thread(chunks: Iterator[bytes], close=None) -> AsyncIterator[bytes]:
+    try:
+        while chunk := await asyncio.to_thread(next, chunks, b""):
+            yield chunk
+    finally:
+        if close is not None:
+            await asyncio.to_thread(close)
+
+
+class ImageStorage(ABC):
+    backend: StorageBackend
+
+    async def save(self, image: Image, data: bytes, content_type: str | None = None) -> Image:
+        """
+        Stores the payload and fills the image storage metadata (key, size, hash).
+        """
+        file_hash = hashlib.sha256(data).hexdigest()
+        image.storage_backend = self.backend
+        image.file_key = file_hash
+        image.file_hash = file_hash
+        image.file_size = len(data)
+        image.content_type = content_type
+        await self._write(image, data)
+        return image
+
+    @abstractmethod
+    async def _write(self, image: Image, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def load(self, image: Image, db_session: AsyncSession) -> bytes | memoryview:
+        ...
+
+    async def open_stream(self, image: Image, db_session: AsyncSession) -> AsyncIterator[bytes]:
+        """
+        Returns an iterator over the payload chunks. Anything that needs the
+        database session happens here, before the iterator is consumed.
+        """
+        data = await self.load(image, db_session)
+
+        async def iterate() -> AsyncIterator[bytes]:
+            for start in range(0, len(data), STREAM_CHUNK_SIZE):
+                yield data[start:start + STREAM_CHUNK_SIZE]
+
+        return iterate()
+
+    @abstractmethod
+    async def delete(self, image: Image) -> None:
+        ...
+
+
+class DatabaseImageStorage(ImageStorage):
+    backend = StorageBackend.db
+
+    async def _write(self, image: Image, data: bytes) -> None:
+        image.file = data
+
+    async def load(self, image: Image, db_session: AsyncSession) -> bytes:
+        if "file" not in inspect(image).unloaded:
+            return image.file
+        response = await db_session.execute(select(Image.file).where(Image.id == image.id))
+        return response.scalar_one()
+
+    async def delete(self, image: Image) -> None:
+        # payload is removed together with the row
+        pass
+
+
+class FileSystemImageStorage(ImageStorage):
+    backend = StorageBackend.filesystem
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def get_path(self, key: str) -> str:
+        # fan out into sub-directories to keep directory listings small
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def _write_file(self, key: str, data: bytes) -> None:
+        path = self.get_path(key)
+        if os.path.exists(path):
+            # content-addressed: the same payload is stored only once
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+
+    def _map_file(self, key: str) -> memoryview:
+        with open(self.get_path(key), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            # the mapping stays valid after the file is closed and is
+            # released together with the last reference to the view
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    async def _write(self, image: Image, data: bytes) -> None:
+        await asyncio.to_thread(self._write_file, image.file_key, data)
+
+    async def load(self, image: Image, db_session: AsyncSession) -> memoryview:
+        return await asyncio.to_thread(self._map_file, image.file_key)
+
+    async def open_stream(self, image: Image, db_session: AsyncSession) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self.get_path(image.file_key), "rb")
+        return _iterate_in_thread(iter(lambda: f.read(STREAM_CHUNK_SIZE), b""), close=f.close)
+
+    async def delete(self, image: Image) -> None:
+        path = self.get_path(image.file_key)
+        if os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
+
+
+class S3ImageStorage(ImageStorage):
+    backend = StorageBackend.s3
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, bucket: str, secure: bool):
+        # optional dependency, only needed when the s3 backend is used
+        from minio import Minio
+
+        self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
+        self.bucket = bucket
+        self._bucket_checked = False
+
+    def _ensure_bucket(self) -> None:
+        if not self._bucket_checked:
+            if not self.client.bucket_exists(self.bucket):
+                self.client.make_bucket(self.bucket)
+            self._bucket_checked = True
+
+    def _put_object(self, key: str, data: bytes, content_type: str | None) -> None:
+        self._ensure_bucket()
+        self.client.put_object(
+            self.bucket,
+            key,
+            io.BytesIO(data),
+            length=len(data),
+            content_type=content_type or "application/octet-stream",
+        )
+
+    def _get_object(self, key: str) -> bytes:
+        response = self.client.get_object(self.bucket, key)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def _write(self, image: Image, data: bytes) -> None:
+        await asyncio.to_thread(self._put_object, image.file_key, data, image.content_type)
+
+    async def load(self, image: Image, db_session: AsyncSession) -> bytes:
+        return await asyncio.to_thread(self._get_object, image.file_key)
+
+    async def open_stream(self, image: Image, db_session: AsyncSession) -> AsyncIterator[bytes]:
+        response = await asyncio.to_thread(self.client.get_object, self.bucket, image.file_key)
+
+        def close() -> None:
+            response.close()
+            response.release_conn()
+
+        return _iterate_in_thread(iter(response.stream(STREAM_CHUNK_SIZE)), close=close)
+
+    async def delete(self, image: Image) -> None:
+        await asyncio.to_thread(self.client.remove_object, self.bucket, image.file_key)
+
+
+@lru_cache
+def get_image_storage(backend: StorageBackend | str | None = None) -> ImageStorage:
+    """
+    returns the storage for the given backend (configured backend by default)
+    """
+    backend = StorageBackend(backend or settings.IMAGE_STORAGE_BACKEND)
+    if backend == StorageBackend.filesystem:
+        return FileSystemImageStorage(root=settings.IMAGE_STORAGE_DIR)
+    if backend == StorageBackend.s3:
+        return S3ImageStorage(
+            endpoint=settings.MINIO_URL,
+            access_key=settings.MINIO_ROOT_USER,
+            secret_key=settings.MINIO_ROOT_PASSWORD,
+            bucket=settings.MINIO_BUCKET,
+            secure=settings.MINIO_SECURE,
+        )
+    return DatabaseImageStorage()
@@ -0,0 +1,94 @@
+"""
+Bounded executor running model predictions inline in API processes.
+
+Inference is CPU bound and blocks, so it never runs on the event loop: requests
+are handed to a small thread pool (``INLINE_PREDICT_WORKERS`` threads, torch
+releases the GIL during the forward pass). At most ``INLINE_PREDICT_QUEUE_SIZE``
+more requests wait for a free thread; beyond that requests are rejected
+immediately (503 + Retry-After) instead of piling up, so a burst of predictions
+can not starve the rest of the API.
+
+A request waits for its result at most ``INLINE_PREDICT_TIMEOUT`` seconds (504).
+The slot of a timed out request is released only when the prediction actually
+finishes, so the bound holds for work in progress, not for waiting clients.
+"""
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from backend.app.app.core.config import settings
+from backend.app.app.utils.exceptions import InferenceBusyException, InferenceTimeoutException
+
+
+class InlineInferenceExecutor:
+
+    def __init__(self, max_workers: int, max_queue_size: int, timeout: float):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue_size
+        self.timeout = timeout
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """
+        Predictions running or waiting for a thread.
+        """
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # created on first use, API processes which never predict inline start no threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inline-inference"
+            )
+        return self._executor
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            return True
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `fn` in the pool and awaits its result.
+        Raises InferenceBusyException when the queue is full and InferenceTimeoutException
+        when the result is not ready in time.
+        """
+        if not self._acquire():
+            raise InferenceBusyException()
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            # shielded: a timed out prediction is not interrupted, it keeps its slot until done
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutException(timeout=self.timeout)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+inline_inference = InlineInferenceExecutor(
+    max_workers=settings.INLINE_PREDICT_WORKERS,
+    max_queue_size=settings.INLINE_PREDICT_QUEUE_SIZE,
+    timeout=settings.INLINE_PREDICT_TIMEOUT,
+)
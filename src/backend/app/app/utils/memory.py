@@ -0,0 +1,64 @@
+import os
+import resource
+from collections.abc import Iterator
+from contextlib import contextmanager
+from logging import Logger
+
+MiB = 1024 * 1024
+
+
+def get_rss_bytes() -> int:
+    """
+    Current resident set size of this process.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # non-linux fallback: peak instead of current usage
+        return get_peak_rss_bytes()
+
+
+def get_pss_bytes() -> int | None:
+    """
+    Proportional set size: shared pages (e.g. model weights in shared memory)
+    are divided between the processes mapping them. None when not available.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def get_peak_rss_bytes() -> int:
+    """
+    Peak resident set size of this process (ru_maxrss is in KiB on linux).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def log_memory_usage(logger: Logger, label: str) -> Iterator[None]:
+    """
+    Logs RSS growth and peak RSS of the process around the wrapped block.
+    """
+    rss_before = get_rss_bytes()
+    peak_before = get_peak_rss_bytes()
+    try:
+        yield
+    finally:
+        rss_after = get_rss_bytes()
+        peak_after = get_peak_rss_bytes()
+        logger.info(
+            "%s: rss %.1f MiB (%+.1f MiB), peak rss %.1f MiB (%+.1f MiB)",
+            label,
+            rss_after / MiB,
+            (rss_after - rss_before) / MiB,
+            peak_after / MiB,
+            (peak_after - peak_before) / MiB,
+        )
@@ -0,0 +1,110 @@
+"""
+Cache-aside store of model predictions in Redis.
+
+Entries are keyed by the SHA-256 of the image payload, the model version and the
+number of stored classes (top-k), so the same photo uploaded under different
+filenames is classified only once per model. The device is not part of the key -
+predictions do not depend on it.
+
+Entries expire after ``PREDICTION_CACHE_TTL`` seconds; under memory pressure Redis
+evicts them according to its ``maxmemory-policy`` (see docker-compose). Hit and
+miss counters are kept in Redis, so they are shared by all worker processes.
+
+Redis errors never fail a prediction, they are logged and treated as misses.
+"""
+import json
+import logging
+import os
+from functools import lru_cache
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from backend.app.app.core.config import settings
+from settings import INFERENCE_MODEL_LOC
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "prediction_cache"
+HITS_KEY = f"{KEY_PREFIX}:stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}:stats:misses"
+
+
+@lru_cache
+def get_model_version() -> str:
+    """
+    Configured model version, or one derived from the saved model file
+    (name, size and modification time), so a retrained model gets fresh entries.
+    """
+    if settings.PREDICTION_CACHE_MODEL_VERSION:
+        return settings.PREDICTION_CACHE_MODEL_VERSION
+    try:
+        stat = os.stat(INFERENCE_MODEL_LOC)
+    except OSError:
+        return os.path.basename(INFERENCE_MODEL_LOC)
+    return f"{os.path.basename(INFERENCE_MODEL_LOC)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def get_cache_key(file_hash: str, top_k: int | None = None) -> str:
+    return f"{KEY_PREFIX}:{get_model_version()}:{top_k or 'all'}:{file_hash}"
+
+
+async def get_cached_predictions(
+        redis_client: Redis, file_hashes: list[str], top_k: int | None = None
+) -> dict[str, dict[str, float]]:
+    """
+    Returns cached predictions mapped by file hash and records hits and misses.
+    """
+    if not settings.PREDICTION_CACHE_ENABLED or not file_hashes:
+        return {}
+    unique_hashes = list(dict.fromkeys(file_hashes))
+    try:
+        values = await redis_client.mget(
+            [get_cache_key(file_hash, top_k) for file_hash in unique_hashes]
+        )
+        cached = {
+            file_hash: json.loads(value)
+            for file_hash, value in zip(unique_hashes, values)
+            if value is not None
+        }
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.incrby(HITS_KEY, len(cached))
+            pipe.incrby(MISSES_KEY, len(unique_hashes) - len(cached))
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Prediction cache lookup failed", exc_info=True)
+        return {}
+    return cached
+
+
+async def set_cached_predictions(
+        redis_client: Redis, predictions: dict[str, dict[str, float]], top_k: int | None = None
+) -> None:
+    """
+    Stores predictions mapped by file hash.
+    """
+    if not settings.PREDICTION_CACHE_ENABLED or not predictions:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for file_hash, image_predictions in predictions.items():
+                pipe.set(get_cache_key(file_hash, top_k), json.dumps(image_predictions),
+                         ex=settings.PREDICTION_CACHE_TTL)
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Prediction cache update failed", exc_info=True)
+
+
+async def get_prediction_cache_stats(redis_client: Redis) -> dict[str, int | float | str]:
+    hits, misses = await redis_client.mget(HITS_KEY, MISSES_KEY)
+    hits, misses = int(hits or 0), int(misses or 0)
+    return {
+        "model_version": get_model_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+async def reset_prediction_cache_stats(redis_client: Redis) -> None:
+    await redis_client.delete(HITS_KEY, MISSES_KEY)
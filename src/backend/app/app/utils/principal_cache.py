@@ -0,0 +1,80 @@
+"""
+Two-level cache of user principals (id, is_active, role name), so authenticating
+a request does not query the database.
+
+* an in-process LRU keeps principals for ``PRINCIPAL_LOCAL_CACHE_TTL`` seconds,
+* Redis keeps them for ``PRINCIPAL_CACHE_TTL`` seconds, shared by all processes.
+
+Updates of users and roles go through the CRUD layer, which invalidates the
+affected entries in Redis and in the local cache of the updating process. Other
+processes may use a stale principal until their local entry expires, so the local
+TTL bounds how long e.g. a deactivated user stays authorized.
+"""
+import json
+from collections.abc import Iterable
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from backend.app.app.core.config import settings
+from backend.app.app.db.redis_pool import get_redis_connection
+from backend.app.app.schemas.user_schema import IUserPrincipal
+from backend.app.app.utils.local_cache import LocalTTLCache
+
+KEY_PREFIX = "user_principal"
+
+local_cache = LocalTTLCache(
+    maxsize=settings.PRINCIPAL_LOCAL_CACHE_SIZE, ttl=settings.PRINCIPAL_LOCAL_CACHE_TTL
+)
+
+
+def get_principal_key(user_id: UUID | str) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+async def get_cached_principal(redis_client: Redis, user_id: UUID | str) -> IUserPrincipal | None:
+    principal = local_cache.get(str(user_id))
+    if principal is not None:
+        return principal
+    value = await redis_client.get(get_principal_key(user_id))
+    if value is None:
+        return None
+    principal = IUserPrincipal(**json.loads(value))
+    local_cache.set(str(user_id), principal)
+    return principal
+
+
+async def set_cached_principal(redis_client: Redis, principal: IUserPrincipal) -> None:
+    await redis_client.set(get_principal_key(principal.id), principal.model_dump_json(),
+                           ex=settings.PRINCIPAL_CACHE_TTL)
+    local_cache.set(str(principal.id), principal)
+
+
+async def invalidate_principals(
+    user_ids: Iterable[UUID | str], redis_client: Redis | None = None
+) -> None:
+    """
+    Drops cached principals of the users, e.g. after an update, deactivation or password change.
+    """
+    keys = []
+    for user_id in user_ids:
+        local_cache.pop(str(user_id))
+        keys.append(get_principal_key(user_id))
+    if not keys:
+        return
+    if redis_client is not None:
+        await redis_client.delete(*keys)
+        return
+    async with get_redis_connection() as client:
+        await client.delete(*keys)
+
+
+async def invalidate_all_principals() -> None:
+    """
+    Drops all cached principals, e.g. after a role is renamed.
+    """
+    local_cache.clear()
+    async with get_redis_connection() as client:
+        keys = [key async for key in client.scan_iter(match=f"{KEY_PREFIX}:*", count=1000)]
+        if keys:
+            await client.delete(*keys)
@@ -0,0 +1,101 @@
+"""
+State of prediction tasks kept in Redis.
+
+Each task has a hash ``prediction_task:{task_id}`` (state, owner, images, result and
+failed images or error, updated_at) written by the API when the task is queued and by the celery
+task when it starts and finishes. Every update is also published on the channel
+of the same name, so clients waiting for a task are notified instead of polling.
+
+States follow celery: PENDING -> STARTED -> SUCCESS | FAILURE. Hashes expire
+after ``TASK_STATE_TTL`` seconds. Celery results themselves are not stored (the
+result backend is PostgreSQL), Redis is the only place task state is tracked.
+"""
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+from uuid import UUID
+
+from celery import states
+from redis.asyncio import Redis
+
+from backend.app.app.core.config import settings
+
+KEY_PREFIX = "prediction_task"
+READY_STATES = frozenset({states.SUCCESS, states.FAILURE})
+JSON_FIELDS = ("image_ids", "result", "failed")
+
+
+def get_task_key(task_id: UUID | str) -> str:
+    return f"{KEY_PREFIX}:{task_id}"
+
+
+def decode_task_state(task_id: UUID | str, fields: dict[str, str]) -> dict[str, Any]:
+    task_state = {"task_id": str(task_id), **fields}
+    for field in JSON_FIELDS:
+        if field in task_state:
+            task_state[field] = json.loads(task_state[field])
+    if "updated_at" in task_state:
+        task_state["updated_at"] = float(task_state["updated_at"])
+    return task_state
+
+
+async def set_task_state(
+        redis_client: Redis, task_id: UUID | str, state: str, **fields: Any
+) -> dict[str, Any]:
+    """
+    Updates the task hash and publishes the whole new task state.
+    `image_ids`, `result` and `failed` are stored as JSON, other fields as strings.
+    """
+    key = get_task_key(task_id)
+    mapping = {"state": state, "updated_at": time.time()}
+    for name, value in fields.items():
+        if value is not None:
+            mapping[name] = json.dumps(value) if name in JSON_FIELDS else str(value)
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, settings.TASK_STATE_TTL)
+        pipe.hgetall(key)
+        *_, current = await pipe.execute()
+    task_state = decode_task_state(task_id, current)
+    await redis_client.publish(key, json.dumps(task_state))
+    return task_state
+
+
+async def get_task_state(redis_client: Redis, task_id: UUID | str) -> dict[str, Any] | None:
+    fields = await redis_client.hgetall(get_task_key(task_id))
+    return decode_task_state(task_id, fields) if fields else None
+
+
+async def watch_task_state(
+        redis_client: Redis, task_id: UUID | str, timeout: float = 300.0, keepalive: float = 15.0
+) -> AsyncIterator[dict[str, Any] | None]:
+    """
+    Yields the current task state and then every update until the task is ready or `timeout`
+    seconds pass. None is yielded after `keepalive` seconds without updates.
+    """
+    key = get_task_key(task_id)
+    pubsub = redis_client.pubsub()
+    # subscribe before reading the hash, so an update in between is not missed
+    await pubsub.subscribe(key)
+    try:
+        task_state = await get_task_state(redis_client, task_id)
+        if task_state is None:
+            return
+        yield task_state
+
+        deadline = time.monotonic() + timeout
+        last_event = time.monotonic()
+        while task_state["state"] not in READY_STATES and time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is not None and message["type"] == "message":
+                task_state = json.loads(message["data"])
+                last_event = time.monotonic()
+                yield task_state
+            elif time.monotonic() - last_event >= keepalive:
+                last_event = time.monotonic()
+                yield None
+    finally:
+        await pubsub.unsubscribe(key)
+        await pubsub.aclose()
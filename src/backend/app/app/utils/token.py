@@ -1,32 +1,170 @@
-from datetime import timedelta
+"""
+Allow-lists of the tokens of a user and the in-process cache of verified tokens.
+
+A user has no allow-list until the password is changed: then the sorted sets
+``user:{id}:access`` and ``user:{id}:refresh`` hold the only valid tokens, scored by
+their expiry timestamp, and tokens issued afterwards are added to them. A token is
+valid when its set does not exist or holds it with a future expiry, checked by a Lua
+script in a single round trip.
+
+Tokens are added by a Lua script which, atomically, drops the expired tokens of the
+set, keeps at most ``TOKEN_ALLOW_LIST_MAX_SIZE`` tokens (the latest expiring) and
+expires the whole set with its latest token, so sets never grow unbounded.
+
+Allow-lists written by earlier versions are plain sets: both scripts convert such a
+set in place, its tokens expiring with the set (or after the lifetime of the token
+type when the set has no TTL), so revoked tokens stay revoked.
+
+Decoded payloads of verified tokens are cached for ``TOKEN_LOCAL_CACHE_TTL`` seconds
+(never past the token expiry), the allow-list is still checked on every request.
+"""
+import math
+import time
+from typing import Any
 from uuid import UUID
+
 from redis.asyncio import Redis
-from backend.app.app.models.user_model import User
+
+from backend.app.app.core.config import settings
+from backend.app.app.core.security import decode_token
 from backend.app.app.schemas.common_schema import TokenType
+from backend.app.app.utils.local_cache import LocalTTLCache
+
+# converts a legacy SET allow-list to a sorted set,
+# `lifetime`: seconds left when the set has no TTL
+UPGRADE_ALLOW_LIST = """
+local function upgrade_allow_list(key, now, lifetime)
+    if redis.call('TYPE', key).ok ~= 'set' then
+        return
+    end
+    local tokens = redis.call('SMEMBERS', key)
+    local ttl = redis.call('TTL', key)
+    if ttl > 0 then
+        lifetime = ttl
+    end
+    local expires_at = math.ceil(now + lifetime)
+    redis.call('DEL', key)
+    for _, token in ipairs(tokens) do
+        redis.call('ZADD', key, expires_at, token)
+    end
+    redis.call('EXPIREAT', key, expires_at)
+end
+"""
+
+# KEYS[1]: allow-list, ARGV: now, token, lifetime of the token type in seconds
+CHECK_TOKEN_SCRIPT = UPGRADE_ALLOW_LIST + """
+upgrade_allow_list(KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[3]))
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 1
+end
+local expires_at = redis.call('ZSCORE', KEYS[1], ARGV[2])
+if expires_at and tonumber(expires_at) > tonumber(ARGV[1]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS[1]: allow-list, ARGV: now, token, expiry timestamp, max size,
+# add only to an existing allow-list (1/0), lifetime of the token type in seconds
+ADD_TOKEN_SCRIPT = UPGRADE_ALLOW_LIST + """
+upgrade_allow_list(KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[6]))
+if ARGV[5] == '1' and redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[4]) - 1)
+local latest = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+redis.call('EXPIREAT', KEYS[1], math.ceil(tonumber(latest[2])))
+return 1
+"""
+
+verified_tokens = LocalTTLCache(maxsize=settings.TOKEN_LOCAL_CACHE_SIZE,
+                                ttl=settings.TOKEN_LOCAL_CACHE_TTL)
+
+
+def get_token_key(user_id: UUID | str, token_type: TokenType) -> str:
+    return f"user:{user_id}:{token_type}"
+
+
+def decode_token_cached(token: str) -> dict[str, Any]:
+    """
+    decode_token, skipped for tokens verified recently. Raises the same errors.
+    """
+    payload = verified_tokens.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        # never cached past the expiry, which decode_token would reject
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        verified_tokens.set(token, payload, ttl=ttl)
+    return payload
+
+
+def get_token_expiry(expire_time: int) -> int:
+    """
+    Expiry timestamp of a token issued now, valid for `expire_time` minutes.
+    """
+    return math.ceil(time.time() + expire_time * 60)
+
+
+def get_token_lifetime(token_type: TokenType) -> int:
+    """
+    Lifetime in minutes of the tokens of the type.
+    """
+    if token_type == TokenType.REFRESH:
+        return settings.REFRESH_TOKEN_EXPIRE_MINUTES
+    return settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 
-async def add_token_to_redis(
-    redis_client: Redis,
-    user: User,
-    token: str,
-    token_type: TokenType,
-    expire_time: int | None = None,
-):
-    token_key = f"user:{user.id}:{token_type}"
-    valid_tokens = await get_valid_tokens(redis_client, user.id, token_type)
-    await redis_client.sadd(token_key, token)
-    if not valid_tokens:
-        await redis_client.expire(token_key, timedelta(minutes=expire_time))
+async def is_valid_token(
+    redis_client: Redis, user_id: UUID | str, token: str, token_type: TokenType
+) -> bool:
+    check_token = redis_client.register_script(CHECK_TOKEN_SCRIPT)
+    is_valid = await check_token(
+        keys=[get_token_key(user_id, token_type)],
+        args=[time.time(), token, get_token_lifetime(token_type) * 60],
+    )
+    return bool(is_valid)
 
 
-async def get_valid_tokens(redis_client: Redis, user_id: UUID, token_type: TokenType):
-    token_key = f"user:{user_id}:{token_type}"
-    valid_tokens = await redis_client.smembers(token_key)
-    return valid_tokens
+async def add_tokens_to_redis(
+    redis_client: Redis, user_id: UUID | str, tokens: dict[TokenType, tuple[str, int]]
+) -> None:
+    """
+    Adds new tokens to the allow-lists of the user which exist, other tokens are valid anyway.
+    `tokens` maps the token type to the token and its lifetime in minutes.
+    """
+    add_token = redis_client.register_script(ADD_TOKEN_SCRIPT)
+    now = time.time()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for token_type, (token, expire_time) in tokens.items():
+            add_token(
+                keys=[get_token_key(user_id, token_type)],
+                args=[
+                    now,
+                    token,
+                    get_token_expiry(expire_time),
+                    max(settings.TOKEN_ALLOW_LIST_MAX_SIZE, 1),
+                    1,
+                    get_token_lifetime(token_type) * 60,
+                ],
+                client=pipe,
+            )
+        await pipe.execute()
 
 
-async def delete_tokens(redis_client: Redis, user: User, token_type: TokenType):
-    token_key = f"user:{user.id}:{token_type}"
-    valid_tokens = await redis_client.smembers(token_key)
-    if valid_tokens is not None:
-        await redis_client.delete(token_key)
\ No newline at end of file
+async def reset_tokens_in_redis(
+    redis_client: Redis, user_id: UUID | str, tokens: dict[TokenType, tuple[str, int]]
+) -> None:
+    """
+    Replaces the allow-lists of the user with the given tokens, e.g. after a password change.
+    `tokens` maps the token type to the token and its lifetime in minutes.
+    """
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for token_type, (token, expire_time) in tokens.items():
+            token_key = get_token_key(user_id, token_type)
+            expires_at = get_token_expiry(expire_time)
+            pipe.delete(token_key)
+            pipe.zadd(token_key, {token: expires_at})
+            pipe.expireat(token_key, expires_at)
+        await pipe.execute()
@@ -0,0 +1,35 @@
+from collections.abc import Awaitable, Callable
+
+import pytest
+from httpx import AsyncClient
+from typing import AsyncGenerator
+
+from backend.app.app.core.config import settings
+from backend.app.app.main import app
+
+url = "http://fastapi.localhost/api/v1"
+
+
+@pytest.fixture(scope='function')
+async def test_client() -> AsyncGenerator[AsyncClient, None]:
+    async with AsyncClient(app=app, base_url=url) as client:
+        yield client
+
+
+async def login_superuser(client: AsyncClient) -> dict[str, str]:
+    credentials = {
+        "email": settings.FIRST_SUPERUSER_EMAIL,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    response = await client.post("/login", json=credentials)
+    access_token = response.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+def get_auth_headers() -> Callable[[AsyncClient], Awaitable[dict[str, str]]]:
+    """
+    Returns a coroutine function which logs in the first superuser with the given client
+    and returns the auth headers.
+    """
+    return login_superuser
@@ -0,0 +1,85 @@
+import pytest
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from backend.app.app.db.redis_pool import CountingConnectionPool, close_redis_pool, \
+    create_redis_pool, get_redis_connection, get_redis_pool_stats
+
+
+@pytest.mark.asyncio
+class TestPredictionCache:
+    async def test_prediction_cache_stats(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            response = await client.get("/cache/predictions/stats", headers=headers)
+            assert response.status_code == 200
+            stats = response.json()["data"]
+            assert {"model_version", "hits", "misses", "hit_ratio"} <= stats.keys()
+            assert 0.0 <= stats["hit_ratio"] <= 1.0
+
+            response = await client.delete("/cache/predictions/stats", headers=headers)
+            assert response.status_code == 200
+            response = await client.get("/cache/predictions/stats", headers=headers)
+            assert response.json()["data"]["hits"] == 0
+            assert response.json()["data"]["misses"] == 0
+
+    async def test_prediction_cache_stats_unauthorized(self, test_client):
+        async for client in test_client:
+            response = await client.get("/cache/predictions/stats")
+            assert response.status_code == 401
+
+    async def test_redis_pool_stats(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            response = await client.get("/cache/redis/pool", headers=headers)
+            assert response.status_code == 200
+            stats = response.json()["data"]
+            # the test client runs the app without its lifespan, so without the shared pool
+            assert stats["enabled"] is False \
+                or {"in_use", "idle", "max_connections"} <= stats.keys()
+
+    async def test_redis_pool_reuses_connections(self):
+        pool = create_redis_pool()
+        try:
+            for _ in range(3):
+                async with get_redis_connection() as redis_client:
+                    assert await redis_client.ping()
+            stats = get_redis_pool_stats()
+            assert stats["enabled"] is True
+            assert stats["in_use"] == 0
+            assert stats["idle"] == 1
+            assert stats["max_connections"] == pool.max_connections
+        finally:
+            await close_redis_pool()
+        assert get_redis_pool_stats() == {"enabled": False}
+
+    async def test_counting_pool_without_server(self, monkeypatch):
+        pool = CountingConnectionPool(max_connections=4, timeout=1)
+        connected = []
+
+        async def ensure_connection(connection):
+            connected.append(connection)
+
+        monkeypatch.setattr(pool, "ensure_connection", ensure_connection)
+        first = await pool.get_connection("PING")
+        second = await pool.get_connection("PING")
+        assert (pool.connections_created, pool.connections_in_use) == (2, 2)
+
+        await pool.release(first)
+        await pool.release(second)
+        assert (pool.connections_created, pool.connections_in_use) == (2, 0)
+
+        # released connections are reused
+        third = await pool.get_connection("PING")
+        assert third in (first, second)
+        assert (pool.connections_created, pool.connections_in_use) == (2, 1)
+        await pool.release(third)
+
+        async def refuse_connection(connection):
+            raise RedisConnectionError("refused")
+
+        # a connection which fails to connect goes back to the pool uncounted
+        monkeypatch.setattr(pool, "ensure_connection", refuse_connection)
+        with pytest.raises(RedisConnectionError):
+            await pool.get_connection("PING")
+        assert (pool.connections_created, pool.connections_in_use) == (2, 0)
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import threading
+import uuid
+
+import pytest
+
+from backend.app.app.api.api_deps import get_redis_client
+from backend.app.test.query_counter import count_queries
+from backend.app.app.utils.exceptions import InferenceBusyException, InferenceTimeoutException
+from backend.app.app.utils.inline_inference import InlineInferenceExecutor
+from backend.app.app.utils.task_state import get_task_key, get_task_state, set_task_state, \
+    watch_task_state
+from settings import RESOURCES_DIR
+
+test_image_path = os.path.join(RESOURCES_DIR, "test_resources", "test_image_file.jpg")
+
+
+@pytest.mark.asyncio
+class TestImage:
+    async def test_upload_and_stream_content(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            with open(test_image_path, "rb") as f:
+                content = f.read()
+
+            response = await client.post(
+                "/image",
+                params={"filename": f"test-{uuid.uuid4()}", "ground_truth": "collie"},
+                files={"file": ("test_image_file.jpg", content, "image/jpeg")},
+                headers=headers,
+            )
+            assert response.status_code == 201
+            image = response.json()["data"]
+            assert "file" not in image
+            assert image["file_size"] == len(content)
+
+            response = await client.get(f"/image/{image['id']}/content", headers=headers)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/jpeg"
+            assert response.content == content
+
+            response = await client.get("/image", headers=headers)
+            assert response.status_code == 200
+            assert all("file" not in item for item in response.json()["data"]["items"])
+
+            response = await client.delete(f"/image/{image['id']}", headers=headers)
+            assert response.status_code == 200
+
+    async def test_list_query_count(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            await client.get("/image", headers=headers)
+
+            with count_queries() as statements:
+                response = await client.get("/image", headers=headers)
+            assert response.status_code == 200
+            # count + page with the joined owner, nothing loaded per image
+            assert len(statements) <= 2, statements
+            assert not any('"Image".file' in statement for statement in statements)
+
+    async def test_list_cursor_query_count(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            await client.get("/image?pagination=cursor", headers=headers)
+
+            with count_queries() as statements:
+                response = await client.get("/image?pagination=cursor&size=10", headers=headers)
+            assert response.status_code == 200
+            # a single keyset query, not counted unless requested
+            assert len(statements) <= 1, statements
+            assert response.json()["data"]["total"] is None
+
+    async def test_predict_inline_rejects_invalid_content_type(
+            self, test_client, get_auth_headers
+    ):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            response = await client.post(
+                "/image/predict",
+                files={"file": ("notes.txt", b"not an image", "text/plain")},
+                headers=headers,
+            )
+            assert response.status_code == 422
+
+    async def test_prediction_task_not_found(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            response = await client.get(f"/image/tasks/{uuid.uuid4()}", headers=headers)
+            assert response.status_code == 404
+            response = await client.get(f"/image/tasks/{uuid.uuid4()}/events", headers=headers)
+            assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestPredictionTaskState:
+    async def test_watch_until_ready(self):
+        redis_client = await get_redis_client()
+        task_id = str(uuid.uuid4())
+        try:
+            await set_task_state(redis_client, task_id, "PENDING", created_by="user",
+                                 image_ids=["image"])
+
+            async def watch() -> list[dict]:
+                return [
+                    task_state
+                    async for task_state in watch_task_state(redis_client, task_id, timeout=5)
+                    if task_state is not None
+                ]
+
+            watching = asyncio.create_task(watch())
+            await asyncio.sleep(0.1)
+            await set_task_state(redis_client, task_id, "STARTED")
+            await set_task_state(redis_client, task_id, "SUCCESS",
+                                 result={"image": {"collie": 1.0}})
+            events = await asyncio.wait_for(watching, timeout=5)
+
+            assert [event["state"] for event in events] == ["PENDING", "STARTED", "SUCCESS"]
+            task_state = await get_task_state(redis_client, task_id)
+            assert task_state["created_by"] == "user"
+            assert task_state["image_ids"] == ["image"]
+            assert task_state["result"] == {"image": {"collie": 1.0}}
+        finally:
+            await redis_client.delete(get_task_key(task_id))
+            await redis_client.aclose()
+
+
+@pytest.mark.asyncio
+class TestInlineInferenceExecutor:
+    async def test_rejects_when_full(self):
+        executor = InlineInferenceExecutor(max_workers=1, max_queue_size=1, timeout=5)
+        release = threading.Event()
+        try:
+            running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert executor.pending == 2
+
+            with pytest.raises(InferenceBusyException):
+                await executor.run(lambda: None)
+
+            release.set()
+            assert await asyncio.gather(*running) == [True, True]
+            assert executor.pending == 0
+        finally:
+            release.set()
+            executor.shutdown()
+
+    async def test_timed_out_prediction_keeps_its_slot(self):
+        executor = InlineInferenceExecutor(max_workers=1, max_queue_size=0, timeout=0.05)
+        release = threading.Event()
+        try:
+            with pytest.raises(InferenceTimeoutException):
+                await executor.run(release.wait)
+            assert executor.pending == 1
+
+            release.set()
+            await asyncio.sleep(0.05)
+            assert executor.pending == 0
+        finally:
+            release.set()
+            executor.shutdown()
@@ -1,16 +1,19 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
 import pytest
-from httpx import AsyncClient
-from typing import AsyncGenerator
+from jwt import ExpiredSignatureError
 
 from backend.app.app.core.config import settings
-from backend.app.app.main import app
-
-url = "http://fastapi.localhost/api/v1"
+from backend.app.app.api.api_deps import get_redis_client
+from backend.app.app.core.security import create_access_token, decode_token, \
+    get_password_hash_async, verify_password_async
+from backend.app.app.schemas.common_schema import TokenType
+from backend.app.app.utils import token as token_utils
+from backend.app.app.utils.token import add_tokens_to_redis, decode_token_cached, get_token_key, \
+    is_valid_token, reset_tokens_in_redis, verified_tokens
 
-@pytest.fixture(scope='function')
-async def test_client() -> AsyncGenerator[AsyncClient, None]:
-    async with AsyncClient(app=app, base_url=url) as client:
-        yield client
 
 @pytest.mark.asyncio
 class TestPostLogin:
@@ -36,3 +39,122 @@ class TestPostLogin:
             assert response.status_code == expected_status
             if expected_response is not None:
                 assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+class TestPasswordHashing:
+    async def test_hash_and_verify_in_executor(self):
+        hashed_password = await get_password_hash_async("secret-password")
+        # work factor of the hash
+        assert hashed_password.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+        assert await verify_password_async("secret-password", hashed_password)
+        assert not await verify_password_async("wrong-password", hashed_password)
+
+    async def test_hashing_does_not_block_event_loop(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        try:
+            await asyncio.gather(*[get_password_hash_async("secret-password") for _ in range(2)])
+        finally:
+            task.cancel()
+        # the loop kept running while hashing
+        assert ticks > 1
+
+
+@pytest.mark.asyncio
+class TestTokenAllowList:
+    async def test_allow_list(self):
+        user_id = uuid.uuid4()
+        redis_client = await get_redis_client()
+        try:
+            # without an allow-list every token is valid, and new tokens are not tracked
+            assert await is_valid_token(redis_client, user_id, "token-a", TokenType.ACCESS)
+            await add_tokens_to_redis(redis_client, user_id, {TokenType.ACCESS: ("token-a", 1)})
+            assert not await redis_client.exists(get_token_key(user_id, TokenType.ACCESS))
+
+            await reset_tokens_in_redis(redis_client, user_id, {TokenType.ACCESS: ("token-b", 1)})
+            assert not await is_valid_token(redis_client, user_id, "token-a", TokenType.ACCESS)
+            assert await is_valid_token(redis_client, user_id, "token-b", TokenType.ACCESS)
+
+            await add_tokens_to_redis(
+                redis_client, user_id,
+                {TokenType.ACCESS: ("token-c", 1), TokenType.REFRESH: ("token-d", 1)}
+            )
+            assert await is_valid_token(redis_client, user_id, "token-c", TokenType.ACCESS)
+            assert not await redis_client.exists(get_token_key(user_id, TokenType.REFRESH))
+            assert 0 < await redis_client.ttl(get_token_key(user_id, TokenType.ACCESS)) <= 60
+        finally:
+            await redis_client.delete(get_token_key(user_id, TokenType.ACCESS))
+            await redis_client.aclose()
+
+    async def test_allow_list_prunes_tokens(self, monkeypatch):
+        user_id = uuid.uuid4()
+        token_key = get_token_key(user_id, TokenType.ACCESS)
+        redis_client = await get_redis_client()
+        try:
+            await reset_tokens_in_redis(redis_client, user_id, {TokenType.ACCESS: ("token-a", 5)})
+            await add_tokens_to_redis(redis_client, user_id, {TokenType.ACCESS: ("expired", -1)})
+            assert not await is_valid_token(redis_client, user_id, "expired", TokenType.ACCESS)
+
+            # expired tokens are dropped by the next addition
+            await add_tokens_to_redis(redis_client, user_id, {TokenType.ACCESS: ("token-b", 10)})
+            assert await redis_client.zrange(token_key, 0, -1) == ["token-a", "token-b"]
+
+            monkeypatch.setattr(settings, "TOKEN_ALLOW_LIST_MAX_SIZE", 2)
+            await add_tokens_to_redis(redis_client, user_id, {TokenType.ACCESS: ("token-c", 15)})
+            assert await redis_client.zrange(token_key, 0, -1) == ["token-b", "token-c"]
+            # the set expires with its latest token
+            assert 14 * 60 < await redis_client.ttl(token_key) <= 15 * 60
+        finally:
+            await redis_client.delete(token_key)
+            await redis_client.aclose()
+
+    async def test_legacy_set_allow_list(self):
+        user_id = uuid.uuid4()
+        token_key = get_token_key(user_id, TokenType.ACCESS)
+        redis_client = await get_redis_client()
+        try:
+            # allow-lists of earlier versions are plain sets
+            await redis_client.sadd(token_key, "token-a")
+            await redis_client.expire(token_key, 5 * 60)
+            assert await is_valid_token(redis_client, user_id, "token-a", TokenType.ACCESS)
+            assert not await is_valid_token(redis_client, user_id, "token-b", TokenType.ACCESS)
+            assert await redis_client.type(token_key) == "zset"
+
+            await redis_client.delete(token_key)
+            await redis_client.sadd(token_key, "token-a")
+            await add_tokens_to_redis(redis_client, user_id, {TokenType.ACCESS: ("token-c", 1)})
+            assert await redis_client.type(token_key) == "zset"
+            assert await is_valid_token(redis_client, user_id, "token-a", TokenType.ACCESS)
+            assert await is_valid_token(redis_client, user_id, "token-c", TokenType.ACCESS)
+            assert not await is_valid_token(redis_client, user_id, "token-b", TokenType.ACCESS)
+            # a set without TTL keeps its tokens for the lifetime of the token type
+            assert await redis_client.ttl(token_key) > 60
+        finally:
+            await redis_client.delete(token_key)
+            await redis_client.aclose()
+
+    async def test_decode_token_cached(self, monkeypatch):
+        token = create_access_token(uuid.uuid4())
+        calls = []
+
+        def counting_decode(value):
+            calls.append(value)
+            return decode_token(value)
+
+        monkeypatch.setattr(token_utils, "decode_token", counting_decode)
+        verified_tokens.clear()
+        assert decode_token_cached(token) == decode_token_cached(token)
+        assert len(calls) == 1
+
+        expired_token = create_access_token(uuid.uuid4(), expires_delta=timedelta(seconds=-1))
+        for _ in range(2):
+            with pytest.raises(ExpiredSignatureError):
+                decode_token_cached(expired_token)
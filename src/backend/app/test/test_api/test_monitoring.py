@@ -0,0 +1,40 @@
+import pytest
+
+from backend.app.app.db.pool_metrics import PoolMetrics
+
+
+@pytest.mark.asyncio
+class TestDBPoolMetrics:
+    async def test_db_pool_stats(self, test_client, get_auth_headers):
+        async for client in test_client:
+            headers = await get_auth_headers(client)
+            response = await client.get("/monitoring/db/pool", headers=headers)
+            assert response.status_code == 200
+            stats = response.json()["data"]
+            assert {"app", "celery"} <= stats.keys()
+            # tests use NullPool, other modes report the instrumented pool
+            app_stats = stats["app"]
+            assert app_stats["enabled"] is False \
+                or {"checked_out", "saturation", "checkout_p95_ms"} <= app_stats.keys()
+
+    async def test_db_pool_stats_unauthorized(self, test_client):
+        async for client in test_client:
+            response = await client.get("/monitoring/db/pool")
+            assert response.status_code == 401
+
+    async def test_pool_metrics_snapshot(self):
+        metrics = PoolMetrics(window=100)
+        for ms in range(1, 101):
+            metrics.record_checkout(ms / 1000)
+        metrics.record_timeout()
+        snapshot = metrics.snapshot()
+        assert snapshot["checkouts"] == 100
+        assert snapshot["timeouts"] == 1
+        assert snapshot["checkout_avg_ms"] == pytest.approx(50.5)
+        assert snapshot["checkout_p50_ms"] == pytest.approx(51)
+        assert snapshot["checkout_p95_ms"] == pytest.approx(96)
+        assert snapshot["checkout_max_ms"] == pytest.approx(100)
+
+        metrics.reset()
+        assert metrics.snapshot()["checkouts"] == 0
+        assert metrics.snapshot()["checkout_p99_ms"] == 0.0
@@ -1,16 +1,21 @@
+import time
+import uuid
+
 import pytest
-from httpx import AsyncClient
-from typing import AsyncGenerator
 
+from backend.app.app.api.api_deps import get_redis_client
 from backend.app.app.core.config import settings
-from backend.app.app.main import app
-
-url = "http://fastapi.localhost/api/v1"
+from backend.app.app import crud
+from backend.app.app.models import User
+from backend.app.app.schemas.common_schema import IOrderEnum
+from backend.app.app.schemas.user_schema import IUserPrincipal
+from backend.app.test.query_counter import count_queries
+from backend.app.app.utils.count_service import clear_cached_counts, get_counted_table
+from backend.app.app.utils.cursor import decode_cursor, encode_cursor
+from backend.app.app.utils.exceptions import InvalidCursorException
+from backend.app.app.utils.principal_cache import LocalTTLCache, get_cached_principal, \
+    get_principal_key, invalidate_principals, local_cache
 
-@pytest.fixture(scope='function')
-async def test_client() -> AsyncGenerator[AsyncClient, None]:
-    async with AsyncClient(app=app, base_url=url) as client:
-        yield client
 
 @pytest.mark.asyncio
 class TestPostLogin:
@@ -39,3 +44,164 @@ class TestPostLogin:
             assert response.status_code == expected_status
             if expected_response is not None:
                 assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+class TestPrincipalCache:
+    async def test_principal_cached_and_invalidated(self, test_client):
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            access_token = response.json()["data"]["access_token"]
+            response = await client.get(
+                "/user", headers={"Authorization": f"Bearer {access_token}"}
+            )
+            assert response.status_code == 200
+            user = response.json()["data"]
+
+            redis_client = await get_redis_client()
+            try:
+                principal = await get_cached_principal(redis_client, user["id"])
+                assert principal is not None
+                assert principal.is_active
+                assert principal.role_name == user["role"]["name"]
+
+                await invalidate_principals([user["id"]], redis_client=redis_client)
+                assert local_cache.get(user["id"]) is None
+                assert await redis_client.get(get_principal_key(user["id"])) is None
+            finally:
+                await redis_client.aclose()
+
+
+class TestLocalTTLCache:
+    def test_expired_and_evicted_entries(self):
+        cache = LocalTTLCache(maxsize=2, ttl=60)
+        principals = [
+            IUserPrincipal(id=uuid.uuid4(), is_active=True, role_name="user") for _ in range(3)
+        ]
+        for principal in principals:
+            cache.set(str(principal.id), principal)
+
+        assert cache.get(str(principals[0].id)) is None
+        assert cache.get(str(principals[2].id)) == principals[2]
+
+        cache.ttl = 0.01
+        cache.set(str(principals[0].id), principals[0])
+        time.sleep(0.02)
+        assert cache.get(str(principals[0].id)) is None
+
+
+@pytest.mark.asyncio
+class TestUserQueries:
+    @pytest.mark.parametrize(
+        "endpoint, max_queries",
+        [
+            # user + groups + images (the principal is cached by login)
+            ("/user", 3),
+            # page + images (list schemas have no groups), the count is cached by the first request
+            ("/user/list", 2),
+            ("/user/order_by_created_at", 2),
+            # page + images, no count
+            ("/user/list?pagination=cursor", 2),
+            ("/role", 2),
+        ],
+    )
+    async def test_query_count(self, test_client, endpoint, max_queries):
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+            # first request caches the principal
+            await client.get(endpoint, headers=headers)
+
+            with count_queries() as statements:
+                response = await client.get(endpoint, headers=headers)
+            assert response.status_code == 200
+            assert len(statements) <= max_queries, statements
+            # image payloads are never loaded with users
+            assert not any('"Image".file' in statement for statement in statements)
+
+
+@pytest.mark.asyncio
+class TestUserCursorPagination:
+    async def test_walk_pages(self, test_client):
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+            # the total is exact, not a count cached before the users of other tests were created
+            await clear_cached_counts()
+            response = await client.get(
+                "/user/list?pagination=cursor&size=1&with_total=true", headers=headers
+            )
+            assert response.status_code == 200
+            page = response.json()["data"]
+            total = page["total"]
+            user_ids = [user["id"] for user in page["items"]]
+            while page["next_cursor"] is not None:
+                response = await client.get(
+                    f"/user/list?size=1&cursor={page['next_cursor']}", headers=headers
+                )
+                assert response.status_code == 200
+                page = response.json()["data"]
+                assert page["total"] is None
+                user_ids.extend(user["id"] for user in page["items"])
+
+            assert len(user_ids) == total
+            assert user_ids == sorted(user_ids, key=uuid.UUID)
+
+            response = await client.get("/user/list?cursor=not-a-cursor", headers=headers)
+            assert response.status_code == 400
+
+    def test_cursor_round_trip(self):
+        user_id = uuid.uuid4()
+        cursor = encode_cursor("id", IOrderEnum.ascendant, user_id, user_id)
+        assert decode_cursor(cursor, "id", IOrderEnum.ascendant, uuid.UUID) == (user_id, user_id)
+        with pytest.raises(InvalidCursorException):
+            decode_cursor(cursor, "id", IOrderEnum.descendant, uuid.UUID)
+
+
+@pytest.mark.asyncio
+class TestUserCounts:
+    @pytest.mark.parametrize("count", ["exact", "estimated"])
+    async def test_list_total(self, test_client, count):
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+            response = await client.get(f"/user/list?count={count}", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["data"]["total"] >= len(response.json()["data"]["items"]) > 0
+
+    async def test_exact_count_cached(self, test_client):
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+            await client.get("/user/list", headers=headers)
+
+            with count_queries() as statements:
+                response = await client.get("/user/list", headers=headers)
+            assert response.status_code == 200
+            assert not any("count(" in statement.lower() for statement in statements), statements
+
+    def test_counted_table(self):
+        assert get_counted_table(crud.user.get_select(with_relations=True)) is User.__table__
+        assert get_counted_table(crud.user.get_select().where(User.is_active)) is None
@@ -21,3 +21,20 @@ async def test_root(test_client):
     assert response.status_code == 200
     assert "Stanford-Dogs-Classifier-API" in response.text
 
+
+
+@pytest.mark.asyncio
+async def test_health(test_client):
+    async for client in test_client:
+        response = await client.get('/health')
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_ready(test_client):
+    async for client in test_client:
+        response = await client.get('/ready')
+    data = response.json()
+    assert response.status_code == (200 if data["ready"] else 503)
+    assert data["ready"] == (not data["model_required"] or data["model_warmed_up"])
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+import torch.nn as nn
+
+from ml.predictors import ImagePredictor
+from settings import NUM_CLASSES, PARAMETERS, RESOURCES_DIR
+
+
+@pytest.fixture(scope="session")
+def image_path() -> str:
+    return os.path.join(RESOURCES_DIR, "test_resources", "test_image_file.jpg")
+
+
+@pytest.fixture(scope="session")
+def predictor() -> ImagePredictor:
+    channels = PARAMETERS["channels"]
+    model = nn.Sequential(
+        nn.AdaptiveAvgPool2d(8),
+        nn.Flatten(),
+        nn.Linear(channels * 8 * 8, NUM_CLASSES),
+    )
+    return ImagePredictor(model_instance=model)
@@ -0,0 +1,55 @@
+import pytest
+import torch
+import torch.nn as nn
+
+from ml.predictors import ImagePredictor
+from settings import NUM_CLASSES, PARAMETERS
+
+
+@pytest.fixture(scope="module")
+def model() -> nn.Module:
+    torch.manual_seed(0)
+    channels = PARAMETERS["channels"]
+    # conv + batch norm exercises the folding done by the optimized backends
+    return nn.Sequential(
+        nn.Conv2d(channels, 8, kernel_size=3, stride=4),
+        nn.BatchNorm2d(8),
+        nn.ReLU(),
+        nn.AdaptiveAvgPool2d(4),
+        nn.Flatten(),
+        nn.Linear(8 * 4 * 4, NUM_CLASSES),
+    ).eval()
+
+
+@pytest.fixture(scope="module")
+def expected(model, image_path) -> dict:
+    predictions, _ = ImagePredictor(model_instance=model, backend="torch").predict(
+        img_path=image_path, device="cpu"
+    )
+    return predictions
+
+
+class TestInferenceBackends:
+    def test_torchscript_parity(self, model, expected, image_path):
+        predictor = ImagePredictor(model_instance=model, backend="torchscript")
+        predictions, _ = predictor.predict(img_path=image_path, device="cpu")
+        assert predictions == pytest.approx(expected, abs=1e-5)
+
+    def test_onnxruntime_parity(self, model, expected, tmp_path, image_path):
+        pytest.importorskip("onnxruntime")
+        onnx_path = str(tmp_path / "model.onnx")
+        torch.onnx.export(
+            model,
+            torch.rand(1, *PARAMETERS["input_shape"]),
+            onnx_path,
+            input_names=["images"],
+            dynamic_axes={"images": {0: "batch"}},
+        )
+
+        predictor = ImagePredictor(model_path=onnx_path, backend="onnxruntime")
+        predictions, _ = predictor.predict(img_path=image_path, device="cpu")
+        assert predictions == pytest.approx(expected, abs=1e-5)
+
+    def test_unknown_backend(self, model):
+        with pytest.raises(ValueError):
+            ImagePredictor(model_instance=model, backend="tensorrt")
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from ml.batching import MicroBatchingPredictor
+
+
+class TestMicroBatchingPredictor:
+    def test_results_match_single_predictions(self, predictor, image_path):
+        expected, _ = predictor.predict(img_path=image_path, device="cpu")
+
+        batcher = MicroBatchingPredictor(predictor, max_batch_size=4, max_wait_ms=50)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda _: batcher.predict(img_path=image_path, device="cpu"),
+                    range(8),
+                )
+            )
+        batcher.close()
+
+        for predictions, _ in results:
+            assert predictions == pytest.approx(expected, abs=1e-6)
+
+        histogram = batcher.get_batch_size_histogram()
+        assert sum(size * count for size, count in histogram.items()) == 8
+        assert max(histogram) <= 4
+
+    def test_invalid_batch_size(self, predictor):
+        with pytest.raises(ValueError):
+            MicroBatchingPredictor(predictor, max_batch_size=0)
+
+    def test_predict_after_close(self, predictor, image_path):
+        batcher = MicroBatchingPredictor(predictor)
+        batcher.close()
+        with pytest.raises(RuntimeError):
+            batcher.predict(img_path=image_path, device="cpu")
+
+    def test_pending_requests_fail_when_worker_dies(self, predictor, image_path):
+        batcher = MicroBatchingPredictor(predictor, max_wait_ms=50)
+
+        def die(batch):
+            raise SystemExit()
+
+        batcher._predict_batch = die
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(batcher.predict, img_path=image_path, device="cpu")
+                for _ in range(4)
+            ]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=10)
+        with pytest.raises(RuntimeError):
+            batcher.predict(img_path=image_path, device="cpu")
+
+    def test_result_timeout(self, predictor, image_path):
+        batcher = MicroBatchingPredictor(predictor, result_timeout=0.1)
+        # the forward pass takes longer than the caller waits
+        batcher._predict_batch = lambda batch: time.sleep(0.5)
+        with pytest.raises(FutureTimeoutError):
+            batcher.predict(img_path=image_path, device="cpu")
+        batcher.close()
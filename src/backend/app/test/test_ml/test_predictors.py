@@ -0,0 +1,30 @@
+import pytest
+
+from settings import NUM_CLASSES
+
+
+class TestImagePredictor:
+    def test_top_k_is_prefix_of_full_distribution(self, predictor, image_path):
+        full, _ = predictor.predict(img_path=image_path, device="cpu")
+        top, _ = predictor.predict(img_path=image_path, device="cpu", top_k=3)
+
+        assert len(full) == NUM_CLASSES
+        assert len(top) == min(3, NUM_CLASSES)
+        assert list(full.values()) == sorted(full.values(), reverse=True)
+        assert list(top.values()) == pytest.approx(list(full.values())[: len(top)])
+
+    def test_batch_top_k_matches_single_prediction(self, predictor, image_path):
+        with open(image_path, "rb") as f:
+            content = f.read()
+        single, _ = predictor.predict(file=content, device="cpu", top_k=2)
+        batch = predictor.predict_batch([content, content], device="cpu", top_k=2)
+
+        assert len(batch) == 2
+        for predictions in batch:
+            assert predictions == pytest.approx(single, abs=1e-6)
+
+    def test_warm_up_runs_each_batch_size(self, predictor):
+        timings = predictor.warm_up([4, 1, 4], device="cpu", runs=1)
+
+        assert list(timings) == [1, 4]
+        assert all(ms >= 0 for ms in timings.values())
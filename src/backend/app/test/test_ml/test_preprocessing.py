@@ -0,0 +1,32 @@
+import pytest
+import torch
+from PIL import Image
+
+from ml.data_managers import ImageTransformer
+from ml.preprocessing import ImagePreprocessor
+from settings import PARAMETERS
+
+
+@pytest.fixture(scope="module")
+def expected(image_path) -> torch.Tensor:
+    transforms = ImageTransformer.get_image_transforms(PARAMETERS["img_size"], phase="val")
+    return transforms(Image.open(image_path).convert("RGB"))
+
+
+class TestImagePreprocessor:
+    def test_matches_val_transforms(self, expected, image_path):
+        preprocessor = ImagePreprocessor(use_draft=False)
+        batch = preprocessor.preprocess([Image.open(image_path)])
+
+        assert batch.shape == (1, *PARAMETERS["input_shape"])
+        assert torch.allclose(batch[0], expected, atol=1e-5)
+
+    def test_draft_decode_is_close_to_val_transforms(self, expected, image_path):
+        batch = ImagePreprocessor().preprocess([Image.open(image_path)])
+        assert (batch[0] - expected).abs().mean() < 0.1
+
+    def test_batch_buffer_is_reused(self, image_path):
+        preprocessor = ImagePreprocessor()
+        first = preprocessor.preprocess([Image.open(image_path)] * 2)
+        second = preprocessor.preprocess([Image.open(image_path)])
+        assert second.data_ptr() == first.data_ptr()
@@ -0,0 +1,44 @@
+import pytest
+import torch
+from torchvision.models import resnet18
+
+from ml.models.classifiers import MultiClassClassificationModel
+from ml.predictors import ImagePredictor
+from ml.quantization import quantize_dynamic_head, quantize_static, save_quantized_model
+from settings import NUM_CLASSES, PARAMETERS
+
+
+@pytest.fixture(scope="module")
+def model() -> MultiClassClassificationModel:
+    torch.manual_seed(0)
+    return MultiClassClassificationModel(
+        base_model=resnet18, weights=None, apply_head=True, num_classes=NUM_CLASSES
+    ).eval()
+
+
+class TestQuantization:
+    def test_dynamic_head_quantization(self, model):
+        quantized = quantize_dynamic_head(model)
+
+        head = quantized.model.fc
+        assert isinstance(head[1], torch.ao.nn.quantized.dynamic.Linear)
+        # the backbone is left in float
+        assert isinstance(quantized.model.conv1, torch.nn.Conv2d)
+
+        batch = torch.rand(2, *PARAMETERS["input_shape"])
+        with torch.no_grad():
+            expected = torch.softmax(model(batch), dim=1)
+            outputs = torch.softmax(quantized(batch), dim=1)
+        assert torch.allclose(outputs, expected, atol=0.05)
+
+    def test_static_quantized_artifact_loads_in_predictor(self, model, tmp_path, image_path):
+        calibration_batches = [torch.rand(4, *PARAMETERS["input_shape"]) for _ in range(2)]
+        quantized = quantize_static(model, calibration_batches)
+
+        path = str(tmp_path / "model_quantized.pt")
+        save_quantized_model(quantized, path)
+
+        predictor = ImagePredictor(model_path=path, as_state_dict=False)
+        predictions, _ = predictor.predict(img_path=image_path, device="cpu")
+        assert len(predictions) == NUM_CLASSES
+        assert sum(predictions.values()) == pytest.approx(1.0, abs=1e-4)
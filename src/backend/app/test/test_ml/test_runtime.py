@@ -0,0 +1,20 @@
+import pytest
+
+from ml.runtime import partition_cpus
+
+
+class TestPartitionCpus:
+    def test_partitions_are_disjoint_and_cover_all_cpus(self):
+        cpus = list(range(10))
+        partitions = [partition_cpus(cpus, 4, index) for index in range(4)]
+
+        assert sorted(cpu for partition in partitions for cpu in partition) == cpus
+        assert [len(partition) for partition in partitions] == [3, 3, 2, 2]
+
+    def test_more_partitions_than_cpus_share_round_robin(self):
+        cpus = [4, 5]
+        assert [partition_cpus(cpus, 3, index) for index in range(3)] == [[4], [5], [4]]
+
+    def test_invalid_number_of_partitions(self):
+        with pytest.raises(ValueError):
+            partition_cpus([0, 1], 0, 0)
@@ -0,0 +1,133 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Type, Union
+
+import torch
+import torch.nn as nn
+
+
+class InferenceBackend(ABC):
+    """
+    Runs forward passes of a classification model, returns logits on any device.
+    """
+
+    name: str
+    # whether a backend created before fork can be used by forked worker processes
+    fork_safe: bool = True
+
+    @abstractmethod
+    def run(
+        self, batch: torch.Tensor, device: Union[torch.device, str]
+    ) -> torch.Tensor:
+        ...
+
+    def share_memory(self) -> None:
+        """
+        Moves weights to shared memory, where the backend supports it.
+        """
+
+
+class TorchBackend(InferenceBackend):
+    """
+    PyTorch eager (or plain TorchScript) model, runs on any device.
+    """
+
+    name = "torch"
+
+    def __init__(self, model: nn.Module) -> None:
+        self.model = model
+
+    def run(
+        self, batch: torch.Tensor, device: Union[torch.device, str]
+    ) -> torch.Tensor:
+        self.model.to(device)
+        return self.model(batch.to(device))
+
+    def share_memory(self) -> None:
+        self.model.share_memory()
+
+
+class TorchScriptBackend(TorchBackend):
+    """
+    Frozen TorchScript model optimized for CPU inference (`torch.jit.freeze` +
+    `torch.jit.optimize_for_inference`: constant folding, conv-bn folding, operator fusion).
+    Other devices run the model without optimizations.
+
+    Optimization happens on the first CPU forward pass, so a backend created before
+    fork does not run torch ops in the parent process. Folded weights are created
+    per process and are not shared.
+    """
+
+    name = "torchscript"
+
+    def __init__(self, model: nn.Module) -> None:
+        super().__init__(model)
+        self._optimized: Union[torch.jit.ScriptModule, None] = None
+        self._lock = threading.Lock()
+
+    def get_optimized_model(self) -> torch.jit.ScriptModule:
+        with self._lock:
+            if self._optimized is None:
+                self.model.to("cpu")
+                scripted = (
+                    self.model
+                    if isinstance(self.model, torch.jit.ScriptModule)
+                    else torch.jit.script(self.model)
+                )
+                self._optimized = torch.jit.optimize_for_inference(
+                    torch.jit.freeze(scripted.eval())
+                )
+            return self._optimized
+
+    def run(
+        self, batch: torch.Tensor, device: Union[torch.device, str]
+    ) -> torch.Tensor:
+        if torch.device(device).type != "cpu":
+            return super().run(batch, device)
+        return self.get_optimized_model()(batch.to("cpu"))
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    ONNX Runtime CPU session over a model exported with `scripts/export_model.py`.
+    The session owns thread pools, so it has to be created after fork.
+    """
+
+    name = "onnxruntime"
+    fork_safe = False
+
+    def __init__(self, model_path: str) -> None:
+        """
+        :param model_path: path to the exported .onnx model
+        """
+        # optional dependency, only needed when this backend is used
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def run(
+        self, batch: torch.Tensor, device: Union[torch.device, str]
+    ) -> torch.Tensor:
+        # CPU only, the device is ignored
+        (outputs,) = self.session.run(None, {self.input_name: batch.cpu().numpy()})
+        return torch.from_numpy(outputs)
+
+
+INFERENCE_BACKENDS: Dict[str, Type[InferenceBackend]] = {
+    backend.name: backend
+    for backend in (TorchBackend, TorchScriptBackend, OnnxRuntimeBackend)
+}
+
+
+def get_backend_class(name: str) -> Type[InferenceBackend]:
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend {name!r}, "
+            f"available: {', '.join(INFERENCE_BACKENDS)}"
+        )
+    return INFERENCE_BACKENDS[name]
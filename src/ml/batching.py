@@ -0,0 +1,202 @@
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple, Union
+
+import torch
+from PIL import Image
+
+from ml.predictors import ImagePredictor
+from settings import (
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    INFERENCE_RESULT_TIMEOUT_S,
+    PARAMETERS,
+)
+
+
+@dataclass
+class _PendingRequest:
+    tensor: torch.Tensor
+    device: Union[str, None]
+    future: Future
+
+
+class MicroBatchingPredictor:
+    """
+    Class representation of the dynamic micro-batching engine.
+    Concurrent `predict` calls are queued, collected for up to `max_wait_ms`
+    or until `max_batch_size` images are pending, stacked into one tensor
+    and classified with a single forward pass.
+    """
+
+    def __init__(
+        self,
+        predictor: ImagePredictor,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+        result_timeout: float = INFERENCE_RESULT_TIMEOUT_S,
+    ) -> None:
+        """
+        :param predictor: predictor used for preprocessing and forward passes
+        :param max_batch_size: maximum number of images stacked into one batch
+        :param max_wait_ms: maximum time the first queued request waits for others
+        :param result_timeout: maximum time in seconds a request waits for its result
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.result_timeout = result_timeout
+
+        self._queue: "queue.Queue[Union[_PendingRequest, None]]" = queue.Queue()
+        self._histogram: Counter = Counter()
+        self._histogram_lock = threading.Lock()
+        # makes closing and enqueueing atomic, no request is queued after the stop signal
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._run, name="micro-batching-predictor", daemon=True
+        )
+        self._worker.start()
+
+    def predict(
+        self,
+        img_path: Union[str, None] = None,
+        file=None,
+        device: Union[str, None] = None,
+        top_k: Union[int, None] = None,
+        keep_original: bool = False,
+    ) -> Tuple[Dict[str, float], Union[Image.Image, None]]:
+        """
+        Same contract as `ImagePredictor.predict`. Preprocessing runs in the caller
+        thread, the forward pass is shared with other pending requests.
+        Raises `concurrent.futures.TimeoutError` when no result arrives within `result_timeout`.
+        """
+        trf_image, orig_img = self.predictor.preprocess(
+            img_path=img_path, file=file, keep_original=keep_original
+        )
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Predictor has been closed.")
+            self._queue.put(
+                _PendingRequest(tensor=trf_image, device=device, future=future)
+            )
+        try:
+            probabilities = future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            # skipped by the batching thread unless its forward pass already started
+            future.cancel()
+            raise
+        return self.predictor.to_class_map(probabilities, top_k=top_k), orig_img
+
+    def predict_batch(
+        self,
+        files: Sequence,
+        device: Union[str, None] = None,
+        batch_size: int = PARAMETERS["batch_size"],
+        top_k: Union[int, None] = None,
+    ) -> List[Dict[str, float]]:
+        """
+        Already batched requests bypass the queue and go straight to the predictor.
+        """
+        return self.predictor.predict_batch(
+            files, device=device, batch_size=batch_size, top_k=top_k
+        )
+
+    def get_batch_size_histogram(self) -> Dict[int, int]:
+        """
+        returns achieved batch sizes mapped to the number of forward passes
+        """
+        with self._histogram_lock:
+            return dict(sorted(self._histogram.items()))
+
+    def close(self) -> None:
+        """
+        Stops the batching thread after pending requests are served.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._worker.join()
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # re-queue the stop signal so the loop ends after this batch
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        batch: List[_PendingRequest] = []
+        try:
+            while batch := self._collect_batch():
+                # requests cancelled after a timeout are dropped
+                batch = [
+                    request
+                    for request in batch
+                    if request.future.set_running_or_notify_cancel()
+                ]
+                self._predict_batch(batch)
+        finally:
+            # the loop ended (closed, or the thread died): fail everything still waiting
+            with self._lock:
+                self._closed = True
+            error = RuntimeError("Predictor has been closed.")
+            pending = [request for request in batch if not request.future.done()]
+            while True:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if (
+                    request is not None
+                    and request.future.set_running_or_notify_cancel()
+                ):
+                    pending.append(request)
+            for request in pending:
+                request.future.set_exception(error)
+
+    def _predict_batch(self, batch: List[_PendingRequest]) -> None:
+        by_device: Dict[Union[str, None], List[_PendingRequest]] = defaultdict(list)
+        for request in batch:
+            by_device[request.device].append(request)
+
+        for device, requests in by_device.items():
+            try:
+                probabilities = self.predictor.predict_tensors(
+                    torch.stack([request.tensor for request in requests]),
+                    device=device,
+                )
+            except Exception as exc:
+                for request in requests:
+                    request.future.set_exception(exc)
+                continue
+
+            with self._histogram_lock:
+                self._histogram[len(requests)] += 1
+            for request, row in zip(requests, probabilities):
+                request.future.set_result(row)
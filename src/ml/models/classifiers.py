@@ -80,6 +80,13 @@ class MultiClassClassificationModel(nn.Module):
         )
         return linear_layers
 
+    @property
+    def output_layer_name(self) -> str:
+        """
+        Name of the base model attribute holding the output layer / head ('fc' or 'classifier')
+        """
+        return self._model_output_attr_name
+
     def forward(self, x):
         return self.model(x)
 
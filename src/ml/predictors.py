@@ -1,15 +1,15 @@
-import io
-from typing import Dict, Tuple, Union
+import time
+from typing import Dict, List, Sequence, Tuple, Union
 
 import torch
 import torch.nn as nn
 from PIL import Image
-from torchvision.transforms import Compose
 
-from ml.data_managers import ImageTransformer
+from ml.backends import InferenceBackend, OnnxRuntimeBackend, get_backend_class
+from ml.preprocessing import ImagePreprocessor
 from ml.services import get_default_model
 from project_utils import get_user_device
-from settings import DEFAULT_CLASS_NAMES, PARAMETERS
+from settings import DEFAULT_CLASS_NAMES, INFERENCE_BACKEND, PARAMETERS
 
 
 class ImagePredictor:
@@ -22,57 +22,180 @@ class ImagePredictor:
         model_instance: Union[nn.Module, None] = None,
         model_path: Union[str, None] = None,
         as_state_dict: bool = True,
+        backend: str = INFERENCE_BACKEND,
     ) -> None:
+        """
+        :param model_instance: model to use
+        :param model_path: path to the saved model (the exported .onnx file for "onnxruntime")
+        :param as_state_dict: whether the saved model is a state dict or a TorchScript model
+        :param backend: inference backend, one of "torch", "torchscript", "onnxruntime"
+        """
         if model_instance is None and model_path is None:
             raise AssertionError(
                 "Either model or path-to-saved-model must be specified."
             )
 
+        backend_class = get_backend_class(backend)
+        self.model: Union[nn.Module, None] = None
+        if backend_class is OnnxRuntimeBackend:
+            if model_path is None:
+                raise AssertionError("The onnxruntime backend requires model_path.")
+            self.backend: InferenceBackend = OnnxRuntimeBackend(model_path)
+        else:
+            self.model = self.load_model(model_instance, model_path, as_state_dict)
+            self.backend = backend_class(self.model)
+
+        self.preprocessor = ImagePreprocessor(img_size=PARAMETERS["img_size"])
+
+    @staticmethod
+    def load_model(
+        model_instance: Union[nn.Module, None] = None,
+        model_path: Union[str, None] = None,
+        as_state_dict: bool = True,
+    ) -> nn.Module:
+        """
+        Returns the passed model or the model loaded from `model_path`, in eval mode.
+        """
         if model_instance is not None:
-            self.model = model_instance
-        elif model_path is not None:
-            if as_state_dict:
-                self.model = get_default_model()
-                self.model.load_state_dict(
-                    torch.load(model_path, map_location=PARAMETERS["device"])
-                )
-            else:
-                self.model = torch.jit.load(
-                    model_path, map_location=PARAMETERS["device"]
-                )
-        self.model.to(PARAMETERS["device"])
-        self.model.eval()
-        self.img_transforms: Compose = ImageTransformer.get_image_transforms(
-            img_size=PARAMETERS["img_size"], phase="val"
-        )
+            model = model_instance
+        elif as_state_dict:
+            model = get_default_model()
+            model.load_state_dict(
+                torch.load(model_path, map_location=PARAMETERS["device"])
+            )
+        else:
+            model = torch.jit.load(model_path, map_location=PARAMETERS["device"])
+        model.to(PARAMETERS["device"])
+        model.eval()
+        return model
+
+    def share_memory(self) -> None:
+        """
+        Moves model weights to shared memory, so forked processes use a single copy.
+        """
+        self.backend.share_memory()
+
+    def preprocess(
+        self, img_path: Union[str, None] = None, file=None, keep_original: bool = False
+    ) -> Tuple[torch.Tensor, Union[Image.Image, None]]:
+        """
+        Opens the image and applies validation preprocessing.
+        Returns the (C, H, W) input tensor and the original image (None unless
+        `keep_original`, keeping it requires a full resolution decode).
+        `file` can be any bytes-like object (e.g. a memoryview), it is decoded without copying.
+        The tensor is backed by a per-thread buffer reused by the next call.
+        """
+        image = self.preprocessor.open(img_path=img_path, file=file)
+        orig_img = image.copy() if keep_original else None
+        source = orig_img if orig_img is not None else image
+        return self.preprocessor.preprocess([source])[0], orig_img
+
+    def predict_tensors(
+        self, batch: torch.Tensor, device: Union[str, None] = None
+    ) -> torch.Tensor:
+        """
+        Runs a single forward pass on a stacked (N, C, H, W) batch
+        and returns softmax probabilities of shape (N, num_classes) on cpu.
+        """
+        user_dev = get_user_device(device)
+
+        with torch.no_grad():
+            outputs = self.backend.run(batch, user_dev)
+        return torch.nn.functional.softmax(outputs, dim=1).cpu()
+
+    def warm_up(
+        self,
+        batch_sizes: Sequence[int],
+        device: Union[str, None] = None,
+        runs: int = 2,
+    ) -> Dict[int, float]:
+        """
+        Runs synthetic batches of each size through the model, so lazy optimizations
+        (TorchScript profiling, frozen graph optimization) and allocations happen before
+        the first request. Returns the time of the last run per batch size in ms.
+        """
+        timings: Dict[int, float] = {}
+        for batch_size in sorted(set(batch_sizes)):
+            batch = torch.rand(batch_size, *PARAMETERS["input_shape"])
+            for _ in range(runs):
+                start = time.perf_counter()
+                self.predict_tensors(batch, device=device)
+                timings[batch_size] = (time.perf_counter() - start) * 1000
+        return timings
+
+    @staticmethod
+    def top_k(
+        probabilities: torch.Tensor, k: Union[int, None] = None
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Returns class indices and probabilities of the `k` most probable classes
+        (all classes when `k` is None) per row, sorted by probability.
+        Both tensors have shape (N, k), or (k,) for a single row.
+        """
+        if k is None or k >= probabilities.shape[-1]:
+            values, indices = torch.sort(probabilities, dim=-1, descending=True)
+        else:
+            values, indices = torch.topk(probabilities, k=k, dim=-1)
+        return indices, values
+
+    @classmethod
+    def to_class_map(
+        cls, probabilities: torch.Tensor, top_k: Union[int, None] = None
+    ) -> Dict[str, float]:
+        """
+        Maps a single row of probabilities to class names, sorted by probability.
+        Only the `top_k` most probable classes are kept, when given.
+        """
+        indices, values = cls.top_k(probabilities.squeeze(), k=top_k)
+        return {
+            DEFAULT_CLASS_NAMES[index]: value
+            for index, value in zip(indices.tolist(), values.tolist())
+        }
 
     def predict(
         self,
         img_path: Union[str, None] = None,
         file=None,
         device: Union[str, None] = None,
-    ) -> Tuple[Dict[str, float], Image.Image]:
+        top_k: Union[int, None] = None,
+        keep_original: bool = False,
+    ) -> Tuple[Dict[str, float], Union[Image.Image, None]]:
         """
         Main method to perform prediction on input image.
         You need to pass at least one of the following arguments:
          img_path or file
+        Returns the full class distribution, or only `top_k` most probable classes,
+        and the original image when `keep_original` is set.
         """
-        if img_path:
-            image = Image.open(img_path)
-        else:
-            image = Image.open(io.BytesIO(file))
-
-        user_dev = get_user_device(device)
-        self.model.to(user_dev)
+        trf_image, orig_img = self.preprocess(
+            img_path=img_path, file=file, keep_original=keep_original
+        )
+        predictions = self.predict_tensors(trf_image.unsqueeze(0), device=device)
+        return self.to_class_map(predictions[0], top_k=top_k), orig_img
 
-        orig_img = image.copy()
-        trf_image = self.img_transforms(image).to(user_dev).unsqueeze(0)
-        with torch.no_grad():
-            outputs = self.model(trf_image)
-        predictions = torch.nn.functional.softmax(outputs, dim=1)
-        pred_values = predictions.cpu().data.numpy().squeeze()
-        data = {cls: float(pred_values[i]) for i, cls in enumerate(DEFAULT_CLASS_NAMES)}
-
-        sorted_by_prob = sorted(data.items(), key=lambda x: x[1], reverse=True)
-        sorted_by_prob_map = dict(sorted_by_prob)
-        return sorted_by_prob_map, orig_img
+    def predict_batch(
+        self,
+        files: Sequence,
+        device: Union[str, None] = None,
+        batch_size: int = PARAMETERS["batch_size"],
+        top_k: Union[int, None] = None,
+    ) -> List[Dict[str, float]]:
+        """
+        Performs prediction on many images (passed as bytes), running one forward
+        pass per `batch_size` stacked images. Results keep the order of `files`.
+        """
+        results: List[Dict[str, float]] = []
+        for start in range(0, len(files), batch_size):
+            batch = self.preprocessor.preprocess(
+                [
+                    self.preprocessor.open(file=file)
+                    for file in files[start : start + batch_size]
+                ]
+            )
+            predictions = self.predict_tensors(batch, device=device)
+            indices, values = self.top_k(predictions, k=top_k)
+            results.extend(
+                {DEFAULT_CLASS_NAMES[index]: value for index, value in zip(*row)}
+                for row in zip(indices.tolist(), values.tolist())
+            )
+        return results
@@ -0,0 +1,107 @@
+import threading
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from PIL import Image
+
+from project_utils import BufferReader
+from settings import IMAGE_MAX_PIXELS, PARAMETERS
+
+# ImageNet statistics, same as the "val" transforms of ImageTransformer
+NORMALIZE_MEAN = (0.485, 0.456, 0.406)
+NORMALIZE_STD = (0.229, 0.224, 0.225)
+
+
+class ImagePreprocessor:
+    """
+    Class representation of the inference preprocessing engine, an equivalent of the
+    "val" transforms (Resize -> ToTensor -> Normalize) tuned for per-request decoding:
+
+    * JPEGs are decoded directly at a reduced scale (PIL `draft`, DCT downscaling)
+      when the target size allows it, instead of decoding full resolution and resizing,
+    * images are resized and converted to uint8 RGB tensors written into a
+      preallocated (per thread) batch buffer,
+    * ToTensor and Normalize are fused into one vectorised affine uint8 -> float op:
+      x * 1 / (255 * std) - mean / std.
+    """
+
+    def __init__(
+        self,
+        img_size: Tuple[int, int] = PARAMETERS["img_size"],
+        mean: Sequence[float] = NORMALIZE_MEAN,
+        std: Sequence[float] = NORMALIZE_STD,
+        use_draft: bool = True,
+    ) -> None:
+        """
+        :param img_size: output size in the format: (height, width)
+        :param mean: per channel mean used for normalization
+        :param std: per channel std used for normalization
+        :param use_draft: whether to let the JPEG decoder downscale (slightly
+         different pixels than a full decode + resize)
+        """
+        self.img_size = img_size
+        self.use_draft = use_draft
+        std_tensor = torch.tensor(std).view(-1, 1, 1)
+        self._scale = 1 / (255 * std_tensor)
+        self._bias = -torch.tensor(mean).view(-1, 1, 1) / std_tensor
+        self._buffers = threading.local()
+
+    @staticmethod
+    def open(img_path: Union[str, None] = None, file=None) -> Image.Image:
+        """
+        Opens the image (only the header is read) and rejects images too large to decode.
+        `file` can be any bytes-like object (e.g. a memoryview), it is decoded without copying.
+        """
+        image = Image.open(img_path) if img_path else Image.open(BufferReader(file))
+        if image.width * image.height > IMAGE_MAX_PIXELS:
+            raise ValueError(
+                f"Image size {image.width}x{image.height} exceeds {IMAGE_MAX_PIXELS} pixels."
+            )
+        return image
+
+    def decode(self, image: Image.Image, out: torch.Tensor) -> None:
+        """
+        Decodes and resizes the image into `out`, a uint8 tensor of shape (3, H, W).
+        """
+        height, width = self.img_size
+        if self.use_draft:
+            # no-op for non-JPEG or already loaded images
+            image.draft("RGB", (width, height))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if image.size != (width, height):
+            image = image.resize((width, height), Image.BILINEAR)
+        out.copy_(torch.from_numpy(np.asarray(image)).permute(2, 0, 1))
+
+    def get_buffers(self, batch_size: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Returns uint8 and float batch buffers of this thread, reallocated only when
+        a larger batch is requested.
+        """
+        buffers = getattr(self._buffers, "value", None)
+        if buffers is None or len(buffers[0]) < batch_size:
+            shape = (batch_size, 3, *self.img_size)
+            buffers = (
+                torch.empty(shape, dtype=torch.uint8),
+                torch.empty(shape, dtype=torch.float32),
+            )
+            self._buffers.value = buffers
+        return buffers[0][:batch_size], buffers[1][:batch_size]
+
+    def normalize(self, pixels: torch.Tensor, out: torch.Tensor) -> torch.Tensor:
+        """
+        Fused ToTensor + Normalize of uint8 `pixels` into float `out` (same shape).
+        """
+        out.copy_(pixels)
+        return torch.addcmul(self._bias, out, self._scale, out=out)
+
+    def preprocess(self, images: Sequence[Image.Image]) -> torch.Tensor:
+        """
+        Returns the (N, C, H, W) input batch. The batch is backed by a buffer reused
+        by the next call from the same thread, clone it to keep it longer.
+        """
+        pixels, batch = self.get_buffers(len(images))
+        for image, out in zip(images, pixels):
+            self.decode(image, out)
+        return self.normalize(pixels, batch)
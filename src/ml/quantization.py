@@ -0,0 +1,148 @@
+import copy
+import statistics
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import torch
+import torch.nn as nn
+from torch.ao.quantization import (
+    default_dynamic_qconfig,
+    get_default_qconfig_mapping,
+    quantize_dynamic,
+)
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+from torch.utils.data import DataLoader, Dataset
+
+from ml.models.classifiers import MultiClassClassificationModel
+from settings import PARAMETERS
+
+QUANTIZATION_MODES = ("dynamic", "static")
+
+
+class TransformedSubset(Dataset):
+    """
+    Selected samples of a dataset returning raw images (e.g. `DatasetFromSubset.subset`),
+    with `transform` applied - used to calibrate on training images with validation transforms.
+    """
+
+    def __init__(self, dataset: Dataset, indices: Sequence[int], transform) -> None:
+        self.dataset = dataset
+        self.indices = indices
+        self.transform = transform
+
+    def __getitem__(self, index):
+        x, y = self.dataset[self.indices[index]]
+        return self.transform(x), y
+
+    def __len__(self):
+        return len(self.indices)
+
+
+def quantize_dynamic_head(model: MultiClassClassificationModel) -> nn.Module:
+    """
+    Returns a copy of the model with Linear layers of the head (`get_head`) quantized
+    dynamically to INT8: weights are stored quantized, activations are quantized on the fly.
+    """
+    return quantize_dynamic(
+        copy.deepcopy(model).eval(),
+        qconfig_spec={f"model.{model.output_layer_name}": default_dynamic_qconfig},
+        dtype=torch.qint8,
+    )
+
+
+def quantize_static(
+    model: MultiClassClassificationModel,
+    calibration_batches: Iterable[torch.Tensor],
+    backend: str = "x86",
+) -> nn.Module:
+    """
+    Post-training static quantization of the backbone (FX graph mode) with activation
+    ranges observed on `calibration_batches`. The head is quantized dynamically.
+    """
+    torch.backends.quantized.engine = backend
+    qconfig_mapping = get_default_qconfig_mapping(backend).set_module_name(
+        f"model.{model.output_layer_name}", default_dynamic_qconfig
+    )
+    example_inputs = (torch.rand(1, *PARAMETERS["input_shape"]),)
+    prepared = prepare_fx(copy.deepcopy(model).eval(), qconfig_mapping, example_inputs)
+
+    with torch.no_grad():
+        for batch in calibration_batches:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def save_quantized_model(model: nn.Module, path: str) -> None:
+    """
+    Saves the quantized model as TorchScript, loadable by
+    `ImagePredictor(model_path=path, as_state_dict=False)`.
+    """
+    example_inputs = torch.rand(1, *PARAMETERS["input_shape"])
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example_inputs)
+    torch.jit.save(scripted, path)
+
+
+def evaluate_accuracy(model: nn.Module, data_loader: DataLoader) -> float:
+    """
+    Top-1 accuracy of the model on cpu.
+    """
+    correct, total = 0, 0
+    with torch.no_grad():
+        for inputs, labels in data_loader:
+            outputs = model(inputs)
+            correct += int((outputs.argmax(dim=1) == labels).sum())
+            total += len(labels)
+    return correct / total if total else 0.0
+
+
+def measure_latency(
+    model: nn.Module, batch_size: int, runs: int = 20, warmup: int = 3
+) -> float:
+    """
+    Median latency of a forward pass on cpu in milliseconds.
+    """
+    batch = torch.rand(batch_size, *PARAMETERS["input_shape"])
+    timings: List[float] = []
+    with torch.no_grad():
+        for run in range(warmup + runs):
+            start = time.perf_counter()
+            model(batch)
+            if run >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def get_model_size(model: nn.Module) -> int:
+    """
+    Size of the model state dict in bytes (quantized weights included).
+    """
+    return sum(
+        value.numel() * value.element_size()
+        for value in model.state_dict().values()
+        if isinstance(value, torch.Tensor)
+    )
+
+
+def compare_models(
+    models: Dict[str, nn.Module],
+    eval_loader: Union[DataLoader, None],
+    batch_sizes: Tuple[int, ...] = (1, 32),
+) -> List[Dict[str, Union[str, float, None]]]:
+    """
+    Accuracy-vs-latency report: top-1 accuracy (when `eval_loader` is given),
+    median latency per batch size and state dict size of each model.
+    """
+    report = []
+    for name, model in models.items():
+        record: Dict[str, Union[str, float, None]] = {
+            "model": name,
+            "accuracy": evaluate_accuracy(model, eval_loader) if eval_loader else None,
+            "size_mb": get_model_size(model) / 1024**2,
+        }
+        for batch_size in batch_sizes:
+            latency = measure_latency(model, batch_size)
+            record[f"latency_ms_batch_{batch_size}"] = latency
+            record[f"latency_ms_per_image_batch_{batch_size}"] = latency / batch_size
+        report.append(record)
+    return report
@@ -0,0 +1,95 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Union
+
+import torch
+
+from settings import (
+    INFERENCE_INTEROP_THREADS,
+    INFERENCE_NUM_THREADS,
+    INFERENCE_PIN_CPUS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InferenceRuntimeConfig:
+    cpus: List[int]
+    intra_op_threads: int
+    inter_op_threads: int
+    pinned: bool
+
+
+def get_available_cpus() -> List[int]:
+    """
+    CPUs this process may run on (respects container cpusets).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cpus(cpus: List[int], num_partitions: int, index: int) -> List[int]:
+    """
+    Splits `cpus` into `num_partitions` contiguous, disjoint chunks (sizes differ by
+    at most one) and returns chunk `index`. With more partitions than cpus,
+    partitions share cpus round-robin.
+    """
+    if num_partitions < 1:
+        raise ValueError("num_partitions must be a positive integer")
+    index %= num_partitions
+    if num_partitions >= len(cpus):
+        return [cpus[index % len(cpus)]]
+
+    size, remainder = divmod(len(cpus), num_partitions)
+    start = index * size + min(index, remainder)
+    return cpus[start : start + size + (index < remainder)]
+
+
+def configure_inference_runtime(
+    process_index: Union[int, None] = None,
+    num_processes: int = 1,
+    intra_op_threads: int = INFERENCE_NUM_THREADS,
+    inter_op_threads: int = INFERENCE_INTEROP_THREADS,
+    pin: bool = INFERENCE_PIN_CPUS,
+) -> InferenceRuntimeConfig:
+    """
+    Configures torch threading of an inference process, so several processes
+    on one machine do not oversubscribe cores.
+
+    :param process_index: index of this process among `num_processes` workers,
+     None when the process uses all available cpus
+    :param num_processes: number of inference processes sharing the machine
+    :param intra_op_threads: threads per operator, 0 - one per cpu of the partition
+    :param inter_op_threads: threads running independent operators in parallel
+    :param pin: whether to pin the process to its cpu partition
+    """
+    cpus = get_available_cpus()
+    if process_index is not None:
+        cpus = partition_cpus(cpus, num_processes, process_index)
+
+    pinned = False
+    if pin and process_index is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        pinned = True
+
+    intra_op_threads = intra_op_threads or len(cpus)
+    torch.set_num_threads(intra_op_threads)
+    try:
+        torch.set_num_interop_threads(inter_op_threads)
+    except RuntimeError:
+        # can only be set once, before any inter-op parallel work started
+        logger.warning(
+            "Inter-op threads already initialized, keeping %d",
+            torch.get_num_interop_threads(),
+        )
+        inter_op_threads = torch.get_num_interop_threads()
+
+    return InferenceRuntimeConfig(
+        cpus=cpus,
+        intra_op_threads=intra_op_threads,
+        inter_op_threads=inter_op_threads,
+        pinned=pinned,
+    )
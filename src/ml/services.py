@@ -6,7 +6,7 @@ import torch
 from pydantic import Json
 
 from ml.models.classifiers import MultiClassClassificationModel
-from settings import DEFAULT_CLASS_NAMES, PRETRAINED_MODELS
+from settings import DEFAULT_CLASS_NAMES
 
 plt.style.use("ggplot")
 
@@ -20,6 +20,8 @@ def get_default_model(
     returns model instance according to passed arguments
     :return:
     """
+    # resolving PRETRAINED_MODELS imports torchvision model constructors
+    from settings import PRETRAINED_MODELS
 
     classifier = MultiClassClassificationModel(
         base_model=PRETRAINED_MODELS[base_model]["model"],
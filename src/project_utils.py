@@ -1,9 +1,8 @@
 import base64
+import io
 import os
 from typing import Any, Union
 
-import torch
-
 
 def get_labels(path_to_dataset):
     class2label = {}
@@ -15,6 +14,9 @@ def get_labels(path_to_dataset):
 
 
 def get_default_device():
+    # torch is imported on demand, so modules using only the helpers below stay light
+    import torch
+
     if torch.cuda.is_available():
         return torch.device("cuda:0")
     elif torch.__version__.startswith("2"):
@@ -26,6 +28,8 @@ def get_default_device():
 
 
 def get_user_device(device: Union[str, Any]):
+    import torch
+
     available_devices = {"cpu": torch.device("cpu")}
     if torch.cuda.is_available():
         available_devices["gpu"] = torch.device("cuda:0")
@@ -60,3 +64,50 @@ def encode_decode_img(img: Any, serialize: bool = True, encoding: str = "utf-8")
     else:
         img = img.encode(encoding=encoding)
         return base64.b64decode(img)
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a bytes-like buffer.
+    Unlike io.BytesIO it never copies the whole buffer (e.g. a memoryview
+    of a memory-mapped file), only the chunks that are actually read.
+    """
+
+    def __init__(self, buffer) -> None:
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self._view[self._position : self._position + len(b)]
+        size = len(chunk)
+        b[:size] = chunk
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence value: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
@@ -0,0 +1,95 @@
+import argparse
+
+import torch
+
+from ml.predictors import ImagePredictor  # type: ignore
+from settings import (  # type: ignore
+    DEFAULT_MODEL_LOC,
+    DEFAULT_ONNX_MODEL_LOC,
+    PARAMETERS,
+)
+
+
+def check_parity(model: torch.nn.Module, onnx_path: str, batch_size: int) -> float:
+    """
+    Compares softmax outputs of the exported ONNX model with the original model
+    on a random batch, returns the maximum absolute difference.
+    """
+    import onnxruntime as ort
+
+    batch = torch.rand(batch_size, *PARAMETERS["input_shape"])
+    with torch.no_grad():
+        expected = torch.softmax(model(batch), dim=1)
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    (outputs,) = session.run(None, {session.get_inputs()[0].name: batch.numpy()})
+    return float(
+        (torch.softmax(torch.from_numpy(outputs), dim=1) - expected).abs().max()
+    )
+
+
+def main():
+    model = ImagePredictor.load_model(
+        model_path=args["model_path"], as_state_dict=args["as_state_dict"]
+    ).to("cpu")
+
+    torch.onnx.export(
+        model,
+        torch.rand(1, *PARAMETERS["input_shape"]),
+        args["output"],
+        opset_version=args["opset"],
+        input_names=["images"],
+        output_names=["logits"],
+        # batch size is chosen at inference time
+        dynamic_axes={"images": {0: "batch"}, "logits": {0: "batch"}},
+    )
+    print(f"Model exported to {args['output']}")
+
+    if args["check"]:
+        max_diff = check_parity(model, args["output"], batch_size=4)
+        print(f"Max absolute difference of probabilities: {max_diff:.2e}")
+        if max_diff > args["tolerance"]:
+            raise SystemExit(
+                f"Parity check failed: {max_diff:.2e} > {args['tolerance']}"
+            )
+
+
+if __name__ == "__main__":
+    # construct the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--model-path",
+        type=str,
+        default=DEFAULT_MODEL_LOC,
+        dest="model_path",
+        help="Full path to the saved model file.",
+    )
+    parser.add_argument(
+        "--state-dict",
+        action="store_true",
+        dest="as_state_dict",
+        help="The saved model is a state dict of the default model.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=DEFAULT_ONNX_MODEL_LOC,
+        help="Path of the exported .onnx model.",
+    )
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Compare outputs of the exported model with the original one.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1e-4,
+        help="Maximum accepted difference of probabilities in the parity check.",
+    )
+    args = vars(parser.parse_args())
+
+    main()
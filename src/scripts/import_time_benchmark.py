@@ -0,0 +1,72 @@
+"""
+Measures cold-start import time of project modules, each run in a fresh interpreter.
+
+`--eager` additionally resolves all lazy settings right after the import, which
+reproduces the cost paid when settings were built at import time, e.g.:
+
+    python src/scripts/import_time_benchmark.py -m settings backend.app.app.main
+    python src/scripts/import_time_benchmark.py -m settings backend.app.app.main --eager
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MEASURE_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+if {eager}:
+    import settings
+    settings.DEFAULT_CLASS_NAMES, settings.NUM_CLASSES, settings.DEFAULT_TEST_SAMPLE_GT
+    settings.PRETRAINED_MODELS
+    for key in ("device", "criterion", "optim_fcn"):
+        settings.PARAMETERS[key]
+print(json.dumps({{"seconds": time.perf_counter() - start, "torch": "torch" in sys.modules}}))
+"""
+
+
+def measure(module: str, eager: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_CODE.format(module=module, eager=eager)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    # the measurement is the last line, anything imported modules print comes before
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'module':<30} {'median [ms]':>12} {'min [ms]':>10} {'torch':>6}")
+    for module in args["modules"]:
+        results = [measure(module, args["eager"]) for _ in range(args["repeat"])]
+        seconds = [result["seconds"] for result in results]
+        print(
+            f"{module:<30} {statistics.median(seconds) * 1000:>12.1f}"
+            f" {min(seconds) * 1000:>10.1f} {str(results[-1]['torch']):>6}"
+        )
+
+
+if __name__ == "__main__":
+    # construct the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--modules",
+        nargs="+",
+        default=["settings", "backend.app.app.main"],
+        help="Modules to import.",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="Fresh interpreters per module."
+    )
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="Resolve all lazy settings after the import.",
+    )
+    args = vars(parser.parse_args())
+
+    main()
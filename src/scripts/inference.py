@@ -15,7 +15,7 @@ from settings import (  # type: ignore
 def main():
     predictor = ImagePredictor(model_path=args["model_path"], as_state_dict=False)
 
-    preds, img = predictor.predict(img_path=args["image_path"])
+    preds, img = predictor.predict(img_path=args["image_path"], keep_original=True)
     predicted_class = list(preds.keys())[0]
 
     if DEFAULT_TEST_SAMPLE_GT == predicted_class:
@@ -0,0 +1,123 @@
+"""
+Measures login latency of a running API under concurrent load, and the latency
+of GET /health sent during the logins (requests stalled by a blocked event loop), e.g.:
+
+    python src/scripts/login_benchmark.py --url http://fastapi.localhost \
+        --email admin@admin.com --password admin --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pandas as pd
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] * 1000
+
+
+async def login_worker(
+    client: httpx.AsyncClient, logins: int, latencies: List[float]
+) -> None:
+    credentials = {"email": args["email"], "password": args["password"]}
+    for _ in range(logins):
+        start = time.perf_counter()
+        response = await client.post(f"{args['url']}/api/v1/login", json=credentials)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def health_probe(
+    client: httpx.AsyncClient, done: asyncio.Event, latencies: List[float]
+) -> None:
+    while not done.is_set():
+        start = time.perf_counter()
+        await client.get(f"{args['url']}/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(args["probe_interval"])
+
+
+async def run_level(concurrency: int) -> dict:
+    login_latencies: List[float] = []
+    health_latencies: List[float] = []
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        done = asyncio.Event()
+        probe = asyncio.create_task(health_probe(client, done, health_latencies))
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                login_worker(client, args["logins"], login_latencies)
+                for _ in range(concurrency)
+            ]
+        )
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe
+
+    return {
+        "concurrency": concurrency,
+        "logins_per_s": len(login_latencies) / elapsed,
+        "login_p50_ms": percentile(login_latencies, 0.5),
+        "login_p95_ms": percentile(login_latencies, 0.95),
+        "login_max_ms": max(login_latencies) * 1000,
+        "health_p50_ms": percentile(health_latencies, 0.5),
+        "health_p95_ms": percentile(health_latencies, 0.95),
+    }
+
+
+async def main():
+    report: List[dict] = []
+    for concurrency in args["concurrency"]:
+        report.append(await run_level(concurrency))
+        print(report[-1])
+
+    report_df = pd.DataFrame(report)
+    print(report_df.to_string(index=False))
+    if args["report"]:
+        report_df.to_csv(args["report"], index=False)
+
+
+if __name__ == "__main__":
+    # construct the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-u",
+        "--url",
+        type=str,
+        default="http://fastapi.localhost",
+        help="Base url of the API.",
+    )
+    parser.add_argument(
+        "--email", type=str, required=True, help="Email of an existing user."
+    )
+    parser.add_argument(
+        "--password", type=str, required=True, help="Password of the user."
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        nargs="+",
+        type=int,
+        default=[1, 8, 32],
+        help="Concurrent clients logging in, one run per value.",
+    )
+    parser.add_argument(
+        "-n", "--logins", type=int, default=10, help="Logins sent by each client."
+    )
+    parser.add_argument(
+        "--probe-interval",
+        type=float,
+        default=0.05,
+        dest="probe_interval",
+        help="Seconds between health requests sent during the logins.",
+    )
+    parser.add_argument(
+        "--report", type=str, default=None, help="Optional csv report path."
+    )
+    args = vars(parser.parse_args())
+
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Compares decode + preprocess time per image of the previous inference path
+(Image.open -> copy -> "val" Compose -> stack) with ImagePreprocessor, e.g.:
+
+    python src/scripts/preprocessing_benchmark.py --images "dataset/*/*.jpg" --limit 256
+"""
+import argparse
+import glob
+import time
+from typing import Callable, List
+
+import pandas as pd
+import torch
+
+from ml.data_managers import ImageTransformer
+from ml.preprocessing import ImagePreprocessor
+from settings import PARAMETERS, RESOURCES_DIR  # type: ignore
+
+
+def run_baseline(files: List[bytes]) -> torch.Tensor:
+    transforms = ImageTransformer.get_image_transforms(
+        PARAMETERS["img_size"], phase="val"
+    )
+    tensors = []
+    for file in files:
+        image = ImagePreprocessor.open(file=file)
+        image.copy()
+        tensors.append(transforms(image))
+    return torch.stack(tensors)
+
+
+def get_preprocessor_runner(use_draft: bool) -> Callable[[List[bytes]], torch.Tensor]:
+    preprocessor = ImagePreprocessor(use_draft=use_draft)
+
+    def run(files: List[bytes]) -> torch.Tensor:
+        return preprocessor.preprocess([preprocessor.open(file=file) for file in files])
+
+    return run
+
+
+def measure(run: Callable[[List[bytes]], torch.Tensor], files: List[bytes]) -> float:
+    """
+    Median time per image in microseconds.
+    """
+    run(files[: args["batch"]])
+    timings = []
+    for _ in range(args["repeat"]):
+        start = time.perf_counter()
+        for i in range(0, len(files), args["batch"]):
+            run(files[i : i + args["batch"]])
+        timings.append((time.perf_counter() - start) / len(files) * 1e6)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    paths = sorted(glob.glob(args["images"]))[: args["limit"]]
+    if not paths:
+        raise SystemExit(f"No images found: {args['images']}")
+    files = []
+    for path in paths:
+        with open(path, "rb") as f:
+            files.append(f.read())
+
+    runners = {
+        "open + copy + Compose (before)": run_baseline,
+        "ImagePreprocessor, full decode": get_preprocessor_runner(use_draft=False),
+        "ImagePreprocessor, draft decode (after)": get_preprocessor_runner(
+            use_draft=True
+        ),
+    }
+    report = pd.DataFrame(
+        [
+            {"path": name, "us_per_image": measure(run, files)}
+            for name, run in runners.items()
+        ]
+    )
+    print(
+        f"{len(files)} images, batch size {args['batch']}, "
+        f"torch threads {torch.get_num_threads()}"
+    )
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    # construct the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-i",
+        "--images",
+        type=str,
+        default=f"{RESOURCES_DIR}/test_resources/*.jpg",
+        help="Glob of the benchmark images.",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=256, help="Maximum number of images."
+    )
+    parser.add_argument("-bs", "--batch", type=int, default=16, help="Batch size")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Measured runs.")
+    args = vars(parser.parse_args())
+
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import random
+
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, Subset
+
+from ml.data_managers import DatasetCollector
+from ml.quantization import (
+    QUANTIZATION_MODES,
+    TransformedSubset,
+    compare_models,
+    quantize_dynamic_head,
+    quantize_static,
+    save_quantized_model,
+)
+from ml.services import get_default_model
+from settings import (
+    DATA_DIR,
+    DEFAULT_MODEL_STATE_DICT_LOC,
+    DEFAULT_QUANTIZATION_REPORT,
+    DEFAULT_QUANTIZED_MODEL_LOC,
+    NUM_CLASSES,
+    PARAMETERS,
+)
+
+
+def get_data_loaders(seed: int = 1234):
+    """
+    returns calibration loader (training images with validation transforms)
+    and evaluation loader (validation images)
+    """
+    collector = DatasetCollector(
+        img_size=PARAMETERS["img_size"],
+        batch_size=args["batch"],
+        data_root=DATA_DIR,
+        organize=True,
+        split_ratio=[0.8, 0.2],
+    )
+    train, val = collector.datasets["train"], collector.datasets["val"]
+
+    rng = random.Random(seed)
+    calibration_indices = rng.sample(
+        range(len(train)), min(args["calibration_size"], len(train))
+    )
+    calibration_loader = DataLoader(
+        TransformedSubset(
+            train.subset, calibration_indices, transform=collector.transforms["val"]
+        ),
+        batch_size=args["batch"],
+        num_workers=4,
+    )
+    eval_indices = rng.sample(range(len(val)), min(args["eval_size"], len(val)))
+    eval_loader = DataLoader(
+        Subset(val, eval_indices), batch_size=args["batch"], num_workers=4
+    )
+    return calibration_loader, eval_loader
+
+
+def main():
+    torch.manual_seed(1234)
+    model = get_default_model(
+        base_model=args["model"], apply_head=args["apply_head"], num_classes=NUM_CLASSES
+    )
+    model.load_state_dict(torch.load(args["model_path"], map_location="cpu"))
+    model.to("cpu").eval()
+
+    calibration_loader, eval_loader = get_data_loaders()
+
+    models = {"float": model, "dynamic": quantize_dynamic_head(model)}
+    if args["mode"] == "static" or args["compare_all"]:
+        models["static"] = quantize_static(
+            model, (inputs for inputs, _ in calibration_loader)
+        )
+
+    save_quantized_model(models[args["mode"]], args["output"])
+    print(f"Quantized ({args['mode']}) model saved to {args['output']}")
+
+    report = pd.DataFrame(compare_models(models, eval_loader))
+    report.to_csv(args["report"], index=False)
+    print(report.to_string(index=False))
+    print(f"Report saved to {args['report']}")
+
+
+if __name__ == "__main__":
+    # construct the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--model-path",
+        type=str,
+        default=DEFAULT_MODEL_STATE_DICT_LOC,
+        dest="model_path",
+        help="Full path to the saved model state dict.",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="EfficientNet",
+        help="Base model of the saved state dict: 'EfficientNet' or 'ResNet'",
+    )
+    parser.add_argument(
+        "--no-head",
+        action="store_false",
+        dest="apply_head",
+        help="The saved model has a single output layer instead of the head model.",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=QUANTIZATION_MODES,
+        default="static",
+        help="dynamic: INT8 head only, static: INT8 backbone (calibrated) and head",
+    )
+    parser.add_argument(
+        "--compare-all",
+        action="store_true",
+        help="Report all quantization modes, not only the saved one.",
+    )
+    parser.add_argument(
+        "--calibration-size",
+        type=int,
+        default=512,
+        help="Number of training images used for calibration.",
+    )
+    parser.add_argument(
+        "--eval-size",
+        type=int,
+        default=2000,
+        help="Number of validation images used to measure accuracy.",
+    )
+    parser.add_argument("-bs", "--batch", type=int, default=32, help="Batch size")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=DEFAULT_QUANTIZED_MODEL_LOC,
+        help="Path of the quantized TorchScript model.",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=DEFAULT_QUANTIZATION_REPORT,
+        help="Path of the accuracy-vs-latency report (csv).",
+    )
+    args = vars(parser.parse_args())
+
+    main()
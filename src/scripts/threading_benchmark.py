@@ -0,0 +1,114 @@
+"""
+Measures inference throughput of the default model for several core layouts:
+N worker processes, each pinned to its share of the available cores with
+the given number of intra-op threads (0 - one per core of the share), e.g.:
+
+    python src/scripts/threading_benchmark.py --layouts 1x0 2x0 4x0 8x1 8x4
+"""
+import argparse
+import multiprocessing as mp
+import time
+from typing import List, Tuple
+
+import pandas as pd
+import torch
+
+from ml.predictors import ImagePredictor  # type: ignore
+from ml.runtime import configure_inference_runtime, get_available_cpus
+from settings import INFERENCE_MODEL_LOC, PARAMETERS  # type: ignore
+
+
+def parse_layout(layout: str) -> Tuple[int, int]:
+    processes, threads = layout.lower().split("x")
+    return int(processes), int(threads)
+
+
+def run_worker(
+    index: int, processes: int, threads: int, options: dict, start, results
+) -> None:
+    # spawned processes do not see the parsed arguments, options are passed explicitly
+    runtime = configure_inference_runtime(
+        process_index=index, num_processes=processes, intra_op_threads=threads
+    )
+    predictor = ImagePredictor(model_path=options["model_path"], as_state_dict=False)
+    batch = torch.rand(options["batch"], *PARAMETERS["input_shape"])
+    # warm-up outside of the measured window
+    predictor.predict_tensors(batch, device="cpu")
+
+    start.wait()
+    images = 0
+    deadline = time.perf_counter() + options["duration"]
+    while time.perf_counter() < deadline:
+        predictor.predict_tensors(batch, device="cpu")
+        images += len(batch)
+    results.put((images, runtime.intra_op_threads))
+
+
+def run_layout(processes: int, threads: int) -> dict:
+    ctx = mp.get_context("spawn")
+    start, results = ctx.Barrier(processes), ctx.Queue()
+    workers = [
+        ctx.Process(
+            target=run_worker,
+            args=(index, processes, threads, args, start, results),
+        )
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    cores = len(get_available_cpus())
+    throughput = sum(images for images, _ in outcomes) / args["duration"]
+    return {
+        "processes": processes,
+        "intra_op_threads": outcomes[0][1],
+        "images_per_s": throughput,
+        "images_per_s_per_core": throughput / cores,
+    }
+
+
+def main():
+    print(f"Available cores: {len(get_available_cpus())}, batch size: {args['batch']}")
+    report: List[dict] = []
+    for layout in args["layouts"]:
+        processes, threads = parse_layout(layout)
+        report.append(run_layout(processes, threads))
+        print(report[-1])
+
+    report_df = pd.DataFrame(report)
+    print(report_df.to_string(index=False))
+    if args["report"]:
+        report_df.to_csv(args["report"], index=False)
+
+
+if __name__ == "__main__":
+    # construct the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-l",
+        "--layouts",
+        nargs="+",
+        default=["1x0", "2x0", "4x0"],
+        help="Core layouts as <processes>x<threads per process>.",
+    )
+    parser.add_argument(
+        "-m",
+        "--model-path",
+        type=str,
+        default=INFERENCE_MODEL_LOC,
+        dest="model_path",
+        help="Full path to the saved (TorchScript) model file.",
+    )
+    parser.add_argument("-bs", "--batch", type=int, default=8, help="Batch size")
+    parser.add_argument(
+        "-d", "--duration", type=float, default=20, help="Seconds measured per layout."
+    )
+    parser.add_argument(
+        "--report", type=str, default=None, help="Optional csv report path."
+    )
+    args = vars(parser.parse_args())
+
+    main()
@@ -1,15 +1,23 @@
-import os
+"""
+Project settings.
 
-from torch.nn import CrossEntropyLoss
-from torch.optim import Adam
-from torchvision.models import (
-    EfficientNet_V2_S_Weights,
-    ResNet18_Weights,
-    efficientnet_v2_s,
-    resnet18,
-)
+Plain constants are defined at import time. Objects that are expensive to build
+(torch/torchvision objects, device probing, label discovery) are resolved on first
+access, so importing this module does not import torch - e.g. API processes that
+never run the model start faster:
 
-from project_utils import get_labels, get_user_device
+* ``DEFAULT_CLASS_NAMES``, ``NUM_CLASSES``, ``DEFAULT_TEST_SAMPLE_GT`` and
+  ``PRETRAINED_MODELS`` through the module ``__getattr__`` (PEP 562),
+* ``PARAMETERS["device"]``, ``PARAMETERS["criterion"]`` and ``PARAMETERS["optim_fcn"]``
+  through ``LazyParameters``.
+
+Resolved values are cached, so each of them is built at most once per process.
+"""
+import os
+import sys
+from typing import Any, Callable, Dict, List
+
+from project_utils import get_labels
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if PROJECT_ROOT == "/":
@@ -25,27 +33,6 @@ LABELS_FILE = os.path.join(RESOURCES_DIR, "labels.txt")
 TRAIN_DIR = os.path.join(PROJECT_ROOT, "../data/train")
 VAL_DIR = os.path.join(PROJECT_ROOT, "../data/val")
 
-# DATASET STRUCTURE
-# created under condition, only for github-workflow purposes (no dataset repo on GitHub)
-if os.path.exists(LABELS_FILE):
-    with open(LABELS_FILE, "r") as f:
-        DEFAULT_CLASS_NAMES = f.read().splitlines()
-elif os.path.exists(ANNOTATIONS_DIR):
-    DEFAULT_CLASS_NAMES = list(
-        dict(sorted(get_labels(ANNOTATIONS_DIR).items())).values()
-    )
-    DEFAULT_TEST_SAMPLE_GT = get_labels(ANNOTATIONS_DIR)["n02099601-golden_retriever"]
-
-    with open(f"{RESOURCES_DIR}/labels.txt", "w") as f:
-        for label in DEFAULT_CLASS_NAMES:
-            f.write(label)
-            f.write("\n")
-else:
-    DEFAULT_CLASS_NAMES = [""]
-    DEFAULT_TEST_SAMPLE_GT = "Golden_Retriever"
-
-NUM_CLASSES = len(DEFAULT_CLASS_NAMES)
-
 DATA_SPLIT = ["train", "val"]
 DATA_DIR_LOC = [TRAIN_DIR, VAL_DIR]
 DATA_DIR_STRUCT = {phase: path for phase, path in zip(DATA_SPLIT, DATA_DIR_LOC)}
@@ -65,29 +52,184 @@ DEFAULT_MODEL_LOC = os.path.join(
     "EfficientNet_batch_64_epochs_10_apply_head_True_model_complete.pt",
 )
 
+DEFAULT_MODEL_STATE_DICT_LOC = os.path.join(
+    DEFAULT_SAVE_MODEL_DIR,
+    "EfficientNet_batch_64_epochs_10_apply_head_True_model_state_dict.pt",
+)
+
+# ONNX export of the default model, see scripts/export_model.py
+DEFAULT_ONNX_MODEL_LOC = os.path.splitext(DEFAULT_MODEL_LOC)[0] + ".onnx"
+
+# INT8 quantized default model (TorchScript, cpu only), see scripts/quantize_model.py
+DEFAULT_QUANTIZED_MODEL_LOC = os.path.splitext(DEFAULT_MODEL_LOC)[0] + "_quantized.pt"
+DEFAULT_QUANTIZATION_REPORT = os.path.join(
+    DEFAULT_TRAINING_HISTORY_DIR, "quantization_report.csv"
+)
+
 DEFAULT_TRAINING_HISTORY_SAMPLE = os.path.join(
     DEFAULT_TRAINING_HISTORY_DIR,
     "EfficientNet_batch_64_epochs_10_apply_head_True_history_.csv",
 )
 
-# Project parameters
-PARAMETERS = {
-    "input_shape": (3, 224, 224),
-    "img_size": (224, 224),
-    "channels": 3,
-    "batch_size": 64,
-    "epochs": 10,
-    "device": get_user_device("mps"),
-    "criterion": CrossEntropyLoss(),
-    "F_score_threshold": 0.4,
-    "optim_fcn": Adam,
-    "lr": 10e-4,
-}
 
-PRETRAINED_MODELS = {
-    "EfficientNet": {
-        "model": efficientnet_v2_s,
-        "weights": EfficientNet_V2_S_Weights.DEFAULT,
+def _get_device():
+    from project_utils import get_user_device
+
+    return get_user_device("mps")
+
+
+def _get_criterion():
+    from torch.nn import CrossEntropyLoss
+
+    return CrossEntropyLoss()
+
+
+def _get_optim_fcn():
+    from torch.optim import Adam
+
+    return Adam
+
+
+class LazyParameters(dict):
+    """
+    Dictionary of project parameters where values of `factories` are built on first lookup.
+    """
+
+    def __init__(self, values: Dict[str, Any], factories: Dict[str, Callable[[], Any]]):
+        super().__init__(values)
+        self._factories = factories
+
+    def __missing__(self, key: str) -> Any:
+        if key not in self._factories:
+            raise KeyError(key)
+        value = self[key] = self._factories[key]()
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return super().__contains__(key) or key in self._factories
+
+
+# Project parameters
+PARAMETERS = LazyParameters(
+    {
+        "input_shape": (3, 224, 224),
+        "img_size": (224, 224),
+        "channels": 3,
+        "batch_size": 64,
+        "epochs": 10,
+        "F_score_threshold": 0.4,
+        "lr": 10e-4,
+    },
+    factories={
+        "device": _get_device,
+        "criterion": _get_criterion,
+        "optim_fcn": _get_optim_fcn,
     },
-    "ResNet": {"model": resnet18, "weights": ResNet18_Weights.DEFAULT},
+)
+
+# Upper bound of decoded image size (width * height) accepted for inference
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 40_000_000))
+
+# Inference micro-batching: concurrent predict() calls are collected for up to
+# INFERENCE_MAX_WAIT_MS or until INFERENCE_MAX_BATCH_SIZE images are pending
+INFERENCE_MICRO_BATCHING = os.getenv("INFERENCE_MICRO_BATCHING", "0") == "1"
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 16))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 5))
+# seconds a queued request waits for its forward pass before giving up
+INFERENCE_RESULT_TIMEOUT_S = float(os.getenv("INFERENCE_RESULT_TIMEOUT_S", 60))
+
+# Batch sizes run through the model at startup, so the first requests do not pay
+# lazy optimization and allocation costs (empty disables the warm-up)
+INFERENCE_WARMUP_BATCH_SIZES = [
+    int(size)
+    for size in os.getenv(
+        "INFERENCE_WARMUP_BATCH_SIZES",
+        f"1,{INFERENCE_MAX_BATCH_SIZE},{PARAMETERS['batch_size']}",
+    ).split(",")
+    if size.strip()
+]
+
+# Inference backend of ImagePredictor: "torch" (eager / plain TorchScript),
+# "torchscript" (frozen and optimized for CPU) or "onnxruntime" (exported ONNX model)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+
+# Model used for serving predictions: the exported ONNX model for "onnxruntime",
+# the INT8 quantized model when INFERENCE_QUANTIZED=1, the default model otherwise
+INFERENCE_QUANTIZED = os.getenv("INFERENCE_QUANTIZED", "0") == "1"
+if INFERENCE_BACKEND == "onnxruntime":
+    INFERENCE_MODEL_LOC = DEFAULT_ONNX_MODEL_LOC
+elif INFERENCE_QUANTIZED:
+    INFERENCE_MODEL_LOC = DEFAULT_QUANTIZED_MODEL_LOC
+else:
+    INFERENCE_MODEL_LOC = DEFAULT_MODEL_LOC
+INFERENCE_MODEL_LOC = os.getenv("INFERENCE_MODEL_LOC", INFERENCE_MODEL_LOC)
+
+# Threading of inference processes: cores are partitioned between worker processes,
+# INFERENCE_NUM_THREADS=0 uses one intra-op thread per core of the partition
+INFERENCE_NUM_THREADS = int(os.getenv("INFERENCE_NUM_THREADS", 0))
+INFERENCE_INTEROP_THREADS = int(os.getenv("INFERENCE_INTEROP_THREADS", 1))
+INFERENCE_PIN_CPUS = os.getenv("INFERENCE_PIN_CPUS", "1") == "1"
+
+
+# DATASET STRUCTURE
+def _get_class_names() -> List[str]:
+    # created under condition, only for github-workflow purposes (no dataset repo on GitHub)
+    if os.path.exists(LABELS_FILE):
+        with open(LABELS_FILE, "r") as f:
+            return f.read().splitlines()
+    elif os.path.exists(ANNOTATIONS_DIR):
+        class_names = list(dict(sorted(get_labels(ANNOTATIONS_DIR).items())).values())
+
+        with open(f"{RESOURCES_DIR}/labels.txt", "w") as f:
+            for label in class_names:
+                f.write(label)
+                f.write("\n")
+        return class_names
+    return [""]
+
+
+def _get_num_classes() -> int:
+    return len(sys.modules[__name__].DEFAULT_CLASS_NAMES)
+
+
+def _get_test_sample_gt() -> str:
+    if os.path.exists(ANNOTATIONS_DIR):
+        return get_labels(ANNOTATIONS_DIR)["n02099601-golden_retriever"]
+    return "Golden_Retriever"
+
+
+def _get_pretrained_models() -> Dict[str, Dict[str, Any]]:
+    from torchvision.models import (
+        EfficientNet_V2_S_Weights,
+        ResNet18_Weights,
+        efficientnet_v2_s,
+        resnet18,
+    )
+
+    return {
+        "EfficientNet": {
+            "model": efficientnet_v2_s,
+            "weights": EfficientNet_V2_S_Weights.DEFAULT,
+        },
+        "ResNet": {"model": resnet18, "weights": ResNet18_Weights.DEFAULT},
+    }
+
+
+_LAZY_SETTINGS: Dict[str, Callable[[], Any]] = {
+    "DEFAULT_CLASS_NAMES": _get_class_names,
+    "NUM_CLASSES": _get_num_classes,
+    "DEFAULT_TEST_SAMPLE_GT": _get_test_sample_gt,
+    "PRETRAINED_MODELS": _get_pretrained_models,
 }
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # cache as a regular module attribute, later lookups do not reach __getattr__
+    value = globals()[name] = _LAZY_SETTINGS[name]()
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_SETTINGS))